@@ -1,15 +1,26 @@
-from fastapi import FastAPI, HTTPException, Path
-from pydantic import BaseModel, Field, field_validator
+from fastapi import FastAPI, HTTPException, Path, Query
+from pydantic import BaseModel, Field, field_validator, model_validator
 from enum import Enum
 from typing import List, Optional
 from decimal import Decimal
+import os
 import re
+import sys
+from menu_store import MenuStore
+
+# restaurant_storage.py is shared with Restaurant_two_table
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(APP_DIR))
+from restaurant_storage import IdAllocator, SyncStorage, db_path
 
 app = FastAPI()
 
 
-menu_db = {}
-id_counter = 1
+menu_db = MenuStore()
+menu_ids = IdAllocator()
+# Handlers stay sync and run on FastAPI's threadpool, so ids and writes are
+# allocated from many threads at once
+storage = SyncStorage(db_path(APP_DIR))
 
 class FoodCategory(str, Enum):
     APPETIZER = "appetizer"
@@ -18,6 +29,11 @@ class FoodCategory(str, Enum):
     BEVERAGE = "beverage"
     SALAD = "salad"
 
+class PriceCategory(str, Enum):
+    BUDGET = "Budget"
+    MID_RANGE = "Mid-range"
+    PREMIUM = "Premium"
+
 class FoodItem(BaseModel):
     name: str = Field(..., min_length=3, max_length=100)
     description: str = Field(..., min_length=10, max_length=500)
@@ -42,31 +58,24 @@ class FoodItem(BaseModel):
             raise ValueError("Price must be between $1.00 and $100.00")
         return v
 
-    @field_validator("is_spicy")
-    def dessert_beverage_not_spicy(cls, v, values):
-        if "category" in values and values["category"] in [FoodCategory.DESSERT, FoodCategory.BEVERAGE] and v:
+    # Cross-field rules run after all fields are parsed (is_vegetarian comes after calories)
+    @model_validator(mode="after")
+    def cross_field_rules(self):
+        if self.category in [FoodCategory.DESSERT, FoodCategory.BEVERAGE] and self.is_spicy:
             raise ValueError("Desserts and Beverages cannot be spicy")
-        return v
-
-    @field_validator("calories")
-    def calories_limit_if_vegetarian(cls, v, values):
-        if v and values.get("is_vegetarian") and v >= 800:
+        if self.calories and self.is_vegetarian and self.calories >= 800:
             raise ValueError("Vegetarian items must have calories less than 800")
-        return v
-
-    @field_validator("preparation_time")
-    def prep_time_for_beverage(cls, v, values):
-        if values.get("category") == FoodCategory.BEVERAGE and v > 10:
+        if self.category == FoodCategory.BEVERAGE and self.preparation_time > 10:
             raise ValueError("Beverage preparation time should be ≤ 10 minutes")
-        return v
+        return self
 
     @property
     def price_category(self):
         if self.price < 10:
-            return "Budget"
+            return PriceCategory.BUDGET.value
         elif self.price <= 25:
-            return "Mid-range"
-        return "Premium"
+            return PriceCategory.MID_RANGE.value
+        return PriceCategory.PREMIUM.value
 
     @property
     def dietary_info(self):
@@ -78,53 +87,78 @@ class FoodItem(BaseModel):
         return info
 
 
-# Helper: add ID & computed fields
+# Helper: add ID & computed fields (run once per write; reads return the stored dict)
 def with_computed_fields(item_id, item: FoodItem):
-    data = item.dict()
+    data = item.model_dump()
     data["id"] = item_id
     data["price_category"] = item.price_category
     data["dietary_info"] = item.dietary_info
     return data
 
 
+@app.on_event("startup")
+def load_menu():
+    storage.open()
+    for item_id, data in storage.load("menu").items():
+        menu_db.save(item_id, with_computed_fields(item_id, FoodItem(**data)))
+    menu_ids.restart_after(storage.last_id("menu"))
+
+@app.on_event("shutdown")
+def close_storage():
+    storage.close()
+
+
 # Routes
 
 @app.get("/menu")
-def get_all_menu():
-    return [with_computed_fields(i, item) for i, item in menu_db.items()]
+def get_all_menu(
+    category: Optional[FoodCategory] = None,
+    price_category: Optional[PriceCategory] = None,
+    is_vegetarian: Optional[bool] = None,
+    is_spicy: Optional[bool] = None,
+    is_available: Optional[bool] = None,
+    min_price: Optional[Decimal] = Query(None, ge=0),
+    max_price: Optional[Decimal] = Query(None, ge=0)
+):
+    # With a price bound the result is sorted by price, otherwise by id
+    return menu_db.query(
+        min_price=min_price,
+        max_price=max_price,
+        category=category,
+        price_category=price_category.value if price_category else None,
+        is_vegetarian=is_vegetarian,
+        is_spicy=is_spicy,
+        is_available=is_available
+    )
 
 @app.get("/menu/{item_id}")
 def get_menu_item(item_id: int = Path(..., ge=1)):
     if item_id not in menu_db:
         raise HTTPException(status_code=404, detail="Item not found")
-    return with_computed_fields(item_id, menu_db[item_id])
+    return menu_db.get(item_id)
 
 @app.get("/menu/category/{category}")
 def get_by_category(category: FoodCategory):
-    result = []
-    for i, item in menu_db.items():
-        if item.category == category:
-            result.append(with_computed_fields(i, item))
-    return result
+    return menu_db.query(category=category)
 
 @app.post("/menu", status_code=201)
 def add_menu_item(item: FoodItem):
-    global id_counter
-    menu_db[id_counter] = item
-    response = with_computed_fields(id_counter, item)
-    id_counter += 1
+    item_id = menu_ids.next()
+    response = menu_db.save(item_id, with_computed_fields(item_id, item))
+    storage.put("menu", item_id, item.model_dump(mode="json"))
     return response
 
 @app.put("/menu/{item_id}")
 def update_menu_item(item_id: int, item: FoodItem):
     if item_id not in menu_db:
         raise HTTPException(status_code=404, detail="Item not found")
-    menu_db[item_id] = item
-    return with_computed_fields(item_id, item)
+    response = menu_db.save(item_id, with_computed_fields(item_id, item))
+    storage.put("menu", item_id, item.model_dump(mode="json"))
+    return response
 
 @app.delete("/menu/{item_id}", status_code=204)
 def delete_menu_item(item_id: int):
-    if item_id not in menu_db:
+    if not menu_db.delete(item_id):
         raise HTTPException(status_code=404, detail="Item not found")
-    del menu_db[item_id]
-    return
\ No newline at end of file
+    storage.delete("menu", item_id)
+    return
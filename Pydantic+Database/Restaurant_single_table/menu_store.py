@@ -0,0 +1,90 @@
+import threading
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+# Fields with an exact-match index; values are looked up as stored in the item dict
+INDEXED_FIELDS = ("category", "price_category", "is_vegetarian", "is_spicy", "is_available")
+
+
+class MenuStore:
+    """Menu items stored as ready-to-serve dicts, with lookup indexes.
+
+    Derived fields are computed once when an item is written, so reads just
+    return the stored dict. Each indexed field maps a value to the set of
+    item ids having it, and a (price, id) list kept sorted answers price
+    range queries with two bisects. Filter queries intersect the smallest
+    matching sets first.
+    """
+
+    def __init__(self):
+        self.items: Dict[int, Dict[str, Any]] = {}
+        self.index: Dict[Tuple[str, Any], Set[int]] = defaultdict(set)
+        self.by_price: List[Tuple[Decimal, int]] = []
+        self._lock = threading.Lock()
+
+    def get(self, item_id: int) -> Optional[Dict[str, Any]]:
+        return self.items.get(item_id)
+
+    def __contains__(self, item_id: int) -> bool:
+        return item_id in self.items
+
+    def list_all(self) -> List[Dict[str, Any]]:
+        return list(self.items.values())
+
+    def save(self, item_id: int, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Insert or replace an item; `data` must already carry its derived fields"""
+        with self._lock:
+            self._unindex(item_id)
+            self.items[item_id] = data
+            for field in INDEXED_FIELDS:
+                self.index[(field, data[field])].add(item_id)
+            insort(self.by_price, (data["price"], item_id))
+        return data
+
+    def delete(self, item_id: int) -> bool:
+        with self._lock:
+            if item_id not in self.items:
+                return False
+            self._unindex(item_id)
+            del self.items[item_id]
+            return True
+
+    def _unindex(self, item_id: int) -> None:
+        previous = self.items.get(item_id)
+        if previous is None:
+            return
+        for field in INDEXED_FIELDS:
+            self.index[(field, previous[field])].discard(item_id)
+        position = bisect_left(self.by_price, (previous["price"], item_id))
+        del self.by_price[position]
+
+    def price_range(self, min_price: Optional[Decimal] = None, max_price: Optional[Decimal] = None) -> List[int]:
+        """Ids of items priced within [min_price, max_price], cheapest first"""
+        with self._lock:
+            start = 0 if min_price is None else bisect_left(self.by_price, (min_price, -1))
+            end = len(self.by_price) if max_price is None else bisect_right(self.by_price, (max_price, float("inf")))
+            return [item_id for _, item_id in self.by_price[start:end]]
+
+    def query(self, min_price: Optional[Decimal] = None, max_price: Optional[Decimal] = None,
+              **filters: Any) -> List[Dict[str, Any]]:
+        """Items matching every given field filter (None means any value).
+
+        Results are ordered by price when a price bound is given, otherwise
+        by id.
+        """
+        with self._lock:
+            sets = sorted(
+                (self.index.get((field, value), set()) for field, value in filters.items() if value is not None),
+                key=len
+            )
+            matches = set(sets[0]).intersection(*sets[1:]) if sets else None
+
+        if min_price is not None or max_price is not None:
+            ids = [i for i in self.price_range(min_price, max_price) if matches is None or i in matches]
+        elif matches is None:
+            return self.list_all()
+        else:
+            ids = sorted(matches)
+        return [self.items[i] for i in ids if i in self.items]
@@ -0,0 +1,79 @@
+"""Concurrency stress test for menu id allocation and persistence.
+
+Fires parallel POST /menu requests from a thread pool and checks that every
+returned id is unique. The menu handlers are sync, so FastAPI runs them on
+its threadpool and ids and SQLite writes really are made from many threads
+at once. It then restarts the app on the same database and
+checks that every item was reloaded, indexes included, and that new ids
+continue after the highest stored one.
+
+    python stress_ids.py --requests 2000 --workers 32
+    python stress_ids.py --url http://localhost:8000   # against a running server (no restart check)
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+MENU_ITEM = {
+    "name": "Margherita Pizza",
+    "description": "Classic pizza with tomato sauce, mozzarella cheese, and fresh basil",
+    "category": "main_course",
+    "price": "15.99",
+    "preparation_time": 20,
+    "ingredients": ["pizza dough", "tomato sauce", "mozzarella", "basil", "olive oil"],
+    "calories": 650,
+    "is_vegetarian": True,
+    "is_spicy": False
+}
+
+
+def fire(client, requests: int, workers: int):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(workers) as pool:
+        responses = list(pool.map(lambda _: client.post("/menu", json=MENU_ITEM), range(requests)))
+    seconds = time.perf_counter() - start
+
+    ids = []
+    for response in responses:
+        assert response.status_code == 201, response.text
+        ids.append(response.json()["id"])
+    duplicates = len(ids) - len(set(ids))
+    print(f"menu {len(ids):>7} created   duplicates {duplicates}   {requests / seconds:,.0f} requests/s with {workers} workers")
+    assert duplicates == 0, "duplicate menu ids"
+    return ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--url", help="base URL of a running server; default runs the app in-process")
+    args = parser.parse_args()
+
+    if args.url:
+        import httpx
+        with httpx.Client(base_url=args.url, timeout=30) as client:
+            fire(client, args.requests, args.workers)
+        return
+
+    os.environ["RESTAURANT_DB_PATH"] = os.path.join(tempfile.mkdtemp(), "stress.db")
+    from fastapi.testclient import TestClient
+    import main as app_module
+
+    with TestClient(app_module.app) as client:
+        ids = fire(client, args.requests, args.workers)
+
+    # Restart: clear memory and load everything back from SQLite
+    app_module.menu_db = app_module.MenuStore()
+    with TestClient(app_module.app) as client:
+        assert sorted(app_module.menu_db.items) == sorted(ids)
+        assert len(client.get("/menu/category/main_course").json()) == len(ids)
+        new_id = client.post("/menu", json=MENU_ITEM).json()["id"]
+        assert new_id == max(ids) + 1, new_id
+    print(f"restart reloaded {len(ids)} menu items; next id {new_id}")
+
+
+if __name__ == "__main__":
+    main()
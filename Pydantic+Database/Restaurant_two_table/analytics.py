@@ -0,0 +1,232 @@
+import threading
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any, Dict, Hashable, List, Optional, Sequence
+
+import numpy as np
+
+
+def to_cents(amount: Decimal) -> int:
+    return int(amount * 100)
+
+
+def epoch_seconds(moment: datetime) -> int:
+    # Naive datetimes are UTC, as produced by datetime.utcnow()
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp())
+
+
+class ColumnTable:
+    """Append-only table of NumPy columns that grow by doubling.
+
+    `view()` returns length-`size` slices of the current buffers. A later
+    append either writes past the end of those slices or moves to new
+    buffers, so a view taken under the lock stays consistent afterwards.
+    """
+
+    def __init__(self, schema: Dict[str, Any], capacity: int = 1024):
+        self.columns = {name: np.zeros(capacity, dtype=dtype) for name, dtype in schema.items()}
+        self.size = 0
+
+    def append(self, **values: Any) -> int:
+        """Append rows given as equal-length sequences; returns the first new row"""
+        count = len(next(iter(values.values())))
+        self._reserve(self.size + count)
+        start = self.size
+        for name, column in self.columns.items():
+            column[start:start + count] = values[name]
+        self.size += count
+        return start
+
+    def _reserve(self, needed: int) -> None:
+        capacity = len(next(iter(self.columns.values())))
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name, column in self.columns.items():
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            self.columns[name] = grown
+
+    def view(self) -> Dict[str, np.ndarray]:
+        return {name: column[:self.size] for name, column in self.columns.items()}
+
+
+class OrderAnalytics:
+    """Columnar mirror of the orders for aggregate queries.
+
+    Every order write is mirrored into an order table (one row per order)
+    and a line table (one row per order item), with money held as integer
+    cents. Queries are vectorised group-bys (bincount, argpartition) over
+    whole columns. Replacing an order's items deactivates its old lines
+    and appends new ones; status changes update the order row in place.
+    Per-item quantity and revenue totals are also kept up to date on every
+    write, so top-items only ranks one value per menu item.
+    """
+
+    ORDER_SCHEMA = {
+        "order_id": np.int64, "created": np.int64, "hour": np.int8,
+        "items": np.int32, "total_cents": np.int64, "status": np.int8,
+    }
+    LINE_SCHEMA = {
+        "order_row": np.int64, "menu_item_id": np.int32, "quantity": np.int32,
+        "line_cents": np.int64, "active": np.bool_,
+    }
+
+    def __init__(self, statuses: Sequence[Hashable]):
+        # Funnel order: each status is assumed to follow the ones before it
+        self.statuses = list(statuses)
+        self.status_codes = {status: code for code, status in enumerate(self.statuses)}
+        self.orders = ColumnTable(self.ORDER_SCHEMA)
+        self.lines = ColumnTable(self.LINE_SCHEMA)
+        self.order_rows: Dict[int, int] = {}
+        self.order_lines: Dict[int, range] = {}
+        # Indexed by menu_item_id
+        self.item_quantity = np.zeros(256, dtype=np.int64)
+        self.item_cents = np.zeros(256, dtype=np.int64)
+        self._lock = threading.Lock()
+
+    # --------------------- Writes ---------------------
+
+    def record_order(self, order) -> None:
+        created = epoch_seconds(order.created_at)
+        with self._lock:
+            row = self.orders.append(
+                order_id=[order.id],
+                created=[created],
+                hour=[created // 3600 % 24],
+                items=[order.total_items_count],
+                total_cents=[to_cents(order.total_amount)],
+                status=[self.status_codes[order.status]]
+            )
+            self.order_rows[order.id] = row
+            self._append_lines(order, row)
+
+    def record_items(self, order) -> None:
+        with self._lock:
+            row = self.order_rows[order.id]
+            old = self.order_lines[order.id]
+            self.lines.columns["active"][old.start:old.stop] = False
+            self._add_item_totals(
+                self.lines.columns["menu_item_id"][old.start:old.stop],
+                -self.lines.columns["quantity"][old.start:old.stop],
+                -self.lines.columns["line_cents"][old.start:old.stop]
+            )
+            self.orders.columns["items"][row] = order.total_items_count
+            self.orders.columns["total_cents"][row] = to_cents(order.total_amount)
+            self._append_lines(order, row)
+
+    def record_status(self, order_id: int, status: Hashable) -> None:
+        with self._lock:
+            self.orders.columns["status"][self.order_rows[order_id]] = self.status_codes[status]
+
+    def _append_lines(self, order, row: int) -> None:
+        count = len(order.items)
+        item_ids = [item.menu_item_id for item in order.items]
+        quantities = [item.quantity for item in order.items]
+        cents = [to_cents(item.quantity * item.unit_price) for item in order.items]
+        start = self.lines.append(
+            order_row=[row] * count,
+            menu_item_id=item_ids,
+            quantity=quantities,
+            line_cents=cents,
+            active=[True] * count
+        )
+        self.order_lines[order.id] = range(start, start + count)
+        self._add_item_totals(np.asarray(item_ids), np.asarray(quantities), np.asarray(cents))
+
+    def _add_item_totals(self, item_ids: np.ndarray, quantities: np.ndarray, cents: np.ndarray) -> None:
+        if not len(item_ids):
+            return
+        needed = int(item_ids.max()) + 1
+        if needed > len(self.item_quantity):
+            size = max(needed, 2 * len(self.item_quantity))
+            self.item_quantity = np.pad(self.item_quantity, (0, size - len(self.item_quantity)))
+            self.item_cents = np.pad(self.item_cents, (0, size - len(self.item_cents)))
+        if len(item_ids) < 64:
+            np.add.at(self.item_quantity, item_ids, quantities)
+            np.add.at(self.item_cents, item_ids, cents)
+        else:
+            self.item_quantity[:needed] += np.bincount(item_ids, weights=quantities, minlength=needed).astype(np.int64)
+            self.item_cents[:needed] += np.bincount(item_ids, weights=cents, minlength=needed).astype(np.int64)
+
+    def bulk_load(self, orders: Dict[str, np.ndarray], lines: Dict[str, np.ndarray]) -> None:
+        """Append pre-built columns (synthetic data and benchmarks).
+
+        `lines["order_row"]` is relative to the first order in `orders`.
+        """
+        with self._lock:
+            first = self.orders.append(**orders)
+            self.lines.append(**dict(lines, order_row=lines["order_row"] + first))
+            for offset, order_id in enumerate(orders["order_id"].tolist()):
+                self.order_rows[order_id] = first + offset
+            active = lines["active"]
+            self._add_item_totals(lines["menu_item_id"][active], lines["quantity"][active], lines["line_cents"][active])
+
+    # --------------------- Queries ---------------------
+
+    def _views(self):
+        with self._lock:
+            return self.orders.view(), self.lines.view()
+
+    def revenue_by_hour(self, since: Optional[datetime] = None, until: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        orders, _ = self._views()
+        mask = np.ones(len(orders["created"]), dtype=bool)
+        if since is not None:
+            mask &= orders["created"] >= epoch_seconds(since)
+        if until is not None:
+            mask &= orders["created"] < epoch_seconds(until)
+        hours = orders["hour"][mask]
+        revenue = np.bincount(hours, weights=orders["total_cents"][mask], minlength=24)
+        counts = np.bincount(hours, minlength=24)
+        return [
+            {"hour": hour, "orders": int(counts[hour]), "revenue": round(revenue[hour] / 100, 2)}
+            for hour in range(24)
+        ]
+
+    def top_items(self, limit: int = 10, by: str = "quantity") -> List[Dict[str, Any]]:
+        with self._lock:
+            quantity = self.item_quantity.copy()
+            revenue = self.item_cents.copy()
+        score = quantity if by == "quantity" else revenue
+        limit = min(limit, int(np.count_nonzero(quantity)))
+        if not limit:
+            return []
+        top = np.argpartition(-score, limit - 1)[:limit]
+        top = top[np.argsort(-score[top], kind="stable")]
+        return [
+            {"menu_item_id": int(i), "quantity": int(quantity[i]), "revenue": round(revenue[i] / 100, 2)}
+            for i in top
+        ]
+
+    def basket_size(self) -> Dict[str, Any]:
+        orders, _ = self._views()
+        items = orders["items"]
+        if not len(items):
+            return {"orders": 0, "average_items": 0.0, "median_items": 0.0, "p90_items": 0.0, "average_order_value": 0.0}
+        median, p90 = np.percentile(items, [50, 90])
+        return {
+            "orders": int(len(items)),
+            "average_items": round(float(items.mean()), 2),
+            "median_items": float(median),
+            "p90_items": float(p90),
+            "average_order_value": round(float(orders["total_cents"].mean()) / 100, 2)
+        }
+
+    def status_funnel(self) -> List[Dict[str, Any]]:
+        orders, _ = self._views()
+        counts = np.bincount(orders["status"], minlength=len(self.statuses))
+        # Orders only move forward, so everything at or past a stage has reached it
+        reached = np.cumsum(counts[::-1])[::-1]
+        total = int(reached[0]) if len(reached) else 0
+        return [
+            {
+                "status": getattr(status, "value", status),
+                "current": int(counts[code]),
+                "reached": int(reached[code]),
+                "conversion": round(int(reached[code]) / total, 4) if total else 0.0
+            }
+            for code, status in enumerate(self.statuses)
+        ]
@@ -0,0 +1,85 @@
+"""Query latency of the columnar order analytics.
+
+Bulk-loads synthetic orders (1-6 lines each, 200 menu items, a month of
+timestamps, mixed statuses) into OrderAnalytics and times every query,
+best of `--repeat` runs.
+
+    python analytics_benchmark.py --lines 10000000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from analytics import OrderAnalytics
+
+STATUSES = ["pending", "confirmed", "ready", "delivered"]
+
+
+def synthetic(lines: int, menu_items: int, seed: int):
+    rng = np.random.default_rng(seed)
+    per_order = rng.integers(1, 7, size=lines // 3 + 1)
+    ends = np.cumsum(per_order)
+    per_order = per_order[:np.searchsorted(ends, lines) + 1]
+    per_order[-1] -= ends[len(per_order) - 1] - lines
+    order_count = len(per_order)
+
+    order_row = np.repeat(np.arange(order_count), per_order)
+    menu_item_id = rng.integers(1, menu_items + 1, size=lines, dtype=np.int32)
+    quantity = rng.integers(1, 4, size=lines, dtype=np.int32)
+    prices = rng.integers(199, 3999, size=menu_items + 1)
+    line_cents = quantity * prices[menu_item_id]
+
+    created = 1_700_000_000 + np.sort(rng.integers(0, 30 * 24 * 3600, size=order_count))
+    orders = {
+        "order_id": np.arange(1, order_count + 1, dtype=np.int64),
+        "created": created,
+        "hour": (created // 3600 % 24).astype(np.int8),
+        "items": np.bincount(order_row, weights=quantity, minlength=order_count).astype(np.int32),
+        "total_cents": np.bincount(order_row, weights=line_cents, minlength=order_count).astype(np.int64) + 299,
+        "status": rng.choice(len(STATUSES), size=order_count, p=[0.1, 0.1, 0.1, 0.7]).astype(np.int8),
+    }
+    line_columns = {
+        "order_row": order_row, "menu_item_id": menu_item_id, "quantity": quantity,
+        "line_cents": line_cents, "active": np.ones(lines, dtype=bool),
+    }
+    return orders, line_columns
+
+
+def timed(label: str, repeat: int, fn) -> None:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    print(f"  {label:<32}{best * 1000:>10.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=10_000_000)
+    parser.add_argument("--menu-items", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    orders, lines = synthetic(args.lines, args.menu_items, args.seed)
+    analytics = OrderAnalytics(STATUSES)
+    start = time.perf_counter()
+    analytics.bulk_load(orders, lines)
+    print(f"loaded {len(orders['order_id']):,} orders / {args.lines:,} lines in {time.perf_counter() - start:.2f}s")
+
+    week = (1_700_000_000 + 7 * 24 * 3600, 1_700_000_000 + 14 * 24 * 3600)
+    from datetime import datetime, timezone
+    since, until = (datetime.fromtimestamp(t, timezone.utc) for t in week)
+
+    timed("revenue_by_hour()", args.repeat, analytics.revenue_by_hour)
+    timed("revenue_by_hour(one week)", args.repeat, lambda: analytics.revenue_by_hour(since, until))
+    timed("top_items(10, by=quantity)", args.repeat, lambda: analytics.top_items(10))
+    timed("top_items(10, by=revenue)", args.repeat, lambda: analytics.top_items(10, "revenue"))
+    timed("basket_size()", args.repeat, analytics.basket_size)
+    timed("status_funnel()", args.repeat, analytics.status_funnel)
+
+
+if __name__ == "__main__":
+    main()
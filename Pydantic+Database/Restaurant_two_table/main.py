@@ -1,9 +1,21 @@
-from fastapi import FastAPI, HTTPException, Path
+from fastapi import FastAPI, HTTPException, Path, Query
 from fastapi.responses import JSONResponse
-from pydantic import BaseModel, Field, ValidationError
-from typing import Dict, List
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+from typing import Dict, List, Literal, Optional
 from enum import Enum
 from decimal import Decimal
+from datetime import datetime
+import os
+import sys
+from pricing import PricingEngine, PricingRules
+from status_index import InvalidTransition, OrderStatusIndex
+from menu_snapshot import MenuCatalog, MenuSnapshot
+from analytics import OrderAnalytics
+
+# restaurant_storage.py is shared with Restaurant_single_table
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(APP_DIR))
+from restaurant_storage import IdAllocator, Storage, db_path
 
 app = FastAPI(
     title="Restaurant Ordering System",
@@ -27,6 +39,28 @@ class OrderStatus(str, Enum):
     DELIVERED = "delivered"
 
 
+# Allowed status changes; orders only move forward one step at a time
+ORDER_TRANSITIONS = {
+    OrderStatus.PENDING: {OrderStatus.CONFIRMED},
+    OrderStatus.CONFIRMED: {OrderStatus.READY},
+    OrderStatus.READY: {OrderStatus.DELIVERED},
+    OrderStatus.DELIVERED: set(),
+}
+
+# Statuses shown on the kitchen display
+KITCHEN_STATUSES = [OrderStatus.PENDING, OrderStatus.CONFIRMED, OrderStatus.READY]
+
+
+# One line of an order as sent by the client; checked before it is looked up in the menu
+class OrderLine(BaseModel):
+    menu_item_id: int
+    quantity: int
+
+
+order_lines = TypeAdapter(List[OrderLine])
+
+
+# Name and unit price are filled in from the menu snapshot when the order is priced
 class OrderItem(BaseModel):
     menu_item_id: int = Field(..., gt=0)
     menu_item_name: str = Field(..., min_length=1, max_length=100)
@@ -40,7 +74,7 @@ class OrderItem(BaseModel):
 
 class Customer(BaseModel):
     name: str = Field(..., min_length=2, max_length=50)
-    phone: str = Field(..., regex=r'^\d{10}')
+    phone: str = Field(..., pattern=r'^\d{10}')
     address: str = Field(..., min_length=5, max_length=100)
 
 
@@ -49,19 +83,17 @@ class Order(BaseModel):
     customer: Customer
     items: List[OrderItem]
     status: OrderStatus = OrderStatus.PENDING
-
-    @property
-    def total_items_count(self) -> int:
-        return sum(item.quantity for item in self.items)
-
-    @property
-    def items_total(self) -> Decimal:
-        return sum(item.item_total for item in self.items)
-
-    @property
-    def total_amount(self) -> Decimal:
-        delivery_fee = Decimal("2.99")
-        return self.items_total + delivery_fee
+    # Priced once by the pricing engine when the order is created or its items change
+    total_items_count: int
+    items_total: Decimal
+    discount: Decimal
+    tax: Decimal
+    delivery_fee: Decimal
+    total_amount: Decimal
+    applied_promotions: List[str] = []
+    pricing_version: int
+    menu_version: int
+    created_at: datetime = Field(default_factory=datetime.utcnow)
 
 
 # Response model for readability
@@ -71,84 +103,195 @@ class OrderResponse(BaseModel):
     items: List[OrderItem]
     total_items_count: int
     items_total: Decimal
+    discount: Decimal
+    tax: Decimal
+    delivery_fee: Decimal
     total_amount: Decimal
+    applied_promotions: List[str]
+    menu_version: int
     status: OrderStatus
 
 
 # --------------------- DBs ---------------------
-menu_db: Dict[int, FoodItem] = {}
+# Immutable, versioned views of the menu; order pricing reads the current one without locking
+menu_catalog = MenuCatalog()
 orders_db: Dict[int, Order] = {}
-next_menu_id = 1
-next_order_id = 1
+menu_ids = IdAllocator()
+order_ids = IdAllocator()
+storage = Storage(db_path(APP_DIR))
+
+status_index = OrderStatusIndex(ORDER_TRANSITIONS)
+# Columnar copy of the orders for the analytics endpoints
+order_analytics = OrderAnalytics(list(OrderStatus))
+
+# Default rules: no promotions or tax, flat $2.99 delivery
+pricing_engine = PricingEngine(PricingRules())
+
+
+def price_order(order_id: int, customer: Customer, items: List[OrderItem], menu_version: int,
+                status: OrderStatus = OrderStatus.PENDING, created_at: Optional[datetime] = None) -> Order:
+    engine = pricing_engine
+    totals = engine.price(items)
+    return Order.model_construct(
+        id=order_id,
+        customer=customer,
+        items=items,
+        status=status,
+        total_items_count=totals.total_items_count,
+        items_total=totals.items_total,
+        discount=totals.discount,
+        tax=totals.tax,
+        delivery_fee=totals.delivery_fee,
+        total_amount=totals.total_amount,
+        applied_promotions=list(totals.applied_promotions),
+        pricing_version=engine.version,
+        menu_version=menu_version,
+        created_at=created_at or datetime.utcnow()
+    )
+
+
+def to_response(order: Order) -> OrderResponse:
+    return OrderResponse.model_construct(**{name: getattr(order, name) for name in OrderResponse.model_fields})
+
+# --------------------- Storage ---------------------
+
+@app.on_event("startup")
+async def load_data():
+    await storage.open()
+    menu = {item_id: FoodItem(**data) for item_id, data in (await storage.load("menu")).items()}
+    for order_id, data in (await storage.load("orders")).items():
+        order = Order.model_validate(data)
+        orders_db[order_id] = order
+        status_index.add(order_id, order.status)
+        order_analytics.record_order(order)
+    # Start past every version an order already refers to
+    menu_catalog.reset(menu, max((o.menu_version for o in orders_db.values()), default=0) + 1)
+    menu_ids.restart_after(await storage.last_id("menu"))
+    order_ids.restart_after(await storage.last_id("orders"))
+
+
+@app.on_event("shutdown")
+async def close_storage():
+    await storage.close()
+
+
+async def save_order(order: Order):
+    orders_db[order.id] = order
+    await storage.put("orders", order.id, order.model_dump(mode="json"))
 
 # --------------------- Menu API (Optional Helper) ---------------------
 
 @app.post("/menu", status_code=201)
-def add_menu_item(item: FoodItem):
-    global next_menu_id
-    item.id = next_menu_id
-    menu_db[next_menu_id] = item
-    next_menu_id += 1
+async def add_menu_item(item: FoodItem):
+    item.id = menu_ids.next()
+    menu_catalog.put(item.id, item)
+    await storage.put("menu", item.id, item.model_dump(mode="json"))
     return item
 
 
 @app.get("/menu", response_model=List[FoodItem])
 def get_menu():
-    return list(menu_db.values())
+    return list(menu_catalog.current.items.values())
+
+
+@app.put("/menu/{item_id}", response_model=FoodItem)
+async def update_menu_item(item_id: int, item: FoodItem):
+    # Orders already placed keep the price from the snapshot they were priced against
+    if item_id not in menu_catalog.current.items:
+        raise HTTPException(status_code=404, detail="Menu item not found")
+    item.id = item_id
+    menu_catalog.put(item_id, item)
+    await storage.put("menu", item_id, item.model_dump(mode="json"))
+    return item
+
+
+@app.delete("/menu/{item_id}", status_code=204)
+async def delete_menu_item(item_id: int):
+    if item_id not in menu_catalog.current.items:
+        raise HTTPException(status_code=404, detail="Menu item not found")
+    menu_catalog.remove(item_id)
+    await storage.delete("menu", item_id)
+
+
+@app.get("/menu/version")
+def get_menu_version():
+    return {"version": menu_catalog.current.version, "items": len(menu_catalog.current.items)}
+
+
+# --------------------- Pricing API ---------------------
+
+@app.get("/pricing/rules", response_model=PricingRules)
+def get_pricing_rules():
+    return pricing_engine.rules
+
+
+@app.put("/pricing/rules", response_model=PricingRules)
+def update_pricing_rules(rules: PricingRules):
+    # New orders use the new rules; existing orders keep the totals they were priced with
+    global pricing_engine
+    pricing_engine = PricingEngine(rules, version=pricing_engine.version + 1)
+    return rules
 
 
 # --------------------- Orders API ---------------------
 
-@app.post("/orders", response_model=OrderResponse, status_code=201)
-def create_order(order_data: dict):
-    global next_order_id
+def parse_items(items_data: list, snapshot: MenuSnapshot) -> List[OrderItem]:
+    # Names and prices come from the menu snapshot; client-sent values are ignored
+    if not items_data:
+        raise HTTPException(status_code=400, detail="Order must contain at least one item.")
+    lines = order_lines.validate_python(items_data)
+    menu_items, missing = snapshot.resolve(line.menu_item_id for line in lines)
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Menu items not found: {missing}")
+    return [
+        OrderItem(
+            menu_item_id=menu_item.id,
+            menu_item_name=menu_item.name,
+            quantity=line.quantity,
+            unit_price=menu_item.price
+        )
+        for line, menu_item in zip(lines, menu_items)
+    ]
 
+
+@app.post("/orders", response_model=OrderResponse, status_code=201)
+async def create_order(order_data: dict):
     try:
         customer = Customer(**order_data["customer"])
-        items_data = order_data.get("items", [])
-        if not items_data:
-            raise HTTPException(status_code=400, detail="Order must contain at least one item.")
-
-        order_items = []
-        for item in items_data:
-            order_item = OrderItem(**item)
-            order_items.append(order_item)
-
-        order = Order(
-            id=next_order_id,
-            customer=customer,
-            items=order_items
-        )
-        orders_db[next_order_id] = order
-        next_order_id += 1
-
-        return OrderResponse(
-            id=order.id,
-            customer=order.customer,
-            items=order.items,
-            total_items_count=order.total_items_count,
-            items_total=order.items_total,
-            total_amount=order.total_amount,
-            status=order.status
-        )
-
+        snapshot = menu_catalog.current
+        order_items = parse_items(order_data.get("items", []), snapshot)
     except ValidationError as ve:
         raise HTTPException(status_code=422, detail=ve.errors())
 
+    order = price_order(order_ids.next(), customer, order_items, snapshot.version)
+    status_index.add(order.id, order.status)
+    order_analytics.record_order(order)
+    await save_order(order)
+    return to_response(order)
+
 
 @app.get("/orders", response_model=List[OrderResponse])
-def get_all_orders():
-    return [
-        OrderResponse(
-            id=o.id,
-            customer=o.customer,
-            items=o.items,
-            total_items_count=o.total_items_count,
-            items_total=o.items_total,
-            total_amount=o.total_amount,
-            status=o.status
-        ) for o in orders_db.values()
-    ]
+def get_all_orders(
+    status: Optional[OrderStatus] = None,
+    after: Optional[int] = Query(None, ge=0, description="Return orders with an id greater than this"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500)
+):
+    ids = status_index.page(status, after or 0, limit, skip)
+    return [to_response(orders_db[i]) for i in ids]
+
+
+@app.get("/kitchen/queue")
+def get_kitchen_queue(limit: int = Query(20, ge=1, le=200)):
+    # Oldest first for every status the kitchen still has to act on
+    counts = status_index.counts()
+    return {
+        status.value: {
+            "count": counts[status],
+            "orders": [to_response(orders_db[i]) for i in status_index.page(status, 0, limit)]
+        }
+        for status in KITCHEN_STATUSES
+    }
 
 
 @app.get("/orders/{order_id}", response_model=OrderResponse)
@@ -157,31 +300,66 @@ def get_order(order_id: int = Path(..., gt=0)):
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
 
-    return OrderResponse(
-        id=order.id,
-        customer=order.customer,
-        items=order.items,
-        total_items_count=order.total_items_count,
-        items_total=order.items_total,
-        total_amount=order.total_amount,
-        status=order.status
-    )
+    return to_response(order)
+
+
+@app.put("/orders/{order_id}/items", response_model=OrderResponse)
+async def update_order_items(order_id: int, items_data: List[dict]):
+    order = orders_db.get(order_id)
+    if not order:
+        raise HTTPException(status_code=404, detail="Order not found")
+    if order.status != OrderStatus.PENDING:
+        raise HTTPException(status_code=400, detail="Only pending orders can be changed.")
+
+    try:
+        snapshot = menu_catalog.current
+        order = price_order(order_id, order.customer, parse_items(items_data, snapshot), snapshot.version,
+                            order.status, order.created_at)
+    except ValidationError as ve:
+        raise HTTPException(status_code=422, detail=ve.errors())
+    order_analytics.record_items(order)
+    await save_order(order)
+    return to_response(order)
 
 
 @app.put("/orders/{order_id}/status", response_model=OrderResponse)
-def update_order_status(order_id: int, status: OrderStatus):
+async def update_order_status(order_id: int, status: OrderStatus):
     order = orders_db.get(order_id)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
 
+    try:
+        status_index.transition(order_id, order.status, status)
+    except InvalidTransition as e:
+        raise HTTPException(status_code=400, detail=str(e))
     order.status = status
-    return OrderResponse(
-        id=order.id,
-        customer=order.customer,
-        items=order.items,
-        total_items_count=order.total_items_count,
-        items_total=order.items_total,
-        total_amount=order.total_amount,
-        status=order.status
-    )
+    order_analytics.record_status(order_id, status)
+    await save_order(order)
+    return to_response(order)
+
+
+# --------------------- Analytics API ---------------------
+
+@app.get("/analytics/revenue-by-hour")
+def revenue_by_hour(since: Optional[datetime] = None, until: Optional[datetime] = None):
+    # Hour of day in UTC, summed over every order created in [since, until)
+    return order_analytics.revenue_by_hour(since, until)
+
+
+@app.get("/analytics/top-items")
+def top_items(limit: int = Query(10, ge=1, le=100), by: Literal["quantity", "revenue"] = "quantity"):
+    menu = menu_catalog.current.items
+    return [
+        {**row, "name": menu[row["menu_item_id"]].name if row["menu_item_id"] in menu else None}
+        for row in order_analytics.top_items(limit, by)
+    ]
+
+
+@app.get("/analytics/basket-size")
+def basket_size():
+    return order_analytics.basket_size()
+
 
+@app.get("/analytics/status-funnel")
+def status_funnel():
+    return order_analytics.status_funnel()
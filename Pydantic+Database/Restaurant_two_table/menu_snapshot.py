@@ -0,0 +1,61 @@
+import threading
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+
+class MenuSnapshot:
+    """One immutable version of the menu.
+
+    `items` is a read-only view over a dict nobody else holds, so a
+    snapshot never changes after it is published and readers need no lock.
+    """
+
+    __slots__ = ("version", "items")
+
+    def __init__(self, version: int, items: Dict[int, Any]):
+        self.version = version
+        self.items: Mapping[int, Any] = MappingProxyType(items)
+
+    def resolve(self, item_ids: Iterable[int]) -> Tuple[List[Any], List[int]]:
+        """Look up many items in one pass; returns (found items, missing ids)"""
+        found, missing = [], []
+        get = self.items.get
+        for item_id in item_ids:
+            item = get(item_id)
+            if item is None:
+                missing.append(item_id)
+            else:
+                found.append(item)
+        return found, missing
+
+
+class MenuCatalog:
+    """Holds the current MenuSnapshot and publishes new ones copy-on-write.
+
+    Writers copy the current items, apply their change and swap the new
+    snapshot in with a single reference assignment; a lock only orders the
+    writers. Readers take `catalog.current` once and price a whole order
+    against that version, even if the menu changes meanwhile.
+    """
+
+    def __init__(self, items: Optional[Dict[int, Any]] = None, version: int = 1):
+        self.current = MenuSnapshot(version, dict(items or {}))
+        self._write_lock = threading.Lock()
+
+    def _publish(self, change) -> MenuSnapshot:
+        with self._write_lock:
+            items = dict(self.current.items)
+            change(items)
+            self.current = MenuSnapshot(self.current.version + 1, items)
+            return self.current
+
+    def put(self, item_id: int, item: Any) -> MenuSnapshot:
+        return self._publish(lambda items: items.__setitem__(item_id, item))
+
+    def remove(self, item_id: int) -> MenuSnapshot:
+        return self._publish(lambda items: items.pop(item_id, None))
+
+    def reset(self, items: Dict[int, Any], version: int) -> None:
+        """Replace the menu wholesale (used when loading from storage)"""
+        with self._write_lock:
+            self.current = MenuSnapshot(version, dict(items))
@@ -0,0 +1,141 @@
+from dataclasses import dataclass
+from decimal import ROUND_HALF_UP, Decimal
+from enum import Enum
+from typing import Callable, FrozenSet, Iterable, List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+CENT = Decimal("0.01")
+
+
+def to_cents(amount: Decimal) -> Decimal:
+    return amount.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+# --------------------- Rule definitions ---------------------
+
+class PromotionKind(str, Enum):
+    PERCENT = "percent"
+    FIXED = "fixed"
+
+
+class PromotionRule(BaseModel):
+    code: str = Field(..., min_length=1, max_length=30)
+    kind: PromotionKind
+    value: Decimal = Field(..., gt=0)
+    min_subtotal: Decimal = Field(Decimal("0"), ge=0)
+    # Only these menu items count towards the discount; empty means the whole order
+    menu_item_ids: List[int] = []
+
+
+class TaxRule(BaseModel):
+    rate: Decimal = Field(Decimal("0"), ge=0, le=1)
+
+
+class DeliveryRule(BaseModel):
+    fee: Decimal = Field(Decimal("2.99"), ge=0)
+    free_above: Optional[Decimal] = Field(None, gt=0)
+
+
+class PricingRules(BaseModel):
+    promotions: List[PromotionRule] = []
+    tax: TaxRule = TaxRule()
+    delivery: DeliveryRule = DeliveryRule()
+
+
+# --------------------- Compiled engine ---------------------
+
+@dataclass(frozen=True)
+class OrderTotals:
+    total_items_count: int
+    items_total: Decimal
+    discount: Decimal
+    tax: Decimal
+    delivery_fee: Decimal
+    total_amount: Decimal
+    applied_promotions: Tuple[str, ...]
+
+
+# (priced lines as (menu_item_id, line_total), items_total) -> discount or None
+PromotionFn = Callable[[List[Tuple[int, Decimal]], Decimal], Optional[Decimal]]
+
+
+def compile_promotion(rule: PromotionRule) -> PromotionFn:
+    """Turn a rule into a closure with its constants and item set bound once"""
+    min_subtotal = rule.min_subtotal
+    item_ids: FrozenSet[int] = frozenset(rule.menu_item_ids)
+    if rule.kind == PromotionKind.PERCENT:
+        rate = rule.value / 100
+
+        def discount(amount: Decimal) -> Decimal:
+            return amount * rate
+    else:
+        value = rule.value
+
+        def discount(amount: Decimal) -> Decimal:
+            return min(value, amount)
+
+    if not item_ids:
+        def apply(lines, items_total):
+            return discount(items_total) if items_total >= min_subtotal else None
+    else:
+        def apply(lines, items_total):
+            if items_total < min_subtotal:
+                return None
+            eligible = sum((total for item_id, total in lines if item_id in item_ids), Decimal("0"))
+            return discount(eligible) if eligible else None
+    return apply
+
+
+class PricingEngine:
+    """Prices an order once, from a rule set compiled up front.
+
+    Promotions stack in the order they are listed and can never take the
+    order below zero; tax is charged on the discounted subtotal; delivery is
+    free once the discounted subtotal reaches `free_above`. Engines are
+    immutable, so changing the rules means compiling a new one and swapping
+    it in; orders keep the totals they were priced with.
+    """
+
+    def __init__(self, rules: PricingRules, version: int = 1):
+        self.rules = rules
+        self.version = version
+        self._promotions = [(rule.code, compile_promotion(rule)) for rule in rules.promotions]
+        self._tax_rate = rules.tax.rate
+        self._delivery_fee = to_cents(rules.delivery.fee)
+        self._free_above = rules.delivery.free_above
+
+    def price(self, items: Iterable) -> OrderTotals:
+        """Price OrderItem-like objects (menu_item_id, quantity, unit_price)"""
+        lines: List[Tuple[int, Decimal]] = []
+        count = 0
+        items_total = Decimal("0")
+        for item in items:
+            line_total = item.quantity * item.unit_price
+            lines.append((item.menu_item_id, line_total))
+            count += item.quantity
+            items_total += line_total
+
+        discount = Decimal("0")
+        applied = []
+        for code, apply in self._promotions:
+            amount = apply(lines, items_total)
+            if amount:
+                discount += amount
+                applied.append(code)
+        discount = to_cents(min(discount, items_total))
+
+        subtotal = items_total - discount
+        tax = to_cents(subtotal * self._tax_rate)
+        delivery_fee = self._delivery_fee
+        if self._free_above is not None and subtotal >= self._free_above:
+            delivery_fee = Decimal("0.00")
+        return OrderTotals(
+            total_items_count=count,
+            items_total=items_total,
+            discount=discount,
+            tax=tax,
+            delivery_fee=delivery_fee,
+            total_amount=subtotal + tax + delivery_fee,
+            applied_promotions=tuple(applied)
+        )
@@ -0,0 +1,107 @@
+import threading
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, Hashable, Iterable, List, Optional, Set
+
+
+class InvalidTransition(Exception):
+    def __init__(self, current: Hashable, requested: Hashable):
+        self.current = current
+        self.requested = requested
+        super().__init__(
+            f"Cannot move an order from {getattr(current, 'value', current)} to {getattr(requested, 'value', requested)}"
+        )
+
+
+class OrderStatusIndex:
+    """Order ids per status, plus the state machine that moves them.
+
+    Each status keeps its ids in sets grouped by `id // BLOCK`, with the
+    sorted numbers of its non-empty blocks alongside. A transition moves one
+    id between two sets. Order ids are allocated in creation order, so an id
+    works as a page cursor: a page bisects to the cursor's block, skips whole
+    blocks by their size and sorts only the blocks it returns ids from. All
+    ids are also kept in one sorted list, so an unfiltered page is a bisect
+    plus a slice whatever the offset.
+    """
+
+    BLOCK = 1024
+
+    def __init__(self, transitions: Dict[Hashable, Iterable[Hashable]]):
+        self.transitions = {status: frozenset(targets) for status, targets in transitions.items()}
+        self.blocks: Dict[Hashable, Dict[int, Set[int]]] = {status: {} for status in self.transitions}
+        self.block_numbers: Dict[Hashable, List[int]] = {status: [] for status in self.transitions}
+        self.sizes: Dict[Hashable, int] = {status: 0 for status in self.transitions}
+        self.all_ids: List[int] = []
+        self._lock = threading.Lock()
+
+    def add(self, order_id: int, status: Hashable) -> None:
+        with self._lock:
+            if not self.all_ids or order_id > self.all_ids[-1]:
+                self.all_ids.append(order_id)
+            else:
+                insort(self.all_ids, order_id)
+            self._put(status, order_id)
+
+    def transition(self, order_id: int, current: Hashable, requested: Hashable) -> None:
+        """Move an order to `requested`, or raise InvalidTransition"""
+        if requested not in self.transitions[current]:
+            raise InvalidTransition(current, requested)
+        with self._lock:
+            if not self._take(current, order_id):
+                # Another request moved this order first
+                raise InvalidTransition(current, requested)
+            self._put(requested, order_id)
+
+    def _put(self, status: Hashable, order_id: int) -> None:
+        number = order_id // self.BLOCK
+        block = self.blocks[status].get(number)
+        if block is None:
+            block = self.blocks[status][number] = set()
+            insort(self.block_numbers[status], number)
+        block.add(order_id)
+        self.sizes[status] += 1
+
+    def _take(self, status: Hashable, order_id: int) -> bool:
+        number = order_id // self.BLOCK
+        block = self.blocks[status].get(number)
+        if block is None or order_id not in block:
+            return False
+        block.remove(order_id)
+        self.sizes[status] -= 1
+        if not block:
+            del self.blocks[status][number]
+            numbers = self.block_numbers[status]
+            del numbers[bisect_left(numbers, number)]
+        return True
+
+    def page(self, status: Optional[Hashable] = None, after: int = 0, limit: int = 50, skip: int = 0) -> List[int]:
+        """Up to `limit` ids greater than `after`, ascending, leaving out the first `skip`"""
+        with self._lock:
+            if status is None:
+                start = bisect_right(self.all_ids, after) + skip
+                return self.all_ids[start:start + limit]
+
+            blocks, numbers = self.blocks[status], self.block_numbers[status]
+            first = after // self.BLOCK
+            ids: List[int] = []
+            for i in range(bisect_left(numbers, first), len(numbers)):
+                block = blocks[numbers[i]]
+                if numbers[i] == first:
+                    candidates = sorted(order_id for order_id in block if order_id > after)
+                elif skip >= len(block):
+                    skip -= len(block)
+                    continue
+                else:
+                    candidates = sorted(block)
+                if skip >= len(candidates):
+                    skip -= len(candidates)
+                    continue
+                ids.extend(candidates[skip:skip + limit - len(ids)])
+                skip = 0
+                if len(ids) >= limit:
+                    break
+            return ids
+
+    def counts(self) -> Dict[Hashable, int]:
+        with self._lock:
+            return dict(self.sizes)
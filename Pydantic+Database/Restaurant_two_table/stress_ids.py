@@ -0,0 +1,83 @@
+"""Concurrency stress test for id allocation and persistence.
+
+Fires parallel POST /menu and POST /orders requests from a thread pool and
+checks that every returned id is unique. It then restarts the app on the
+same database and checks that every record was reloaded and that new ids
+continue after the highest stored one.
+
+    python stress_ids.py --requests 2000 --workers 32
+    python stress_ids.py --url http://localhost:8000   # against a running server (no restart check)
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ORDER = {
+    "customer": {"name": "Alice Smith", "phone": "5551234567", "address": "123 Oak Street, Springfield"},
+    "items": [{"menu_item_id": 1, "menu_item_name": "Margherita Pizza", "quantity": 2, "unit_price": "15.99"}]
+}
+MENU_ITEM = {"id": 0, "name": "Margherita Pizza", "price": "15.99", "description": "Classic pizza"}
+
+
+def fire(client, requests: int, workers: int):
+    def post(i):
+        if i % 4 == 0:
+            return "menu", client.post("/menu", json=MENU_ITEM)
+        return "orders", client.post("/orders", json=ORDER)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(workers) as pool:
+        results = list(pool.map(post, range(requests)))
+    seconds = time.perf_counter() - start
+
+    ids = {"menu": [], "orders": []}
+    for kind, response in results:
+        assert response.status_code == 201, response.text
+        ids[kind].append(response.json()["id"])
+    for kind, allocated in ids.items():
+        duplicates = len(allocated) - len(set(allocated))
+        print(f"{kind:<7} {len(allocated):>7} created   duplicates {duplicates}")
+        assert duplicates == 0, f"duplicate {kind} ids"
+    print(f"{requests / seconds:,.0f} requests/s with {workers} workers")
+    return ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--url", help="base URL of a running server; default runs the app in-process")
+    args = parser.parse_args()
+
+    if args.url:
+        import httpx
+        with httpx.Client(base_url=args.url, timeout=30) as client:
+            fire(client, args.requests, args.workers)
+        return
+
+    os.environ["RESTAURANT_DB_PATH"] = os.path.join(tempfile.mkdtemp(), "stress.db")
+    from fastapi.testclient import TestClient
+    import main as app_module
+
+    with TestClient(app_module.app) as client:
+        # Orders reference menu item 1
+        client.post("/menu", json=MENU_ITEM)
+        ids = fire(client, args.requests, args.workers)
+        ids["menu"].append(1)
+
+    # Restart: clear memory and load everything back from SQLite
+    app_module.menu_catalog.reset({}, 1)
+    app_module.orders_db.clear()
+    app_module.status_index = app_module.OrderStatusIndex(app_module.ORDER_TRANSITIONS)
+    with TestClient(app_module.app) as client:
+        assert sorted(app_module.menu_catalog.current.items) == sorted(ids["menu"])
+        assert sorted(app_module.orders_db) == sorted(ids["orders"])
+        new_id = client.post("/orders", json=ORDER).json()["id"]
+        assert new_id == max(ids["orders"]) + 1, new_id
+    print(f"restart reloaded {len(ids['menu'])} menu items and {len(ids['orders'])} orders; next order id {new_id}")
+
+
+if __name__ == "__main__":
+    main()
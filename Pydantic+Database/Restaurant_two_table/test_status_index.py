@@ -0,0 +1,53 @@
+import random
+
+import pytest
+
+from status_index import InvalidTransition, OrderStatusIndex
+
+TRANSITIONS = {"pending": {"confirmed"}, "confirmed": {"ready"}, "ready": {"delivered"}, "delivered": set()}
+NEXT = {"pending": "confirmed", "confirmed": "ready", "ready": "delivered"}
+
+
+@pytest.fixture
+def small_blocks(monkeypatch):
+    # Tiny blocks so pages cross, skip and empty many of them
+    monkeypatch.setattr(OrderStatusIndex, "BLOCK", 8)
+
+
+def build(rng, orders):
+    index, statuses = OrderStatusIndex(TRANSITIONS), {}
+    for order_id in range(1, orders + 1):
+        index.add(order_id, "pending")
+        statuses[order_id] = "pending"
+    for _ in range(orders * 2):
+        order_id = rng.randint(1, orders)
+        current = statuses[order_id]
+        if current in NEXT:
+            index.transition(order_id, current, NEXT[current])
+            statuses[order_id] = NEXT[current]
+    return index, statuses
+
+
+def test_pages_match_a_scan(small_blocks):
+    rng = random.Random(5)
+    index, statuses = build(rng, 400)
+    for status in (None, "pending", "confirmed", "ready", "delivered"):
+        expected = sorted(i for i, s in statuses.items() if status is None or s == status)
+        for after in (0, 1, 7, 8, 9, 150, 400):
+            for skip in (0, 3, 8, 50, 1000):
+                page = index.page(status, after, 10, skip)
+                assert page == [i for i in expected if i > after][skip:skip + 10]
+    assert index.counts() == {s: sum(1 for v in statuses.values() if v == s) for s in TRANSITIONS}
+
+
+def test_transition_checks_the_current_status():
+    index = OrderStatusIndex(TRANSITIONS)
+    index.add(1, "pending")
+    with pytest.raises(InvalidTransition):
+        index.transition(1, "pending", "ready")
+    index.transition(1, "pending", "confirmed")
+    # A second request still believing the order is pending loses
+    with pytest.raises(InvalidTransition):
+        index.transition(1, "pending", "confirmed")
+    assert index.page("confirmed") == [1]
+    assert index.page("pending") == []
@@ -0,0 +1,174 @@
+import asyncio
+import itertools
+import json
+import os
+import sqlite3
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Dict, Optional
+
+import aiosqlite
+
+# Shared by Restaurant_single_table and Restaurant_two_table; each app puts
+# this folder on sys.path and keeps its database next to its own main.py
+# unless RESTAURANT_DB_PATH is set.
+
+SCHEMA = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "CREATE TABLE IF NOT EXISTS records ("
+    " tbl TEXT NOT NULL, id INTEGER NOT NULL, data TEXT NOT NULL,"
+    " PRIMARY KEY (tbl, id))",
+    "CREATE TABLE IF NOT EXISTS sequences (tbl TEXT PRIMARY KEY, last_id INTEGER NOT NULL)",
+    # Files written before `sequences` existed start from their highest record id
+    "INSERT OR IGNORE INTO sequences (tbl, last_id) SELECT tbl, max(id) FROM records GROUP BY tbl",
+)
+LOAD = "SELECT id, data FROM records WHERE tbl = ? ORDER BY id"
+LAST_ID = "SELECT last_id FROM sequences WHERE tbl = ?"
+PUT = "INSERT OR REPLACE INTO records (tbl, id, data) VALUES (?, ?, ?)"
+BUMP_SEQUENCE = (
+    "INSERT INTO sequences (tbl, last_id) VALUES (?, ?)"
+    " ON CONFLICT (tbl) DO UPDATE SET last_id = max(last_id, excluded.last_id)"
+)
+DELETE = "DELETE FROM records WHERE tbl = ? AND id = ?"
+
+
+def db_path(app_dir: str) -> str:
+    """RESTAURANT_DB_PATH, or restaurant.db in the app's own folder"""
+    return os.getenv("RESTAURANT_DB_PATH") or os.path.join(app_dir, "restaurant.db")
+
+
+class IdAllocator:
+    """Hands out increasing ids without a lock.
+
+    next() on an itertools.count is a single C call, so concurrent callers
+    (threadpool handlers or coroutines) can never receive the same id.
+    """
+
+    def __init__(self, start: int = 1):
+        self._counter = itertools.count(start)
+
+    def next(self) -> int:
+        return next(self._counter)
+
+    def restart_after(self, last_id: int) -> None:
+        """Continue after the highest id ever stored (Storage.last_id, at startup)"""
+        self._counter = itertools.count(last_id + 1)
+
+
+class Storage:
+    """Write-through persistence for the in-memory tables, for async handlers.
+
+    Each record is stored as a JSON document keyed by (table, id). Handlers
+    update memory and await the write before responding, so an acknowledged
+    change survives a restart; on startup every table is read back once.
+    The highest id ever written per table is kept in `sequences`, so ids of
+    deleted records are not handed out again after a restart.
+    aiosqlite runs the connection on its own thread, so writes never block
+    the event loop. The connection is shared, so every write runs as its own
+    transaction under a lock and a commit never picks up another request's
+    half-done statements.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.db: Optional[aiosqlite.Connection] = None
+        self._write_lock: Optional[asyncio.Lock] = None
+
+    async def open(self) -> None:
+        self.db = await aiosqlite.connect(self.path)
+        # Created here so it belongs to the loop that serves the app
+        self._write_lock = asyncio.Lock()
+        for statement in SCHEMA:
+            await self.db.execute(statement)
+        await self.db.commit()
+
+    async def close(self) -> None:
+        if self.db is not None:
+            await self.db.close()
+            self.db = None
+
+    async def load(self, table: str) -> Dict[int, Dict[str, Any]]:
+        async with self.db.execute(LOAD, (table,)) as cursor:
+            return {row[0]: json.loads(row[1]) async for row in cursor}
+
+    async def last_id(self, table: str) -> int:
+        """Highest id ever written to `table`, 0 when it was never written"""
+        async with self.db.execute(LAST_ID, (table,)) as cursor:
+            row = await cursor.fetchone()
+        return row[0] if row else 0
+
+    @asynccontextmanager
+    async def _transaction(self):
+        async with self._write_lock:
+            try:
+                yield self.db
+            except BaseException:
+                await self.db.rollback()
+                raise
+            await self.db.commit()
+
+    async def put(self, table: str, record_id: int, data: Dict[str, Any]) -> None:
+        # The record and the sequence high-water mark commit together
+        async with self._transaction() as db:
+            await db.execute(PUT, (table, record_id, json.dumps(data, default=str)))
+            await db.execute(BUMP_SEQUENCE, (table, record_id))
+
+    async def delete(self, table: str, record_id: int) -> None:
+        async with self._transaction() as db:
+            await db.execute(DELETE, (table, record_id))
+
+
+class SyncStorage:
+    """The same store for sync handlers, which FastAPI runs on its threadpool.
+
+    One sqlite3 connection is shared by the worker threads; a lock gives
+    each call, and each write transaction, the connection to itself.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def open(self) -> None:
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        with self._transaction() as db:
+            for statement in SCHEMA:
+                db.execute(statement)
+
+    def close(self) -> None:
+        with self._lock:
+            if self.db is not None:
+                self.db.close()
+                self.db = None
+
+    def load(self, table: str) -> Dict[int, Dict[str, Any]]:
+        with self._lock:
+            return {row[0]: json.loads(row[1]) for row in self.db.execute(LOAD, (table,))}
+
+    def last_id(self, table: str) -> int:
+        """Highest id ever written to `table`, 0 when it was never written"""
+        with self._lock:
+            row = self.db.execute(LAST_ID, (table,)).fetchone()
+        return row[0] if row else 0
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            try:
+                yield self.db
+            except BaseException:
+                self.db.rollback()
+                raise
+            self.db.commit()
+
+    def put(self, table: str, record_id: int, data: Dict[str, Any]) -> None:
+        # The record and the sequence high-water mark commit together
+        with self._transaction() as db:
+            db.execute(PUT, (table, record_id, json.dumps(data, default=str)))
+            db.execute(BUMP_SEQUENCE, (table, record_id))
+
+    def delete(self, table: str, record_id: int) -> None:
+        with self._transaction() as db:
+            db.execute(DELETE, (table, record_id))
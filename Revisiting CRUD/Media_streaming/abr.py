@@ -0,0 +1,187 @@
+"""Adaptive bitrate simulation for capacity planning.
+
+Simulates many concurrent streaming sessions on SmartTV, Laptop, Mobile and
+SmartSpeaker devices. Every session has its own bandwidth trace and buffer
+and picks a bitrate from its device's ladder for each segment. All sessions
+advance one segment per step with NumPy arrays, and no Python loop runs per
+session, so 100k sessions take seconds.
+
+    python abr.py --sessions 100000 --minutes 30
+"""
+import argparse
+import time
+
+import numpy as np
+
+from main import Laptop, Mobile, SmartSpeaker, SmartTV
+
+DEVICE_CLASSES = [SmartTV, Laptop, Mobile, SmartSpeaker]
+
+# Typical access bandwidth per device class: (median Mbps, log-normal spread)
+BANDWIDTH_PROFILES = {
+    "SmartTV": (35.0, 0.5),
+    "Laptop": (20.0, 0.6),
+    "Mobile": (8.0, 0.9),
+    "SmartSpeaker": (10.0, 0.6),
+}
+
+
+class SimulationConfig:
+    def __init__(self, sessions=100_000, minutes=30, segment_seconds=4.0, max_buffer=30.0,
+                 startup_buffer=4.0, safety=0.8, low_buffer=8.0, ewma=0.3, arrival_window=600.0,
+                 device_mix=(0.35, 0.25, 0.35, 0.05), seed=7):
+        self.sessions = sessions
+        self.minutes = minutes
+        self.segment_seconds = segment_seconds
+        self.max_buffer = max_buffer
+        self.startup_buffer = startup_buffer
+        self.safety = safety
+        self.low_buffer = low_buffer
+        self.ewma = ewma
+        self.arrival_window = arrival_window
+        self.device_mix = device_mix
+        self.seed = seed
+
+
+def ladder_matrix():
+    # Ladders of different lengths padded with +inf, which `ladder <= target` never counts
+    ladders = [np.asarray(device.bitrate_ladder, dtype=np.float64) for device in DEVICE_CLASSES]
+    width = max(len(ladder) for ladder in ladders)
+    matrix = np.full((len(ladders), width), np.inf)
+    for i, ladder in enumerate(ladders):
+        matrix[i, :len(ladder)] = ladder
+    return matrix, np.array([len(ladder) for ladder in ladders])
+
+
+def simulate(config=None):
+    config = config or SimulationConfig()
+    rng = np.random.default_rng(config.seed)
+    n = config.sessions
+    ladders, rungs = ladder_matrix()
+    seg = config.segment_seconds
+
+    # Session length: exponential around the configured mean, at least 2 segments.
+    # Sessions are sorted longest first, so the ones still playing at any step
+    # are a prefix and every per-step operation works on array views.
+    segments = np.sort(np.maximum(2, rng.exponential(config.minutes * 60 / seg, n).astype(np.int64)))[::-1].copy()
+    device = rng.choice(len(DEVICE_CLASSES), size=n, p=config.device_mix)
+    medians = np.array([BANDWIDTH_PROFILES[d.__name__][0] for d in DEVICE_CLASSES])[device]
+    spreads = np.array([BANDWIDTH_PROFILES[d.__name__][1] for d in DEVICE_CLASSES])[device]
+    device_ladders = ladders[device]
+    device_rungs = rungs[device] - 1
+
+    # Bandwidth follows an AR(1) process in log space around each session's median
+    log_median = np.log(medians) + rng.normal(0, spreads)
+    log_bw = log_median.copy()
+
+    clock = rng.uniform(0, config.arrival_window, n)
+    buffer = np.zeros(n)
+    estimate = np.exp(log_bw) * 0.5  # cautious first guess, in Mbps
+    started = np.zeros(n, dtype=bool)
+    startup_delay = np.zeros(n)
+    stall = np.zeros(n)
+    played = np.zeros(n)
+    bitrate_sum = np.zeros(n)
+    switches = np.zeros(n, dtype=np.int64)
+    previous_rung = np.full(n, -1)
+
+    # Egress time series: megabits delivered per 10 s bucket
+    bucket = 10.0
+    egress = np.zeros(int((config.arrival_window + segments[0] * seg) // bucket) + 1)
+
+    # Number of sessions still playing at each step
+    active_counts = np.searchsorted(-segments, -np.arange(segments[0]), side="left")
+    for step in range(int(segments[0])):
+        m = active_counts[step]
+        on = started[:m]
+        buf = buffer[:m]
+
+        # Rate choice: highest rung under safety x estimated throughput, lowest when the buffer is low
+        target = config.safety * estimate[:m]
+        rung = np.minimum((device_ladders[:m] <= target[:, None]).sum(axis=1) - 1, device_rungs[:m])
+        rung = np.maximum(rung, 0)
+        rung[on & (buf < config.low_buffer)] = 0
+        bitrate = device_ladders[np.arange(m), rung]
+
+        log_bw[:m] = 0.8 * log_bw[:m] + 0.2 * log_median[:m] + rng.normal(0, 0.25 * spreads[:m])
+        bandwidth = np.exp(log_bw[:m])
+        download = bitrate * seg / bandwidth
+
+        # Downloading drains the buffer once playback has started; running dry
+        # is a stall. Before startup the buffer only fills.
+        drained = np.where(on, buf - download, buf)
+        stall[:m] += np.where(on & (drained < 0), -drained, 0.0)
+        played[:m] += np.where(on, np.minimum(buf, download), 0.0)
+        startup_delay[:m] += np.where(on, 0.0, download)
+        buf[:] = np.maximum(drained, 0.0) + seg
+        clock[:m] += download
+        slots = (clock[:m] // bucket).astype(np.int64)
+        if slots.max() >= len(egress):
+            egress = np.pad(egress, (0, int(slots.max()) + 1 - len(egress)))
+        egress += np.bincount(slots, weights=bitrate * seg, minlength=len(egress))
+
+        # A full buffer waits for playback before the next request
+        wait = np.maximum(buf - config.max_buffer, 0.0)
+        buf -= wait
+        played[:m] += wait
+        clock[:m] += wait
+
+        on |= buf >= config.startup_buffer
+        estimate[:m] = (1 - config.ewma) * estimate[:m] + config.ewma * bandwidth
+        bitrate_sum[:m] += bitrate
+        switches[:m] += (previous_rung[:m] >= 0) & (previous_rung[:m] != rung)
+        previous_rung[:m] = rung
+
+    played += buffer  # what is left in the buffer plays out at the end
+    bits = bitrate_sum * seg  # megabits delivered per session
+    return _report(device, segments, startup_delay, stall, played, bits, bitrate_sum, switches, egress, bucket)
+
+
+def _report(device, segments, startup_delay, stall, played, bits, bitrate_sum, switches, egress, bucket):
+    report = {"devices": {}}
+    for d, device_class in enumerate(DEVICE_CLASSES):
+        mask = device == d
+        if not mask.any():
+            continue
+        watch = played[mask] + stall[mask]
+        report["devices"][device_class.__name__] = {
+            "sessions": int(mask.sum()),
+            "mean_bitrate_mbps": round(float(bitrate_sum[mask].sum() / segments[mask].sum()), 3),
+            "rebuffer_ratio": round(float(stall[mask].sum() / watch.sum()), 5),
+            "sessions_with_stall": round(float((stall[mask] > 0).mean()), 4),
+            "startup_delay_p50_s": round(float(np.percentile(startup_delay[mask], 50)), 3),
+            "startup_delay_p95_s": round(float(np.percentile(startup_delay[mask], 95)), 3),
+            "switches_per_session": round(float(switches[mask].mean()), 2),
+            "egress_tb": round(float(bits[mask].sum()) / 8 / 1e6, 4),
+        }
+    peak = egress.max() / bucket  # megabits per second
+    report["total_egress_tb"] = round(float(bits.sum()) / 8 / 1e6, 4)
+    report["peak_egress_gbps"] = round(float(peak) / 1000, 3)
+    report["rebuffer_ratio"] = round(float(stall.sum() / (played + stall).sum()), 5)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=100_000)
+    parser.add_argument("--minutes", type=float, default=30, help="mean session length")
+    parser.add_argument("--safety", type=float, default=0.8, help="fraction of estimated throughput to use")
+    parser.add_argument("--startup-buffer", type=float, default=4.0, help="seconds buffered before playback starts")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    report = simulate(SimulationConfig(sessions=args.sessions, minutes=args.minutes, safety=args.safety,
+                                       startup_buffer=args.startup_buffer, seed=args.seed))
+    seconds = time.perf_counter() - start
+    for name, stats in report["devices"].items():
+        print(name)
+        for key, value in stats.items():
+            print(f"  {key:<24}{value}")
+    print(f"total egress {report['total_egress_tb']} TB, peak {report['peak_egress_gbps']} Gbps, "
+          f"rebuffer ratio {report['rebuffer_ratio']}")
+    print(f"simulated {args.sessions:,} sessions in {seconds:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
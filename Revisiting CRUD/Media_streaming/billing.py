@@ -0,0 +1,121 @@
+import json
+import math
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from ndjson_io import file_partitions, read_records
+
+
+class PlayEvent:
+    # One play of one title on one device. Cost and bytes are fixed when the
+    # play happens, so later price or ladder changes do not rewrite old bills.
+
+    __slots__ = ("user", "title", "content_type", "device", "duration", "timestamp", "bytes", "cost")
+
+    def __init__(self, user, title, content_type, device, duration, timestamp, bytes, cost):
+        self.user = user
+        self.title = title
+        self.content_type = content_type
+        self.device = device
+        self.duration = duration  # seconds
+        self.timestamp = timestamp
+        self.bytes = bytes
+        self.cost = cost
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class PlayEventLog:
+    # Appends play events to an NDJSON file when `path` is set; only the most
+    # recent `keep` events stay in memory either way
+
+    def __init__(self, path=None, keep=1000):
+        self.path = path
+        self.recent = deque(maxlen=keep)
+        self.count = 0
+
+    def record(self, event: PlayEvent):
+        self.recent.append(event)
+        self.count += 1
+        if self.path is not None:
+            with open(self.path, "a") as f:
+                f.write(json.dumps(event.to_dict()) + "\n")
+
+    def __len__(self):
+        return self.count
+
+
+# --------------------- Billing ---------------------
+# Totals per (user, "YYYY-MM"): [plays, seconds, bytes, cost]
+
+def month_of(timestamp):
+    return time.strftime("%Y-%m", time.gmtime(timestamp))
+
+
+def bill_partition(path, start, end):
+    # Totals for one byte range. Memory grows with the number of users and
+    # months in the range, not with the number of events.
+    totals = {}
+    months = {}  # one gmtime call per hour seen, not per event
+    bad_lines = 0
+    for event, bad in read_records(path, start, end):
+        try:
+            user = event["user"]
+            fields = (event["timestamp"], event["duration"], event["bytes"], event["cost"])
+            if not isinstance(user, str) or any(isinstance(value, bool) for value in fields):
+                raise ValueError(event)
+            timestamp, duration, size, cost = (float(value) for value in fields)
+            if not all(math.isfinite(value) for value in (timestamp, duration, size, cost)):
+                raise ValueError(event)
+            size = int(size)
+            hour = int(timestamp // 3600)
+            month = months.get(hour)
+            if month is None:
+                month = months[hour] = month_of(hour * 3600)
+        except (TypeError, KeyError, ValueError, OverflowError, OSError):
+            # OverflowError/OSError: a timestamp gmtime cannot represent
+            bad_lines += 1
+            continue
+        row = totals.get((user, month))
+        if row is None:
+            row = totals[(user, month)] = [0, 0.0, 0, 0.0]
+        row[0] += 1
+        row[1] += duration
+        row[2] += size
+        row[3] += cost
+    return totals, bad_lines
+
+
+def bill_file(path, workers=1):
+    # Bill a whole NDJSON event file, in parallel over byte ranges when
+    # workers > 1; partial totals are added up per user and month
+    partitions = file_partitions(path, workers)
+    if workers > 1 and len(partitions) > 1:
+        with ProcessPoolExecutor(workers) as pool:
+            results = list(pool.map(bill_partition, *zip(*[(path, s, e) for s, e in partitions])))
+    else:
+        results = [bill_partition(path, s, e) for s, e in partitions]
+
+    merged = {}
+    bad_lines = 0
+    for totals, bad in results:
+        bad_lines += bad
+        for key, row in totals.items():
+            current = merged.get(key)
+            if current is None:
+                merged[key] = row
+            else:
+                for i, value in enumerate(row):
+                    current[i] += value
+    return merged, bad_lines
+
+
+def invoices(totals):
+    # [{"user", "month", "plays", "hours", "gigabytes", "cost"}] sorted by user and month
+    return [
+        {"user": user, "month": month, "plays": plays, "hours": round(seconds / 3600, 2),
+         "gigabytes": round(size / 1e9, 3), "cost": round(cost, 2)}
+        for (user, month), (plays, seconds, size, cost) in sorted(totals.items())
+    ]
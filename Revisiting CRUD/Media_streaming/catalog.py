@@ -0,0 +1,132 @@
+import heapq
+import itertools
+from collections import defaultdict
+
+
+class TopKIndex:
+    # Max-heap of (-average, upload order, rating version, content). A rating
+    # pushes a fresh entry instead of searching for the old one; entries whose
+    # version no longer matches the content, or whose upload order is not the
+    # one the catalog currently holds for it (removed, or removed and added
+    # again), are skipped when they surface.
+
+    def __init__(self, upload_order):
+        self.heap = []
+        self.live = 0
+        self.upload_order = upload_order
+
+    def push(self, content, order):
+        heapq.heappush(self.heap, (-content.get_average_rating(), order, content.rating_version, content))
+
+    def add(self, content, order):
+        self.live += 1
+        self.push(content, order)
+
+    def discard(self):
+        self.live -= 1
+
+    def is_current(self, entry):
+        _, order, version, content = entry
+        return version == content.rating_version and self.upload_order.get(id(content)) == order
+
+    def top(self, k):
+        found = []
+        while self.heap and len(found) < k:
+            entry = heapq.heappop(self.heap)
+            if self.is_current(entry):
+                found.append(entry)
+        # Valid entries go back; stale ones are gone for good
+        for entry in found:
+            heapq.heappush(self.heap, entry)
+        self.compact()
+        return [entry[3] for entry in found]
+
+    def compact(self):
+        if len(self.heap) > 2 * self.live + 64:
+            self.heap = [entry for entry in self.heap if self.is_current(entry)]
+            heapq.heapify(self.heap)
+
+
+class Catalog:
+    # Indexes the platform's content: titles in upload order, lookups by title
+    # and genre, and top-K heaps overall, per genre and per content type. Each
+    # content's average is a running sum, so a rating costs O(log n) per heap
+    # it belongs to and a top-k query O(k log n).
+
+    def __init__(self):
+        self.order = itertools.count()
+        self.upload_order = {}
+        self.titles = []
+        self.by_title = {}
+        self.by_genre = defaultdict(list)
+        self.overall = TopKIndex(self.upload_order)
+        self.genre_top = defaultdict(lambda: TopKIndex(self.upload_order))
+        self.type_top = defaultdict(lambda: TopKIndex(self.upload_order))
+
+    def indexes_for(self, content):
+        indexes = [self.overall, self.type_top[content_type(content)]]
+        genre = getattr(content, "genre", None)
+        if genre is not None:
+            indexes.append(self.genre_top[normalize(genre)])
+        return indexes
+
+    def add(self, content):
+        if id(content) in self.upload_order:
+            return False
+        order = next(self.order)
+        self.upload_order[id(content)] = order
+        self.titles.append(content.title)
+        self.by_title[normalize(content.title)] = content
+        genre = getattr(content, "genre", None)
+        if genre is not None:
+            self.by_genre[normalize(genre)].append(content)
+        for index in self.indexes_for(content):
+            index.add(content, order)
+        content.rating_listeners.append(self.on_rating)
+        return True
+
+    def remove(self, content):
+        # Removal state lives here, not on the content, so the same title can
+        # be added back (or sit in another platform's catalog) unaffected
+        if id(content) not in self.upload_order:
+            return False
+        del self.upload_order[id(content)]
+        self.titles.remove(content.title)
+        if self.by_title.get(normalize(content.title)) is content:
+            del self.by_title[normalize(content.title)]
+        genre = getattr(content, "genre", None)
+        if genre is not None:
+            self.by_genre[normalize(genre)].remove(content)
+        for index in self.indexes_for(content):
+            index.discard()
+        content.rating_listeners.remove(self.on_rating)
+        return True
+
+    def on_rating(self, content):
+        order = self.upload_order[id(content)]
+        for index in self.indexes_for(content):
+            index.push(content, order)
+            index.compact()
+
+    def find(self, title):
+        return self.by_title.get(normalize(title))
+
+    def in_genre(self, genre):
+        return list(self.by_genre.get(normalize(genre), ()))
+
+    def top(self, k, genre=None, content_type=None):
+        if genre is not None:
+            index = self.genre_top.get(normalize(genre))
+        elif content_type is not None:
+            index = self.type_top.get(content_type)
+        else:
+            index = self.overall
+        return index.top(k) if index else []
+
+
+def normalize(text):
+    return text.strip().casefold()
+
+
+def content_type(content):
+    return type(content).__name__
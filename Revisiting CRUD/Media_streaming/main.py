@@ -1,13 +1,21 @@
+import time
 from abc import ABC, abstractmethod
-from statistics import mean
+from billing import PlayEvent, PlayEventLog, bill_file, invoices
+from catalog import Catalog
+from ratings import RatingAggregator, aggregate_file
+from recommender import ItemItemRecommender
 
 
 class MediaContent(ABC):
 
     def __init__(self, title, premium=False):
         self.title = title
-        self.rating = []
+        # Constant-memory summary instead of a list of every rating
+        self.rating = RatingAggregator()
         self.premium = premium
+        # Tells indexes that a rating changed the average
+        self.rating_version = 0
+        self.rating_listeners = []
     
     @abstractmethod
     def play(self):
@@ -25,17 +33,32 @@ class MediaContent(ABC):
     def calculate_streaming_cost(self):
         pass
 
-    def add_rating(self, rating):
-        self.rating.append(rating)
+    def add_rating(self, rating, timestamp=None):
+        self.rating.add(rating, timestamp)
+        self.ratings_changed()
+
+    def merge_ratings(self, aggregator: RatingAggregator):
+        self.rating.merge(aggregator)
+        self.ratings_changed()
+
+    def ratings_changed(self):
+        self.rating_version += 1
+        for listener in self.rating_listeners:
+            listener(self)
 
     def get_average_rating(self):
-        return mean(self.rating) if self.rating else 0
+        return self.rating.mean()
+
+    def get_decayed_rating(self):
+        return self.rating.decayed_score()
 
     def is_premium_content(self):
         return self.premium
 
 
 class StreamingDevice(ABC):
+    # Bitrates in Mbps this device class can play, lowest first
+    bitrate_ladder = [0.5, 1.5, 3.0]
 
     def __init__(self, name):
         self.name = name
@@ -49,12 +72,18 @@ class StreamingDevice(ABC):
         pass
 
     @abstractmethod
-    def adjust_quality(self):
+    def adjust_quality(self, bandwidth_mbps=None):
         pass
 
     def get_device_info(self):
         return f"Device: {self.name}"
 
+    def select_bitrate(self, bandwidth_mbps, safety=0.8):
+        # Highest rung that fits in `safety` of the measured bandwidth
+        usable = bandwidth_mbps * safety
+        fitting = [rate for rate in self.bitrate_ladder if rate <= usable]
+        return fitting[-1] if fitting else self.bitrate_ladder[0]
+
     def check_compatibility(self, content: MediaContent):
         return True
 
@@ -143,45 +172,62 @@ class Music(MediaContent):
 
 
 class SmartTV(StreamingDevice):
+    bitrate_ladder = [1.5, 3.0, 6.0, 8.0, 16.0, 25.0]
+
     def connect(self):
         return f"{self.name} connected via HDMI"
 
     def stream_content(self, content: MediaContent):
         return f"{self.name} streaming in 4K: {content.play()}"
 
-    def adjust_quality(self):
+    def adjust_quality(self, bandwidth_mbps=None):
+        if bandwidth_mbps is not None:
+            return f"Adjusting to {self.select_bitrate(bandwidth_mbps)} Mbps"
         return "Auto-adjusting to 4K resolution"
 
 class Laptop(StreamingDevice):
+    bitrate_ladder = [0.8, 1.5, 3.0, 5.0, 8.0]
+
     def connect(self):
         return f"{self.name} connected to WiFi"
 
     def stream_content(self, content: MediaContent):
         return f"{self.name} streaming: {content.play()}"
 
-    def adjust_quality(self):
+    def adjust_quality(self, bandwidth_mbps=None):
+        if bandwidth_mbps is not None:
+            return f"Adjusting to {self.select_bitrate(bandwidth_mbps)} Mbps"
         return "Adjusting to HD resolution"
 
 
 class Mobile(StreamingDevice):
+    bitrate_ladder = [0.3, 0.7, 1.5, 3.0]
+
     def connect(self):
         return f"{self.name} connected via mobile data"
 
     def stream_content(self, content: MediaContent):
         return f"{self.name} streaming with battery saver: {content.play()}"
 
-    def adjust_quality(self):
+    def adjust_quality(self, bandwidth_mbps=None):
+        if bandwidth_mbps is not None:
+            return f"Adjusting to {self.select_bitrate(bandwidth_mbps)} Mbps"
         return "Lowering quality to save battery"
 
 
 class SmartSpeaker(StreamingDevice):
+    # Audio only
+    bitrate_ladder = [0.064, 0.128, 0.256, 0.32]
+
     def connect(self):
         return f"{self.name} connected via voice command"
 
     def stream_content(self, content: MediaContent):
         return f"{self.name} playing audio: {content.play()}"
 
-    def adjust_quality(self):
+    def adjust_quality(self, bandwidth_mbps=None):
+        if bandwidth_mbps is not None:
+            return f"Adjusting to {self.select_bitrate(bandwidth_mbps)} Mbps"
         return "Optimizing audio quality"
 
 
@@ -191,33 +237,133 @@ class User:
         self.is_premium = is_premium
         self.watch_history = []
         self.preferences  = []
+        # Set by StreamingPlatform.register_user
+        self.play_log = None
 
-    def play_content(self, content:MediaContent, device: StreamingDevice):
+    def play_content(self, content:MediaContent, device: StreamingDevice, minutes=None, bandwidth_mbps=None):
         if content.is_premium_content() and not self.is_premium:
             return f"Upgrade to premium to play {content.title}"
         self.watch_history.append(content.title)
+        if self.play_log is not None:
+            self.play_log.record(self.play_event(content, device, minutes, bandwidth_mbps))
         return device.stream_content(content)
 
-    def recommend(self, contents: list):
-        return sorted(contents, key=lambda c: c.get_average_rating(), reverse=True)
+    def play_event(self, content: MediaContent, device: StreamingDevice, minutes=None, bandwidth_mbps=None):
+        # Without a measured bandwidth the device is assumed to play its top rung
+        seconds = (content.get_duration() if minutes is None else minutes) * 60
+        bitrate = device.bitrate_ladder[-1] if bandwidth_mbps is None else device.select_bitrate(bandwidth_mbps)
+        return PlayEvent(self.name, content.title, type(content).__name__, type(device).__name__, seconds,
+                         time.time(), int(bitrate * 1e6 / 8 * seconds), content.calculate_streaming_cost())
+
+    def recommend(self, contents: list, recommender: ItemItemRecommender = None):
+        # With a recommender, titles similar to this user's watch history come
+        # first; average rating breaks ties and ranks everything else
+        if recommender is None:
+            return sorted(contents, key=lambda c: c.get_average_rating(), reverse=True)
+        personal = dict(recommender.recommend(self.watch_history, limit=None))
+        return sorted(contents, key=lambda c: (personal.get(c.title, 0), c.get_average_rating()), reverse=True)
 
 
 class StreamingPlatform:
-    def __init__(self, name):
+    def __init__(self, name, event_log_path=None):
         self.name = name
         self.users = []
         self.contents = []
+        self.catalog = Catalog()
+        self.recommender = ItemItemRecommender()
+        # How much of each user's watch history the recommender has seen
+        self.history_synced = {}
+        self.play_log = PlayEventLog(event_log_path)
 
     def register_user(self, user: User):
         self.users.append(user)
+        user.play_log = self.play_log
 
     def upload_content(self, content: MediaContent):
-        self.contents.append(content)
+        if self.catalog.add(content):
+            self.contents.append(content)
+            return True
+        return False
+
+    def remove_content(self, content: MediaContent):
+        if self.catalog.remove(content):
+            self.contents.remove(content)
+            return True
+        return False
 
     def get_top_content(self, limit=3):
-        return sorted(self.contents, key=lambda c: c.get_average_rating(), reverse=True)[:limit]
+        return self.catalog.top(limit)
 
-    def show_catalog(self):
-        return [content.title for content in self.contents]
+    def get_top_by_genre(self, genre, limit=3):
+        return self.catalog.top(limit, genre=genre)
 
-    
\ No newline at end of file
+    def get_top_by_type(self, content_type, limit=3):
+        # content_type is the class name, e.g. "Movie" or "Podcast"
+        return self.catalog.top(limit, content_type=content_type)
+
+    def find_content(self, title):
+        return self.catalog.find(title)
+
+    def get_genre(self, genre):
+        return self.catalog.in_genre(genre)
+
+    def show_catalog(self):
+        return list(self.catalog.titles)
+
+    def rebuild_recommendations(self):
+        # Full rebuild from every watch history (the nightly job)
+        self.recommender.fit({user.name: user.watch_history for user in self.users})
+        self.history_synced = {user.name: len(user.watch_history) for user in self.users}
+
+    def update_recommendations(self):
+        # Fold in what users watched since the last rebuild or update
+        new_watches = {}
+        for user in self.users:
+            seen = self.history_synced.get(user.name, 0)
+            if len(user.watch_history) > seen:
+                new_watches[user.name] = user.watch_history[seen:]
+                self.history_synced[user.name] = len(user.watch_history)
+        return self.recommender.update(new_watches)
+
+    def recommend_for(self, user: User, limit=5):
+        # Personalised picks, topped up with the best rated titles the user has not watched
+        picks = []
+        for title, _ in self.recommender.recommend(user.watch_history, limit * 2):
+            content = self.find_content(title)
+            if content is not None and not (content.is_premium_content() and not user.is_premium):
+                picks.append(content)
+        watched = set(user.watch_history)
+        for content in self.get_top_content(limit + len(watched)):
+            if content not in picks and content.title not in watched:
+                picks.append(content)
+        return picks[:limit]
+
+    def rating_prior(self):
+        # Mean of every rating on the platform, the prior for Bayesian averages
+        count = sum(c.rating.count for c in self.contents)
+        return sum(c.rating.total for c in self.contents) / count if count else 0
+
+    def get_bayesian_rating(self, content: MediaContent, prior_weight=10):
+        return content.rating.bayesian_average(self.rating_prior(), prior_weight)
+
+    def ingest_ratings(self, path, workers=1):
+        # Bulk-load rating events from an NDJSON file; each title's partial
+        # aggregate is merged once, so indexes update once per title
+        aggregates, bad_lines = aggregate_file(path, workers)
+        applied, unknown = 0, 0
+        for title, aggregator in aggregates.items():
+            content = self.find_content(title)
+            if content is None:
+                unknown += aggregator.count
+                continue
+            content.merge_ratings(aggregator)
+            applied += aggregator.count
+        return {"ratings": applied, "unknown_title": unknown, "bad_lines": bad_lines}
+
+    def bill_events(self, path=None, workers=1):
+        # Monthly invoices per user from an NDJSON play-event file, by default this platform's log
+        path = path or self.play_log.path
+        if path is None:
+            raise ValueError("No play-event file to bill")
+        totals, bad_lines = bill_file(path, workers)
+        return {"invoices": invoices(totals), "bad_lines": bad_lines}
@@ -0,0 +1,39 @@
+import json
+import os
+
+
+def file_partitions(path, parts):
+    # Split a file into about `parts` byte ranges that start and end on line
+    # boundaries, so each range can be read by a different process.
+    size = os.path.getsize(path)
+    parts = max(1, min(parts, size or 1))
+    bounds = [0]
+    with open(path, "rb") as f:
+        for i in range(1, parts):
+            f.seek(max(size * i // parts, bounds[-1]))
+            f.readline()
+            position = min(f.tell(), size)
+            if position > bounds[-1]:
+                bounds.append(position)
+    if bounds[-1] != size:
+        bounds.append(size)
+    return list(zip(bounds, bounds[1:]))
+
+
+def read_records(path, start=0, end=None):
+    # Yield (record, None) for each JSON line in [start, end), or (None, line)
+    # for lines that do not parse. Reads line by line; memory stays flat.
+    with open(path, "rb") as f:
+        f.seek(start)
+        position = start
+        for line in f:
+            if end is not None and position >= end:
+                break
+            position += len(line)
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line), None
+            except ValueError:
+                yield None, line
@@ -0,0 +1,146 @@
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from ndjson_io import file_partitions, read_records
+
+# Weight of a rating halves every 30 days in the decayed score
+DEFAULT_HALF_LIFE = 30 * 24 * 3600
+
+
+class RatingAggregator:
+    # Constant-memory summary of a stream of ratings: count, sum and sum of
+    # squares for mean and variance, plus exponentially time-decayed sums for a
+    # recency-weighted score. Decayed sums are stored relative to `reference`,
+    # the newest timestamp seen, so adding or merging never loses precision on
+    # old data. Aggregators over disjoint ratings merge exactly.
+
+    __slots__ = ("count", "total", "total_sq", "decayed_total", "decayed_weight", "reference", "half_life")
+
+    def __init__(self, half_life=DEFAULT_HALF_LIFE):
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.decayed_total = 0.0
+        self.decayed_weight = 0.0
+        self.reference = None
+        self.half_life = half_life
+
+    def __len__(self):
+        return self.count
+
+    def decay(self, seconds):
+        return 0.5 ** (seconds / self.half_life)
+
+    def rebase(self, timestamp):
+        # Move the reference forward to `timestamp`, decaying what is stored
+        if self.reference is None:
+            self.reference = timestamp
+        elif timestamp > self.reference:
+            factor = self.decay(timestamp - self.reference)
+            self.decayed_total *= factor
+            self.decayed_weight *= factor
+            self.reference = timestamp
+
+    def add(self, rating, timestamp=None):
+        timestamp = time.time() if timestamp is None else timestamp
+        self.count += 1
+        self.total += rating
+        self.total_sq += rating * rating
+        self.rebase(timestamp)
+        weight = self.decay(self.reference - timestamp)
+        self.decayed_total += weight * rating
+        self.decayed_weight += weight
+
+    def merge(self, other):
+        if not other.count:
+            return self
+        self.count += other.count
+        self.total += other.total
+        self.total_sq += other.total_sq
+        self.rebase(other.reference)
+        factor = self.decay(self.reference - other.reference)
+        self.decayed_total += other.decayed_total * factor
+        self.decayed_weight += other.decayed_weight * factor
+        return self
+
+    def mean(self):
+        return self.total / self.count if self.count else 0
+
+    def variance(self):
+        if self.count < 2:
+            return 0.0
+        return max(0.0, (self.total_sq - self.total * self.total / self.count) / (self.count - 1))
+
+    def stddev(self):
+        return math.sqrt(self.variance())
+
+    def decayed_score(self):
+        # Recency-weighted mean: a rating from one half-life ago counts half
+        return self.decayed_total / self.decayed_weight if self.decayed_weight else 0
+
+    def bayesian_average(self, prior_mean, prior_weight=10):
+        # Shrinks titles with few ratings towards prior_mean, as if they had
+        # prior_weight extra ratings of that value
+        return (prior_mean * prior_weight + self.total) / (prior_weight + self.count)
+
+    def to_tuple(self):
+        return (self.count, self.total, self.total_sq, self.decayed_total, self.decayed_weight,
+                self.reference, self.half_life)
+
+    @classmethod
+    def from_tuple(cls, values):
+        aggregator = cls(values[6])
+        (aggregator.count, aggregator.total, aggregator.total_sq, aggregator.decayed_total,
+         aggregator.decayed_weight, aggregator.reference) = values[:6]
+        return aggregator
+
+
+# --------------------- NDJSON ingestion ---------------------
+# One event per line: {"title": "...", "rating": 4, "timestamp": 1700000000}
+
+def aggregate_partition(path, start, end, half_life=DEFAULT_HALF_LIFE):
+    # Partial aggregates for one byte range, keyed by title; returned as
+    # tuples so they pickle cheaply back to the parent process
+    partials = {}
+    bad_lines = 0
+    for event, bad in read_records(path, start, end):
+        try:
+            title, rating, timestamp = event["title"], event["rating"], event.get("timestamp")
+            if not isinstance(title, str) or isinstance(rating, bool) or isinstance(timestamp, bool):
+                raise ValueError(event)
+            rating = float(rating)
+            timestamp = None if timestamp is None else float(timestamp)
+            if not math.isfinite(rating) or not (timestamp is None or math.isfinite(timestamp)):
+                raise ValueError(event)
+        except (TypeError, KeyError, ValueError):
+            bad_lines += 1
+            continue
+        aggregator = partials.get(title)
+        if aggregator is None:
+            aggregator = partials[title] = RatingAggregator(half_life)
+        aggregator.add(rating, timestamp)
+    return {title: a.to_tuple() for title, a in partials.items()}, bad_lines
+
+
+def aggregate_file(path, workers=1, half_life=DEFAULT_HALF_LIFE):
+    # Aggregate a whole NDJSON file, in parallel over byte ranges when
+    # workers > 1; partial results are merged per title
+    partitions = file_partitions(path, workers)
+    if workers > 1 and len(partitions) > 1:
+        with ProcessPoolExecutor(workers) as pool:
+            results = list(pool.map(aggregate_partition, *zip(*[(path, s, e, half_life) for s, e in partitions])))
+    else:
+        results = [aggregate_partition(path, s, e, half_life) for s, e in partitions]
+
+    merged = {}
+    bad_lines = 0
+    for partials, bad in results:
+        bad_lines += bad
+        for title, values in partials.items():
+            partial = RatingAggregator.from_tuple(values)
+            if title in merged:
+                merged[title].merge(partial)
+            else:
+                merged[title] = partial
+    return merged, bad_lines
@@ -0,0 +1,274 @@
+import numpy as np
+from scipy import sparse
+
+
+class ItemItemRecommender:
+    # Item-based collaborative filtering over watch histories.
+    #
+    # Histories form a binary user x title matrix. Two titles are similar when
+    # the same users watched both (cosine similarity of their columns), and
+    # each title keeps only its `neighbors` most similar titles. A user's
+    # recommendations are the titles that score highest when the neighbour
+    # lists of everything they watched are added up.
+    #
+    # fit() rebuilds everything (the nightly job); fit_matrix() does the same
+    # from an already interned user x title matrix. update() folds in new
+    # watches using only the affected users' rows: the co-occurrence change
+    # is after^T after - before^T before over those users, and the watch
+    # counts give the new norms. Counts for pairs already in a neighbour list
+    # are recovered exactly from the stored similarity, and a pair missing
+    # from a list that had room had no co-occurrence. A list that needs the
+    # old count of a pair missing from two full lists, or whose weakest entry
+    # falls below where it stood (so a title it never held may now beat it),
+    # is recomputed from the matrix columns. The result matches fit() on the
+    # same histories, up to the order of tied titles.
+
+    def __init__(self, neighbors=50, block_size=256):
+        self.neighbors = neighbors
+        self.block_size = block_size
+        self.titles = []
+        self.title_index = {}
+        self.user_index = {}
+        self.matrix = sparse.csr_matrix((0, 0), dtype=np.float32)
+        self.counts = np.zeros(0, dtype=np.int64)  # watchers per title
+        self.neighbor_ids = np.full((0, neighbors), -1, dtype=np.int32)
+        self.neighbor_sims = np.full((0, neighbors), -1.0, dtype=np.float32)
+
+    # --------------------- Building ---------------------
+
+    def _intern(self, histories):
+        rows, cols = [], []
+        for user, titles in histories.items():
+            row = self.user_index.setdefault(user, len(self.user_index))
+            for title in titles:
+                col = self.title_index.get(title)
+                if col is None:
+                    col = self.title_index[title] = len(self.titles)
+                    self.titles.append(title)
+                rows.append(row)
+                cols.append(col)
+        return np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64)
+
+    def _grow(self):
+        shape = (len(self.user_index), len(self.titles))
+        if self.matrix.shape != shape:
+            self.matrix.resize(shape)
+        missing = len(self.titles) - len(self.neighbor_ids)
+        if missing > 0:
+            self.counts = np.concatenate([self.counts, np.zeros(missing, np.int64)])
+            self.neighbor_ids = np.vstack([self.neighbor_ids, np.full((missing, self.neighbors), -1, np.int32)])
+            self.neighbor_sims = np.vstack([self.neighbor_sims, np.full((missing, self.neighbors), -1.0, np.float32)])
+
+    def fit(self, histories):
+        # histories: {user: iterable of titles}
+        self.titles, self.title_index, self.user_index = [], {}, {}
+        rows, cols = self._intern(histories)
+        shape = (len(self.user_index), len(self.titles))
+        matrix = sparse.csr_matrix((np.ones(len(rows), np.float32), (rows, cols)), shape=shape)
+        return self._fit(matrix)
+
+    def fit_matrix(self, matrix, titles, users=None):
+        # matrix: users x titles, nonzero where watched; titles names the
+        # columns and users the rows (row numbers when omitted)
+        self.titles = list(titles)
+        self.title_index = {title: i for i, title in enumerate(self.titles)}
+        users = range(matrix.shape[0]) if users is None else users
+        self.user_index = {user: i for i, user in enumerate(users)}
+        # A copy: update() edits the matrix in place
+        return self._fit(sparse.csr_matrix(matrix, dtype=np.float32, copy=True))
+
+    def _fit(self, matrix):
+        matrix.sum_duplicates()
+        matrix.data[:] = 1.0  # watching twice counts once
+        self.matrix = matrix
+        self.counts = np.bincount(matrix.indices, minlength=len(self.titles)).astype(np.int64)
+        self.neighbor_ids = np.full((len(self.titles), self.neighbors), -1, dtype=np.int32)
+        self.neighbor_sims = np.full((len(self.titles), self.neighbors), -1.0, dtype=np.float32)
+        self._refresh(np.arange(len(self.titles)))
+        return self
+
+    def _refresh(self, items):
+        # Recompute the neighbour lists of `items` from co-occurrence counts,
+        # a block of columns at a time so memory stays bounded
+        columns = self.matrix.tocsc()
+        by_title = columns.T.tocsr()
+        norms = np.sqrt(self.counts).astype(np.float32)
+        k = self.neighbors
+        for start in range(0, len(items), self.block_size):
+            block = items[start:start + self.block_size]
+            co = (by_title @ columns[:, block]).tocsc()
+            for j, item in enumerate(block):
+                ids = co.indices[co.indptr[j]:co.indptr[j + 1]]
+                counts = co.data[co.indptr[j]:co.indptr[j + 1]]
+                keep = ids != item
+                ids, sims = ids[keep], counts[keep] / (norms[ids[keep]] * norms[item])
+                if len(ids) > k:
+                    top = np.argpartition(-sims, k - 1)[:k]
+                    ids, sims = ids[top], sims[top]
+                order = np.argsort(-sims, kind="stable")
+                self.neighbor_ids[item] = -1
+                self.neighbor_sims[item] = -1.0
+                self.neighbor_ids[item, :len(order)] = ids[order]
+                self.neighbor_sims[item, :len(order)] = sims[order]
+
+    # --------------------- Incremental updates ---------------------
+
+    def update(self, new_watches):
+        # new_watches: {user: titles watched since the last fit/update}
+        rows, cols = self._intern(new_watches)
+        if not len(rows):
+            return 0
+        self._grow()
+        pairs = np.unique(rows * len(self.titles) + cols)
+        rows, cols = pairs // len(self.titles), pairs % len(self.titles)
+        fresh = self.matrix[rows, cols].A1 == 0 if self.matrix.nnz else np.ones(len(rows), bool)
+        rows, cols = rows[fresh], cols[fresh]
+        if not len(rows):
+            return 0
+
+        # The weakest similarity in a full list bounds every title left out of
+        # it (titles left out of a list with room never co-occurred); counts
+        # only grow, so titles left out can only lose ground
+        floor = np.where(self.neighbor_ids[:, -1] >= 0, self.neighbor_sims[:, -1], 0.0)
+
+        users = np.unique(rows)
+        before = self.matrix[users]
+        self._insert(rows, cols)
+        after = self.matrix[users]
+        old_counts = self.counts.copy()
+        self.counts += np.bincount(cols, minlength=len(self.counts))
+
+        # Co-occurrence change, from the affected users alone
+        delta = (after.T @ after - before.T @ before).tocoo()
+        off_diagonal = (delta.row != delta.col) & (delta.data != 0)
+        delta_rows = delta.row[off_diagonal].astype(np.int64)
+        delta_cols = delta.col[off_diagonal].astype(np.int64)
+        delta_counts = delta.data[off_diagonal].astype(np.float64)
+        touched = np.unique(cols)
+
+        # Lists with a co-occurrence change are recomputed; lists that only
+        # mention a title whose count grew are rescaled
+        changed = np.unique(delta_rows)
+        unknown = self._rebuild_rows(changed, delta_rows, delta_cols, delta_counts, old_counts, floor)
+        rescaled = self._rescale(touched, changed, old_counts)
+
+        # Lists with an unknown count, and full lists that dropped below their
+        # old floor, are recomputed exactly
+        lists = np.union1d(changed, rescaled).astype(np.int64)
+        weakest = np.where(self.neighbor_ids[lists, -1] >= 0, self.neighbor_sims[lists, -1], 0.0)
+        stale = np.union1d(unknown, lists[(floor[lists] > 0) & (weakest < floor[lists] * (1 - 1e-6))])
+        if len(stale):
+            self._refresh(stale)
+        return len(touched)
+
+    def _insert(self, rows, cols):
+        # Add (row, col) entries to the CSR matrix without rebuilding it;
+        # each new entry goes at the end of its row
+        m = self.matrix
+        positions = m.indptr[rows + 1]
+        m.indices = np.insert(m.indices, positions, cols.astype(m.indices.dtype))
+        m.data = np.insert(m.data, positions, np.float32(1.0))
+        m.indptr[1:] += np.cumsum(np.bincount(rows, minlength=m.shape[0]))
+        m.has_sorted_indices = False
+
+    def _rebuild_rows(self, changed, delta_rows, delta_cols, delta_counts, old_counts, floor):
+        # Returns the rows left for _refresh because a pair's old count is unknown
+        if not len(changed):
+            return changed
+        width = len(self.titles)
+        # Old co-occurrence counts of every pair in the changed lists, exact
+        # because sim * sqrt(n_i * n_j) is an integer count
+        ids = self.neighbor_ids[changed]
+        valid = ids >= 0
+        list_rows = np.repeat(changed, self.neighbors)[valid.ravel()]
+        list_cols = ids[valid].astype(np.int64)
+        list_counts = np.rint(self.neighbor_sims[changed][valid] * np.sqrt(old_counts[list_rows] * old_counts[list_cols]))
+        keys = list_rows * width + list_cols
+        order = np.argsort(keys)
+        keys, list_rows, list_cols, list_counts = keys[order], list_rows[order], list_cols[order], list_counts[order]
+        # A sentinel past every real key keeps lookups in range
+        padded = np.append(keys, np.iinfo(np.int64).max)
+        old = np.append(list_counts, 0.0)
+
+        def lookup(probe):
+            at = np.searchsorted(padded, probe)
+            return at, padded[at] == probe
+
+        # Pairs already in the row's list just add their change
+        at, in_list = lookup(delta_rows * width + delta_cols)
+        list_counts[at[in_list]] += delta_counts[in_list]
+        # Other pairs take the old count from the other title's list (delta
+        # is symmetric, so that title is also being rebuilt). A pair in neither
+        # list had none if either list had room; otherwise its count is unknown
+        new_rows, new_cols, new_counts = delta_rows[~in_list], delta_cols[~in_list], delta_counts[~in_list]
+        at, found = lookup(new_cols * width + new_rows)
+        new_counts = new_counts + np.where(found, old[at], 0.0)
+        unknown = ~found & (floor[new_rows] > 0) & (floor[new_cols] > 0)
+        new_rows, new_cols, new_counts = new_rows[~unknown], new_cols[~unknown], new_counts[~unknown]
+
+        rows = np.concatenate([list_rows, new_rows])
+        cols = np.concatenate([list_cols, new_cols])
+        counts = np.concatenate([list_counts, new_counts])
+        keep = counts > 0
+        rows, cols = rows[keep], cols[keep]
+        sims = counts[keep] / np.sqrt(self.counts[rows] * self.counts[cols])
+
+        # Top k per row: order by row, then by similarity (cosine is at most 1)
+        order = np.argsort(rows - 0.5 * sims)
+        rows, cols, sims = rows[order], cols[order], sims[order]
+        rank = np.arange(len(rows)) - np.searchsorted(rows, rows)
+        top = rank < self.neighbors
+        self.neighbor_ids[changed] = -1
+        self.neighbor_sims[changed] = -1.0
+        self.neighbor_ids[rows[top], rank[top]] = cols[top]
+        self.neighbor_sims[rows[top], rank[top]] = sims[top]
+        return np.unique(delta_rows[~in_list][unknown])
+
+    def _rescale(self, touched, skip, old_counts):
+        # sim(i, j) scales by sqrt(old n / new n) for each side whose count
+        # grew; returns the rescaled rows
+        grown = np.zeros(len(self.titles) + 1, dtype=bool)  # index -1 (empty slot) stays False
+        grown[touched] = True
+        rows = np.union1d(np.flatnonzero(grown[self.neighbor_ids].any(axis=1)), touched)
+        rows = np.setdiff1d(rows, skip)
+        if not len(rows):
+            return rows
+        scale = np.sqrt(old_counts / np.maximum(self.counts, 1))
+        ids = self.neighbor_ids[rows]
+        valid = ids >= 0
+        sims = np.where(valid, self.neighbor_sims[rows] * scale[rows, None] * scale[ids], -1.0)
+        order = np.argsort(-sims, axis=1, kind="stable")
+        self.neighbor_ids[rows] = np.take_along_axis(ids, order, axis=1)
+        self.neighbor_sims[rows] = np.take_along_axis(sims, order, axis=1)
+        return rows
+
+    # --------------------- Serving ---------------------
+
+    def scores(self, history):
+        # Score every title for someone who watched `history`; watched titles score 0
+        watched = np.fromiter({self.title_index[t] for t in history if t in self.title_index}, dtype=np.int64)
+        if not len(watched):
+            return None, watched
+        ids = self.neighbor_ids[watched].ravel()
+        sims = self.neighbor_sims[watched].ravel()
+        valid = ids >= 0
+        totals = np.bincount(ids[valid], weights=sims[valid], minlength=len(self.titles))
+        totals[watched] = 0
+        return totals, watched
+
+    def recommend(self, history, limit=10):
+        # [(title, score)], best first; empty when nothing in `history` is known
+        totals, _ = self.scores(history)
+        if totals is None:
+            return []
+        candidates = np.flatnonzero(totals > 0)
+        if limit is not None and len(candidates) > limit:
+            candidates = candidates[np.argpartition(-totals[candidates], limit - 1)[:limit]]
+        candidates = candidates[np.argsort(-totals[candidates], kind="stable")]
+        return [(self.titles[i], float(totals[i])) for i in candidates]
+
+    def similar_titles(self, title, limit=10):
+        item = self.title_index.get(title)
+        if item is None:
+            return []
+        return [(self.titles[i], float(s)) for i, s in zip(self.neighbor_ids[item][:limit], self.neighbor_sims[item][:limit]) if i >= 0]
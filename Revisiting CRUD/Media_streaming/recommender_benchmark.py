@@ -0,0 +1,82 @@
+"""Build and serving time of the item-item recommender on synthetic histories.
+
+Users watch `--watches` titles on average. Title popularity is Zipf-like,
+and each user leans towards one of `--tastes` taste clusters, so the data
+has structure for the neighbour lists to find.
+
+    python recommender_benchmark.py --users 1000000 --titles 100000
+"""
+import argparse
+import time
+
+import numpy as np
+from scipy import sparse
+
+from recommender import ItemItemRecommender
+
+
+def synthetic_watches(users, titles, watches, tastes, seed):
+    # Int-coded users x titles CSR matrix; row u holds user u's watches
+    rng = np.random.default_rng(seed)
+    counts = rng.poisson(watches, size=users).clip(1)
+    total = int(counts.sum())
+    taste = np.repeat(rng.integers(0, tastes, size=users), counts)
+    popularity = rng.zipf(1.3, size=total) % (titles // tastes)
+    # Mostly titles from the user's cluster, sometimes anything popular
+    in_cluster = rng.random(total) < 0.8
+    picks = np.where(in_cluster, popularity * tastes + taste, rng.zipf(1.3, size=total) % titles)
+    indptr = np.concatenate([[0], np.cumsum(counts)])
+    return sparse.csr_matrix((np.ones(total, np.float32), picks.astype(np.int32), indptr), shape=(users, titles))
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"{label:<40}{time.perf_counter() - start:>10.2f} s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--titles", type=int, default=100_000)
+    parser.add_argument("--watches", type=int, default=20)
+    parser.add_argument("--tastes", type=int, default=20)
+    parser.add_argument("--neighbors", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    watches = timed("generate watches", lambda: synthetic_watches(
+        args.users, args.titles, args.watches, args.tastes, args.seed))
+    print(f"{watches.nnz:,} watches by {args.users:,} users")
+    names = [f"title-{i}" for i in range(args.titles)]
+
+    def history(user):
+        return [names[t] for t in watches.indices[watches.indptr[user]:watches.indptr[user + 1]]]
+
+    recommender = ItemItemRecommender(neighbors=args.neighbors)
+    timed("full rebuild (fit_matrix)", lambda: recommender.fit_matrix(watches, names))
+    print(f"{len(recommender.titles):,} titles, {recommender.matrix.nnz:,} distinct watches")
+
+    rng = np.random.default_rng(args.seed + 1)
+    sample = rng.integers(0, args.users, size=args.queries)
+    start = time.perf_counter()
+    latencies = []
+    for u in sample:
+        h = history(u)
+        t = time.perf_counter()
+        recommender.recommend(h, 10)
+        latencies.append(time.perf_counter() - t)
+    latencies = np.array(latencies) * 1000
+    print(f"recommend(10) x{args.queries}: p50 {np.percentile(latencies, 50):.2f} ms, "
+          f"p99 {np.percentile(latencies, 99):.2f} ms, total {time.perf_counter() - start:.2f} s")
+
+    # 1000 existing users each watch 5 titles from another user's history
+    new_watches = {int(u): history(int(rng.integers(0, args.users)))[:5] for u in rng.integers(0, args.users, 1000)}
+    touched = timed("incremental update (1000 users x 5)", lambda: recommender.update(new_watches))
+    print(f"{touched:,} titles gained watchers")
+
+
+if __name__ == "__main__":
+    main()
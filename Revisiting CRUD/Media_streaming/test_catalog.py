@@ -0,0 +1,45 @@
+from main import Movie, StreamingPlatform
+
+
+def _movie(title, rating, genre="Drama"):
+    movie = Movie(title, 120, "4K", genre, "Someone")
+    movie.add_rating(rating)
+    return movie
+
+
+def test_reuploaded_title_returns_to_top_k():
+    platform = StreamingPlatform("one")
+    best, other = _movie("Best", 5), _movie("Other", 3)
+    platform.upload_content(best)
+    platform.upload_content(other)
+
+    assert platform.remove_content(best)
+    assert platform.get_top_content(2) == [other]
+    assert platform.upload_content(best)
+    assert platform.get_top_content(2) == [best, other]
+    assert platform.get_top_by_genre("drama", 1) == [best]
+    assert platform.get_top_by_type("Movie", 1) == [best]
+
+
+def test_removal_is_per_platform():
+    first, second = StreamingPlatform("first"), StreamingPlatform("second")
+    movie = _movie("Shared", 4)
+    first.upload_content(movie)
+    second.upload_content(movie)
+
+    first.remove_content(movie)
+    assert first.get_top_content(1) == []
+    assert second.get_top_content(1) == [movie]
+    movie.add_rating(2)
+    assert second.get_top_content(1) == [movie]
+
+
+def test_duplicate_upload_and_removal_are_ignored():
+    platform = StreamingPlatform("one")
+    movie = _movie("Once", 4)
+    assert platform.upload_content(movie)
+    assert not platform.upload_content(movie)
+    assert platform.contents == [movie]
+    assert platform.remove_content(movie)
+    assert not platform.remove_content(movie)
+    assert platform.get_top_content(3) == []
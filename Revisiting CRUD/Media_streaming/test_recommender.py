@@ -0,0 +1,93 @@
+import random
+
+import numpy as np
+from scipy import sparse
+
+from recommender import ItemItemRecommender
+
+
+def _histories(users, titles, seed):
+    # Users lean towards one of a few taste clusters, so lists fill up and
+    # compete for their last places
+    rng = random.Random(seed)
+    names = [f"title-{i}" for i in range(titles)]
+    histories = {}
+    for user in range(users):
+        taste = user % 10
+        cluster = names[taste::10]
+        histories[f"user-{user}"] = rng.sample(cluster, rng.randint(1, min(6, len(cluster)))) + rng.sample(names, rng.randint(0, 2))
+    return histories, names
+
+
+def _new_watches(histories, names, rng, users):
+    new = {}
+    for user in rng.sample(range(users + 50), 60):
+        titles = rng.sample(names, rng.randint(1, 4))
+        new[f"user-{user}"] = titles
+        histories.setdefault(f"user-{user}", []).extend(titles)
+    return new
+
+
+def _exact_similarity(model, a, b):
+    columns = model.matrix.tocsc()
+    count = columns[:, a].multiply(columns[:, b]).sum()
+    return count / np.sqrt(model.counts[a] * model.counts[b])
+
+
+def _assert_same_lists(incremental, full):
+    for title in full.titles:
+        mine = incremental.neighbor_sims[incremental.title_index[title]]
+        theirs = full.neighbor_sims[full.title_index[title]]
+        np.testing.assert_allclose(mine, theirs, atol=1e-5, err_msg=title)
+        # Titles strictly above the last place are the same; ties for the last
+        # place may be broken either way
+        last = theirs[-1]
+        above = lambda model, sims: {
+            model.titles[i] for i, s in zip(model.neighbor_ids[model.title_index[title]], sims)
+            if i >= 0 and s > last + 1e-5
+        }
+        assert above(incremental, mine) == above(full, theirs), title
+
+
+def test_update_matches_fit():
+    histories, names = _histories(users=600, titles=200, seed=3)
+    incremental = ItemItemRecommender(neighbors=20).fit(histories)
+    rng = random.Random(7)
+    for _ in range(5):
+        incremental.update(_new_watches(histories, names, rng, users=600))
+
+    full = ItemItemRecommender(neighbors=20).fit(histories)
+    _assert_same_lists(incremental, full)
+
+
+def test_update_similarities_are_exact():
+    histories, names = _histories(users=300, titles=80, seed=5)
+    model = ItemItemRecommender(neighbors=10).fit(histories)
+    rng = random.Random(11)
+    for _ in range(5):
+        model.update(_new_watches(histories, names, rng, users=300))
+
+    for item in range(len(model.titles)):
+        for other, similarity in zip(model.neighbor_ids[item], model.neighbor_sims[item]):
+            if other >= 0:
+                assert abs(similarity - _exact_similarity(model, item, other)) < 1e-5
+
+
+def test_update_with_only_new_titles_and_users():
+    histories, names = _histories(users=100, titles=40, seed=9)
+    incremental = ItemItemRecommender(neighbors=5).fit(histories)
+    new = {"newcomer": ["brand-new", names[0]], "user-1": ["brand-new"]}
+    incremental.update(new)
+    for user, titles in new.items():
+        histories.setdefault(user, []).extend(titles)
+
+    full = ItemItemRecommender(neighbors=5).fit(histories)
+    _assert_same_lists(incremental, full)
+
+
+def test_repeated_watch_is_ignored():
+    histories, names = _histories(users=50, titles=30, seed=1)
+    model = ItemItemRecommender(neighbors=5).fit(histories)
+    user, titles = next(iter(histories.items()))
+    assert model.update({user: titles}) == 0
+    assert sparse.csr_matrix(model.matrix).nnz == sum(len(set(t)) for t in histories.values())
@@ -0,0 +1,105 @@
+"""Operations/sec for the in-memory and SQLite repositories.
+
+Seeds both backends with the same professors, courses and students, then
+runs the same mix of reads, enrollments, grade updates and drops with
+`--concurrency` coroutines in flight. The SQLite run uses a temporary
+database file.
+
+    python benchmark_backends.py --students 2000 --ops 5000
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from datetime import date
+
+DB_DIR = tempfile.mkdtemp(prefix="university-bench-")
+os.environ.setdefault("UNIVERSITY_DATABASE_URL", f"sqlite+aiosqlite:///{DB_DIR}/bench.db")
+
+from repository import MemoryRepository, SQLRepository  # noqa: E402
+
+
+async def seed(repo, students: int, courses: int, professors: int):
+    for pid in range(1, professors + 1):
+        await repo.save_professor({"id": pid, "name": f"Prof {pid}", "email": f"p{pid}@uni.edu",
+                                   "department": "CS", "hire_date": date(2015, 1, 1)})
+    for cid in range(1, courses + 1):
+        await repo.save_course({"id": cid, "name": f"Course {cid}", "code": f"CS{100 + cid}", "credits": 3,
+                                "professor_id": 1 + cid % professors, "max_capacity": students // 4 or 1})
+    for sid in range(1, students + 1):
+        await repo.save_student({"id": sid, "name": f"Student {sid}", "email": f"s{sid}@uni.edu",
+                                 "major": "CS", "year": 1 + sid % 4, "gpa": 0.0})
+
+
+def make_ops(count: int, students: int, courses: int, seed_value: int):
+    rng = random.Random(seed_value)
+    ops = []
+    for _ in range(count):
+        sid, cid = rng.randint(1, students), rng.randint(1, courses)
+        roll = rng.random()
+        if roll < 0.4:
+            ops.append(("get_student", sid, cid))
+        elif roll < 0.55:
+            ops.append(("course_roster", sid, cid))
+        elif roll < 0.8:
+            ops.append(("enroll", sid, cid))
+        elif roll < 0.95:
+            ops.append(("set_grade", sid, cid))
+        else:
+            ops.append(("drop", sid, cid))
+    return ops
+
+
+async def run_op(repo, op):
+    name, sid, cid = op
+    if name == "get_student":
+        await repo.get_student(sid)
+    elif name == "course_roster":
+        await repo.course_roster(cid)
+    elif name == "enroll":
+        await repo.enroll({"student_id": sid, "course_id": cid, "enrollment_date": date.today(), "grade": None})
+    elif name == "set_grade":
+        await repo.set_grade(sid, cid, round(random.uniform(2.0, 4.0), 2))
+    else:
+        await repo.drop(sid, cid)
+
+
+async def bench(label: str, repo, args) -> None:
+    await repo.startup()
+    start = time.perf_counter()
+    await seed(repo, args.students, args.courses, args.professors)
+    seeded = time.perf_counter() - start
+
+    ops = make_ops(args.ops, args.students, args.courses, args.seed)
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def limited(op):
+        async with semaphore:
+            await run_op(repo, op)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(limited(op) for op in ops))
+    seconds = time.perf_counter() - start
+    enrolled = len(await repo.list_enrollments())
+    print(f"{label:<10} seed {seeded:>7.2f}s   mixed {args.ops / seconds:>10,.0f} ops/s   enrollments {enrolled}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--courses", type=int, default=50)
+    parser.add_argument("--professors", type=int, default=10)
+    parser.add_argument("--ops", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    await bench("memory", MemoryRepository(), args)
+    await bench("sqlite", SQLRepository(), args)
+    print(f"sqlite file: {os.environ['UNIVERSITY_DATABASE_URL']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
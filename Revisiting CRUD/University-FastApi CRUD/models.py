@@ -0,0 +1,46 @@
+from sqlalchemy import Column, Date, Float, ForeignKey, Integer, String
+
+from database import Base
+
+
+class Student(Base):
+    __tablename__ = "students"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100), nullable=False)
+    email = Column(String(255), nullable=False)
+    major = Column(String(100), nullable=False)
+    year = Column(Integer, nullable=False)
+    gpa = Column(Float, nullable=False, default=0.0)
+
+
+class Professor(Base):
+    __tablename__ = "professors"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100), nullable=False)
+    email = Column(String(255), nullable=False)
+    department = Column(String(100), nullable=False)
+    hire_date = Column(Date, nullable=False)
+
+
+class Course(Base):
+    __tablename__ = "courses"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(200), nullable=False)
+    code = Column(String(50), nullable=False)
+    credits = Column(Integer, nullable=False)
+    # Deleting a professor deletes the courses they teach
+    professor_id = Column(Integer, ForeignKey("professors.id", ondelete="CASCADE"), nullable=False, index=True)
+    max_capacity = Column(Integer, nullable=False)
+
+
+class Enrollment(Base):
+    __tablename__ = "enrollments"
+
+    # The composite key doubles as the student -> courses index
+    student_id = Column(Integer, ForeignKey("students.id", ondelete="CASCADE"), primary_key=True)
+    course_id = Column(Integer, ForeignKey("courses.id", ondelete="CASCADE"), primary_key=True, index=True)
+    enrollment_date = Column(Date, nullable=False)
+    grade = Column(Float, nullable=True)
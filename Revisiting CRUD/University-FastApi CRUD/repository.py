@@ -0,0 +1,327 @@
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import Date, Float, delete, func, literal, select, update
+from sqlalchemy.exc import IntegrityError
+
+from database import SessionLocal, create_tables
+from models import Course, Enrollment, Professor, Student
+from storage import UniversityStore
+
+
+class UniversityRepository(ABC):
+    """Storage interface used by the endpoints; records are plain dicts.
+
+    `enroll` returns None on success or the reason the enrollment was
+    refused; the delete/grade/drop methods return False when the record does
+    not exist. Both backends keep GPAs up to date on grade changes and on
+    cascading deletes.
+    """
+
+    async def startup(self) -> None:
+        pass
+
+    @abstractmethod
+    async def get_student(self, student_id: int) -> Optional[dict]: ...
+
+    @abstractmethod
+    async def list_students(self) -> List[dict]: ...
+
+    @abstractmethod
+    async def save_student(self, student: dict) -> dict: ...
+
+    @abstractmethod
+    async def delete_student(self, student_id: int) -> bool: ...
+
+    @abstractmethod
+    async def student_course_list(self, student_id: int) -> List[dict]: ...
+
+    @abstractmethod
+    async def get_course(self, course_id: int) -> Optional[dict]: ...
+
+    @abstractmethod
+    async def list_courses(self) -> List[dict]: ...
+
+    @abstractmethod
+    async def save_course(self, course: dict) -> dict: ...
+
+    @abstractmethod
+    async def delete_course(self, course_id: int) -> bool: ...
+
+    @abstractmethod
+    async def course_roster(self, course_id: int) -> List[dict]: ...
+
+    @abstractmethod
+    async def enrollment_count(self, course_id: int) -> int: ...
+
+    @abstractmethod
+    async def get_professor(self, professor_id: int) -> Optional[dict]: ...
+
+    @abstractmethod
+    async def list_professors(self) -> List[dict]: ...
+
+    @abstractmethod
+    async def save_professor(self, professor: dict) -> dict: ...
+
+    @abstractmethod
+    async def delete_professor(self, professor_id: int) -> bool: ...
+
+    @abstractmethod
+    async def professor_course_list(self, professor_id: int) -> List[dict]: ...
+
+    @abstractmethod
+    async def list_enrollments(self) -> Dict[str, dict]: ...
+
+    @abstractmethod
+    async def enroll(self, enrollment: dict) -> Optional[str]: ...
+
+    @abstractmethod
+    async def set_grade(self, student_id: int, course_id: int, grade: float) -> bool: ...
+
+    @abstractmethod
+    async def drop(self, student_id: int, course_id: int) -> bool: ...
+
+
+class MemoryRepository(UniversityRepository):
+    """The adjacency-indexed dict store behind the async interface"""
+
+    def __init__(self, store: Optional[UniversityStore] = None):
+        self.store = store or UniversityStore()
+
+    async def get_student(self, student_id):
+        return self.store.get_student(student_id)
+
+    async def list_students(self):
+        return self.store.list_students()
+
+    async def save_student(self, student):
+        return self.store.save_student(student)
+
+    async def delete_student(self, student_id):
+        return self.store.delete_student(student_id)
+
+    async def student_course_list(self, student_id):
+        return self.store.student_course_list(student_id)
+
+    async def get_course(self, course_id):
+        return self.store.get_course(course_id)
+
+    async def list_courses(self):
+        return self.store.list_courses()
+
+    async def save_course(self, course):
+        return self.store.save_course(course)
+
+    async def delete_course(self, course_id):
+        return self.store.delete_course(course_id)
+
+    async def course_roster(self, course_id):
+        return self.store.course_roster(course_id)
+
+    async def enrollment_count(self, course_id):
+        return self.store.enrollment_count(course_id)
+
+    async def get_professor(self, professor_id):
+        return self.store.get_professor(professor_id)
+
+    async def list_professors(self):
+        return self.store.list_professors()
+
+    async def save_professor(self, professor):
+        return self.store.save_professor(professor)
+
+    async def delete_professor(self, professor_id):
+        return self.store.delete_professor(professor_id)
+
+    async def professor_course_list(self, professor_id):
+        return self.store.professor_course_list(professor_id)
+
+    async def list_enrollments(self):
+        return self.store.list_enrollments()
+
+    async def enroll(self, enrollment):
+        return self.store.enroll(enrollment)
+
+    async def set_grade(self, student_id, course_id, grade):
+        return self.store.set_grade(student_id, course_id, grade)
+
+    async def drop(self, student_id, course_id):
+        return self.store.drop(student_id, course_id)
+
+
+def to_dict(row) -> dict:
+    return {column.name: getattr(row, column.name) for column in row.__table__.columns}
+
+
+class SQLRepository(UniversityRepository):
+    """SQLAlchemy async implementation (aiosqlite by default).
+
+    Every method runs in its own short session from the pooled engine.
+    Invariants that span rows are enforced by single statements: the
+    capacity check is part of the INSERT, and GPAs are recomputed with one
+    correlated UPDATE. Cascading deletes rely on the foreign keys.
+    """
+
+    def __init__(self, session_factory=None):
+        self.session_factory = session_factory or SessionLocal
+
+    async def startup(self):
+        await create_tables()
+
+    async def _get(self, model, key) -> Optional[dict]:
+        async with self.session_factory() as db:
+            row = await db.get(model, key)
+            return to_dict(row) if row else None
+
+    async def _all(self, statement) -> List[dict]:
+        async with self.session_factory() as db:
+            result = await db.execute(statement)
+            return [to_dict(row) for row in result.scalars().all()]
+
+    async def _save(self, model, data: dict) -> dict:
+        async with self.session_factory() as db:
+            await db.merge(model(**data))
+            await db.commit()
+        return data
+
+    @staticmethod
+    async def _update_gpas(db, student_ids: Iterable[int]) -> None:
+        student_ids = list(student_ids)
+        if not student_ids:
+            return
+        average = (
+            select(func.round(func.avg(Enrollment.grade), 2))
+            .where(Enrollment.student_id == Student.id, Enrollment.grade.isnot(None))
+            .scalar_subquery()
+        )
+        await db.execute(
+            update(Student).where(Student.id.in_(student_ids)).values(gpa=func.coalesce(average, 0.0))
+        )
+
+    # ---------------- STUDENTS ------------------
+
+    async def get_student(self, student_id):
+        return await self._get(Student, student_id)
+
+    async def list_students(self):
+        return await self._all(select(Student).order_by(Student.id))
+
+    async def save_student(self, student):
+        return await self._save(Student, student)
+
+    async def delete_student(self, student_id):
+        async with self.session_factory() as db:
+            result = await db.execute(delete(Student).where(Student.id == student_id))
+            await db.commit()
+            return result.rowcount > 0
+
+    async def student_course_list(self, student_id):
+        return await self._all(
+            select(Course).join(Enrollment, Enrollment.course_id == Course.id)
+            .where(Enrollment.student_id == student_id).order_by(Course.id)
+        )
+
+    # ---------------- COURSES ------------------
+
+    async def get_course(self, course_id):
+        return await self._get(Course, course_id)
+
+    async def list_courses(self):
+        return await self._all(select(Course).order_by(Course.id))
+
+    async def save_course(self, course):
+        return await self._save(Course, course)
+
+    async def delete_course(self, course_id):
+        async with self.session_factory() as db:
+            affected = (await db.execute(
+                select(Enrollment.student_id).where(Enrollment.course_id == course_id)
+            )).scalars().all()
+            result = await db.execute(delete(Course).where(Course.id == course_id))
+            await self._update_gpas(db, affected)
+            await db.commit()
+            return result.rowcount > 0
+
+    async def course_roster(self, course_id):
+        return await self._all(
+            select(Student).join(Enrollment, Enrollment.student_id == Student.id)
+            .where(Enrollment.course_id == course_id).order_by(Student.id)
+        )
+
+    async def enrollment_count(self, course_id):
+        async with self.session_factory() as db:
+            return await db.scalar(select(func.count()).where(Enrollment.course_id == course_id))
+
+    # ---------------- PROFESSORS ------------------
+
+    async def get_professor(self, professor_id):
+        return await self._get(Professor, professor_id)
+
+    async def list_professors(self):
+        return await self._all(select(Professor).order_by(Professor.id))
+
+    async def save_professor(self, professor):
+        return await self._save(Professor, professor)
+
+    async def delete_professor(self, professor_id):
+        async with self.session_factory() as db:
+            affected = (await db.execute(
+                select(Enrollment.student_id).join(Course, Course.id == Enrollment.course_id)
+                .where(Course.professor_id == professor_id)
+            )).scalars().all()
+            result = await db.execute(delete(Professor).where(Professor.id == professor_id))
+            await self._update_gpas(db, set(affected))
+            await db.commit()
+            return result.rowcount > 0
+
+    async def professor_course_list(self, professor_id):
+        return await self._all(select(Course).where(Course.professor_id == professor_id).order_by(Course.id))
+
+    # ---------------- ENROLLMENTS ------------------
+
+    async def list_enrollments(self):
+        rows = await self._all(select(Enrollment))
+        return {f"{e['student_id']}_{e['course_id']}": e for e in rows}
+
+    async def enroll(self, enrollment):
+        student_id, course_id = enrollment['student_id'], enrollment['course_id']
+        enrolled = select(func.count()).where(Enrollment.course_id == course_id).scalar_subquery()
+        capacity = select(Course.max_capacity).where(Course.id == course_id).scalar_subquery()
+        # INSERT ... SELECT ... WHERE count < capacity: the check and the write are one statement
+        statement = Enrollment.__table__.insert().from_select(
+            ["student_id", "course_id", "enrollment_date", "grade"],
+            select(
+                literal(student_id), literal(course_id),
+                literal(enrollment['enrollment_date'], Date), literal(enrollment.get('grade'), Float)
+            ).where(enrolled < capacity)
+        )
+        async with self.session_factory() as db:
+            if await db.get(Enrollment, (student_id, course_id)):
+                return "Student already enrolled."
+            try:
+                result = await db.execute(statement)
+                await db.commit()
+            except IntegrityError:
+                # Lost a race with the same enrollment from another request
+                return "Student already enrolled."
+            return None if result.rowcount else "Course at capacity."
+
+    async def set_grade(self, student_id, course_id, grade):
+        async with self.session_factory() as db:
+            result = await db.execute(
+                update(Enrollment)
+                .where(Enrollment.student_id == student_id, Enrollment.course_id == course_id)
+                .values(grade=grade)
+            )
+            await self._update_gpas(db, [student_id])
+            await db.commit()
+            return result.rowcount > 0
+
+    async def drop(self, student_id, course_id):
+        async with self.session_factory() as db:
+            result = await db.execute(
+                delete(Enrollment).where(Enrollment.student_id == student_id, Enrollment.course_id == course_id)
+            )
+            await self._update_gpas(db, [student_id])
+            await db.commit()
+            return result.rowcount > 0
@@ -0,0 +1,157 @@
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+
+class UniversityStore:
+    """Dict-based storage with adjacency indexes for the relations.
+
+    Enrollments are keyed by (student_id, course_id) and mirrored in
+    student -> courses and course -> students sets; courses are indexed by
+    professor. Relation queries, capacity checks and cascading deletes touch
+    only the related records, never the whole enrollment table.
+    """
+
+    def __init__(self):
+        self.students: Dict[int, dict] = {}
+        self.courses: Dict[int, dict] = {}
+        self.professors: Dict[int, dict] = {}
+        self.enrollments: Dict[Tuple[int, int], dict] = {}
+        self.student_courses: Dict[int, Set[int]] = defaultdict(set)
+        self.course_students: Dict[int, Set[int]] = defaultdict(set)
+        self.professor_courses: Dict[int, Set[int]] = defaultdict(set)
+        self.lock = threading.RLock()
+
+    # ---------------- STUDENTS ------------------
+
+    def get_student(self, student_id: int) -> Optional[dict]:
+        return self.students.get(student_id)
+
+    def list_students(self) -> List[dict]:
+        return list(self.students.values())
+
+    def save_student(self, student: dict) -> dict:
+        with self.lock:
+            self.students[student['id']] = student
+        return student
+
+    def delete_student(self, student_id: int) -> bool:
+        with self.lock:
+            if self.students.pop(student_id, None) is None:
+                return False
+            for course_id in self.student_courses.pop(student_id, set()):
+                self.enrollments.pop((student_id, course_id), None)
+                self.course_students[course_id].discard(student_id)
+            return True
+
+    def student_course_list(self, student_id: int) -> List[dict]:
+        return [self.courses[cid] for cid in sorted(self.student_courses.get(student_id, ())) if cid in self.courses]
+
+    # ---------------- COURSES ------------------
+
+    def get_course(self, course_id: int) -> Optional[dict]:
+        return self.courses.get(course_id)
+
+    def list_courses(self) -> List[dict]:
+        return list(self.courses.values())
+
+    def save_course(self, course: dict) -> dict:
+        with self.lock:
+            previous = self.courses.get(course['id'])
+            if previous:
+                self.professor_courses[previous['professor_id']].discard(course['id'])
+            self.courses[course['id']] = course
+            self.professor_courses[course['professor_id']].add(course['id'])
+        return course
+
+    def delete_course(self, course_id: int) -> bool:
+        with self.lock:
+            course = self.courses.pop(course_id, None)
+            if course is None:
+                return False
+            self.professor_courses[course['professor_id']].discard(course_id)
+            for student_id in self.course_students.pop(course_id, set()):
+                self.enrollments.pop((student_id, course_id), None)
+                self.student_courses[student_id].discard(course_id)
+                self._update_gpa(student_id)
+            return True
+
+    def course_roster(self, course_id: int) -> List[dict]:
+        return [self.students[sid] for sid in sorted(self.course_students.get(course_id, ())) if sid in self.students]
+
+    def enrollment_count(self, course_id: int) -> int:
+        return len(self.course_students.get(course_id, ()))
+
+    # ---------------- PROFESSORS ------------------
+
+    def get_professor(self, professor_id: int) -> Optional[dict]:
+        return self.professors.get(professor_id)
+
+    def list_professors(self) -> List[dict]:
+        return list(self.professors.values())
+
+    def save_professor(self, professor: dict) -> dict:
+        with self.lock:
+            self.professors[professor['id']] = professor
+        return professor
+
+    def delete_professor(self, professor_id: int) -> bool:
+        """Delete a professor together with the courses they teach"""
+        with self.lock:
+            if self.professors.pop(professor_id, None) is None:
+                return False
+            for course_id in list(self.professor_courses.pop(professor_id, set())):
+                self.delete_course(course_id)
+            return True
+
+    def professor_course_list(self, professor_id: int) -> List[dict]:
+        return [self.courses[cid] for cid in sorted(self.professor_courses.get(professor_id, ())) if cid in self.courses]
+
+    # ---------------- ENROLLMENTS ------------------
+
+    def get_enrollment(self, student_id: int, course_id: int) -> Optional[dict]:
+        return self.enrollments.get((student_id, course_id))
+
+    def list_enrollments(self) -> Dict[str, dict]:
+        return {f"{sid}_{cid}": e for (sid, cid), e in list(self.enrollments.items())}
+
+    def enroll(self, enrollment: dict) -> Optional[str]:
+        """Add an enrollment, or return the reason it was refused"""
+        student_id, course_id = enrollment['student_id'], enrollment['course_id']
+        with self.lock:
+            if (student_id, course_id) in self.enrollments:
+                return "Student already enrolled."
+            if self.enrollment_count(course_id) >= self.courses[course_id]['max_capacity']:
+                return "Course at capacity."
+            self.enrollments[(student_id, course_id)] = enrollment
+            self.student_courses[student_id].add(course_id)
+            self.course_students[course_id].add(student_id)
+        return None
+
+    def set_grade(self, student_id: int, course_id: int, grade: float) -> bool:
+        with self.lock:
+            enrollment = self.enrollments.get((student_id, course_id))
+            if enrollment is None:
+                return False
+            enrollment['grade'] = grade
+            self._update_gpa(student_id)
+            return True
+
+    def drop(self, student_id: int, course_id: int) -> bool:
+        with self.lock:
+            if self.enrollments.pop((student_id, course_id), None) is None:
+                return False
+            self.student_courses[student_id].discard(course_id)
+            self.course_students[course_id].discard(student_id)
+            self._update_gpa(student_id)
+            return True
+
+    # ---------------- GPA CALCULATION ------------------
+
+    def _update_gpa(self, student_id: int) -> None:
+        grades = [
+            self.enrollments[(student_id, cid)]['grade'] for cid in self.student_courses.get(student_id, ())
+            if self.enrollments[(student_id, cid)].get('grade') is not None
+        ]
+        if student_id in self.students:
+            self.students[student_id]['gpa'] = round(sum(grades) / len(grades), 2) if grades else 0.0
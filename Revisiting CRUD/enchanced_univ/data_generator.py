@@ -0,0 +1,173 @@
+import random
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from rules import exceeds_credit_limit, gpa, is_on_probation, is_passing, prerequisites_met
+
+FIRST_NAMES = [
+    "Alice", "Bob", "Carol", "David", "Eva", "Frank", "Grace", "Henry", "Isla", "Jack",
+    "Karen", "Liam", "Maya", "Noah", "Olivia", "Peter", "Quinn", "Rosa", "Sam", "Tara",
+    "Uma", "Victor", "Wendy", "Xavier", "Yara", "Zane", "Amir", "Bea", "Chen", "Dara"
+]
+LAST_NAMES = [
+    "Johnson", "Smith", "Davis", "Wilson", "Brown", "Miller", "Chen", "Anderson", "Taylor",
+    "Thomas", "Moore", "Martin", "Lee", "Walker", "Hall", "Young", "King", "Wright",
+    "Lopez", "Hill", "Scott", "Green", "Adams", "Baker", "Nelson", "Carter", "Mitchell"
+]
+
+# (major / department value, course code prefix, share of students)
+DEPARTMENTS = [
+    ("Computer Science", "CS", 0.30),
+    ("Mathematics", "MATH", 0.15),
+    ("Physics", "PHYS", 0.10),
+    ("Chemistry", "CHEM", 0.10),
+    ("Engineering", "ENG", 0.20),
+    ("Biology", "BIO", 0.15),
+]
+
+COURSE_TOPICS = ["Foundations", "Methods", "Systems", "Theory", "Applications", "Seminar", "Laboratory"]
+
+
+def _draw_grade(rng: random.Random, ability: float) -> str:
+    """Grade skewed by a student's ability (their target GPA)"""
+    score = rng.gauss(ability, 0.8)
+    if score >= 3.5:
+        return 'A'
+    if score >= 2.5:
+        return 'B'
+    if score >= 1.5:
+        return 'C'
+    if score >= 0.7:
+        return 'D'
+    return 'F'
+
+
+def generate_dataset(students: int = 1000, courses_per_department: Optional[int] = None,
+                     professors: Optional[int] = None, seed: int = 42) -> Dict[str, List[Dict[str, Any]]]:
+    """Build a reproducible university dataset as ready-to-store records.
+
+    Courses are spread over 100-400 levels per department and most upper
+    level courses require a lower level course of the same department, giving
+    prerequisite chains. Students in year N have graded enrollments in lower
+    level courses (weighted by a per-student ability) plus ungraded current
+    enrollments, while respecting capacity, the 18 credit limit and
+    prerequisites.
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    courses_per_department = courses_per_department or max(8, min(200, students // 150))
+    professors = professors or max(len(DEPARTMENTS), students // 40)
+
+    # ----- professors
+    professor_records = []
+    for i in range(professors):
+        department = DEPARTMENTS[i % len(DEPARTMENTS)][0]
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        professor_records.append({
+            'id': f"PRF{i:08X}",
+            'name': f"Dr. {first} {last}",
+            'email': f"{first.lower()}.{last.lower()}.{i}@faculty.university.edu",
+            'department': department,
+            'hire_date': date(1990, 1, 1) + timedelta(days=rng.randrange(0, 34 * 365)),
+            'current_courses': [],
+            'created_at': now
+        })
+    professors_by_department: Dict[str, List[Dict]] = {}
+    for professor in professor_records:
+        professors_by_department.setdefault(professor['department'], []).append(professor)
+
+    # ----- courses with prerequisite chains
+    course_records = []
+    courses_by_department: Dict[str, Dict[int, List[Dict]]] = {}
+    for department, prefix, _ in DEPARTMENTS:
+        levels: Dict[int, List[Dict]] = {1: [], 2: [], 3: [], 4: []}
+        for n in range(courses_per_department):
+            level = 1 + n % 4
+            number = level * 100 + n // 4
+            if number >= (level + 1) * 100:
+                break
+            lower = levels.get(level - 1) or []
+            prerequisites = [rng.choice(lower)['course_code']] if lower and rng.random() < 0.7 else []
+            course = {
+                'id': f"CRS{len(course_records):08X}",
+                'course_code': f"{prefix}{number}-001",
+                'name': f"{department} {rng.choice(COURSE_TOPICS)} {number}",
+                'department': department,
+                'credits': rng.choices([1, 2, 3, 4, 5], weights=[5, 10, 60, 20, 5])[0],
+                'capacity': rng.choice([20, 30, 40, 60, 100, 150, 250]),
+                'prerequisites': prerequisites,
+                'current_enrollment': 0,
+                'created_at': now
+            }
+            staff = professors_by_department.get(department)
+            if staff:
+                professor = staff[len(course_records) % len(staff)]
+                if len(professor['current_courses']) < 4:
+                    course['professor_id'] = professor['id']
+                    professor['current_courses'].append(course['id'])
+            levels[level].append(course)
+            course_records.append(course)
+        courses_by_department[department] = levels
+
+    # ----- students and graded enrollment histories
+    student_records = []
+    enrollment_records = []
+    majors = [d[0] for d in DEPARTMENTS]
+    major_weights = [d[2] for d in DEPARTMENTS]
+    for i in range(students):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        major = rng.choices(majors, weights=major_weights)[0]
+        year = rng.randint(1, 4)
+        ability = min(4.0, max(0.5, rng.gauss(3.0, 0.6)))
+        student = {
+            'id': f"STU{i:08X}",
+            'name': f"{first} {last}",
+            'email': f"{first.lower()}.{last.lower()}.{i}@university.edu",
+            'major': major,
+            'year': year,
+            'gpa': 0.0,
+            'created_at': now,
+            'is_on_probation': False
+        }
+
+        credits = 0
+        passed = set()
+        history = []
+        levels = courses_by_department[major]
+        for level in range(1, year + 1):
+            graded = level < year
+            for course in rng.sample(levels[level], min(len(levels[level]), rng.randint(1, 2))):
+                if exceeds_credit_limit(credits, course['credits']):
+                    continue
+                if course['current_enrollment'] >= course['capacity']:
+                    continue
+                if not prerequisites_met(course['prerequisites'], passed):
+                    continue
+                grade = _draw_grade(rng, ability) if graded else None
+                enrollment_records.append({
+                    'id': f"ENR{len(enrollment_records):08X}",
+                    'student_id': student['id'],
+                    'course_id': course['id'],
+                    'grade': grade,
+                    'enrollment_date': date.today() - timedelta(days=365 * (year - level) + rng.randrange(0, 120)),
+                    'student_name': student['name'],
+                    'course_name': course['name'],
+                    'credits': course['credits']
+                })
+                course['current_enrollment'] += 1
+                credits += course['credits']
+                history.append((grade, course['credits']))
+                if is_passing(grade):
+                    passed.add(course['course_code'])
+
+        student_gpa = gpa(history)
+        student['gpa'] = round(student_gpa if student_gpa is not None else ability, 2)
+        student['is_on_probation'] = is_on_probation(student['gpa'])
+        student_records.append(student)
+
+    return {
+        "students": student_records,
+        "professors": professor_records,
+        "courses": course_records,
+        "enrollments": enrollment_records
+    }
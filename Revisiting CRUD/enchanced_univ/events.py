@@ -0,0 +1,146 @@
+import asyncio
+import itertools
+import threading
+from collections import OrderedDict, defaultdict
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Hashable, Iterable, List, Optional, Set
+
+from filter_index import enum_value
+
+
+def course_topic(course_id: str) -> str:
+    return f"course:{course_id}"
+
+
+def department_topic(department: Any) -> str:
+    return f"department:{enum_value(department)}"
+
+
+ALL_TOPIC = "all"
+
+
+class Subscription:
+    """One client's view of the broker: a bounded, coalescing event buffer.
+
+    Lives on the event loop that created it. Events are keyed, and a newer
+    event with the same key replaces the queued one (the latest seat count of
+    a course is all a client needs). When the buffer is full the oldest event
+    is dropped and counted, so a slow client costs bounded memory and is told
+    to resync instead of stalling publishers.
+    """
+
+    def __init__(self, topics: Set[str], loop: asyncio.AbstractEventLoop, buffer_size: int,
+                 coalesce_interval: float):
+        self.topics = topics
+        self.loop = loop
+        self.buffer_size = buffer_size
+        self.coalesce_interval = coalesce_interval
+        self.pending: "OrderedDict[Hashable, Dict[str, Any]]" = OrderedDict()
+        self.dropped = 0
+        self.closed = False
+        self._ready = asyncio.Event()
+
+    def push(self, key: Hashable, event: Dict[str, Any]) -> None:
+        """Queue an event; must run on the subscription's loop"""
+        if self.closed:
+            return
+        self.pending[key] = event
+        self.pending.move_to_end(key)
+        while len(self.pending) > self.buffer_size:
+            self.pending.popitem(last=False)
+            self.dropped += 1
+        self._ready.set()
+
+    async def next_batch(self, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Wait for events, let a burst settle briefly, then drain the buffer.
+
+        Returns an empty list if nothing arrived within `timeout`.
+        """
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        if self.coalesce_interval:
+            await asyncio.sleep(self.coalesce_interval)
+        self._ready.clear()
+        batch = list(self.pending.values())
+        self.pending.clear()
+        if self.dropped:
+            batch.insert(0, {"type": "stream.overflow", "data": {"dropped": self.dropped}})
+            self.dropped = 0
+        return batch
+
+    async def events(self, keepalive: float = 15.0) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """Yield events forever, yielding None every `keepalive` idle seconds"""
+        while not self.closed:
+            batch = await self.next_batch(keepalive)
+            if not batch:
+                yield None
+            for event in batch:
+                yield event
+
+
+class EventBroker:
+    """In-process publish/subscribe hub for change events.
+
+    Publishers are the write handlers, which run in FastAPI's threadpool, so
+    `publish` only looks up the interested subscriptions under a lock and
+    hands each event to its subscriber's loop with call_soon_threadsafe;
+    it never blocks on a client.
+    """
+
+    def __init__(self, buffer_size: int = 256, coalesce_interval: float = 0.05):
+        self.buffer_size = buffer_size
+        self.coalesce_interval = coalesce_interval
+        self.subscribers: Dict[str, Set[Subscription]] = defaultdict(set)
+        self._sequence = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def subscribe(self, topics: Iterable[str]) -> Subscription:
+        """Subscribe the running event loop to some topics (call from async code)"""
+        subscription = Subscription(set(topics) or {ALL_TOPIC}, asyncio.get_running_loop(),
+                                    self.buffer_size, self.coalesce_interval)
+        with self._lock:
+            for topic in subscription.topics:
+                self.subscribers[topic].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscription.closed = True
+        with self._lock:
+            for topic in subscription.topics:
+                self.subscribers[topic].discard(subscription)
+                if not self.subscribers[topic]:
+                    del self.subscribers[topic]
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(set().union(*self.subscribers.values())) if self.subscribers else 0
+
+    def publish(self, event_type: str, topics: Iterable[str], data: Dict[str, Any],
+                key: Optional[Hashable] = None) -> Optional[Dict[str, Any]]:
+        """Deliver an event to every subscriber of any of its topics.
+
+        Events sharing a `key` are coalesced in subscriber buffers; without a
+        key every event is delivered individually.
+        """
+        topics = set(topics) | {ALL_TOPIC}
+        with self._lock:
+            targets = set().union(*(self.subscribers.get(topic, ()) for topic in topics))
+        if not targets:
+            return None
+
+        event = {
+            "id": next(self._sequence),
+            "type": event_type,
+            "data": data,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+        key = key if key is not None else ("event", event["id"])
+        for subscription in targets:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.push, key, event)
+            except RuntimeError:
+                # The subscriber's loop has shut down
+                self.unsubscribe(subscription)
+        return event
@@ -0,0 +1,261 @@
+import threading
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from enum import Enum
+from itertools import combinations, count
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+def enum_value(value: Any) -> Any:
+    """Index enums by their value so Enum members and raw strings compare equal"""
+    return value.value if isinstance(value, Enum) else value
+
+
+# Stands in for a field a record was not indexed under yet
+_MISSING = object()
+
+
+class SortedSeqs:
+    """Sorted sequence numbers kept in blocks of at most 2 * LOAD.
+
+    Inserting into or deleting from one long sorted list shifts everything
+    after the position; here only one block is touched, so a write costs
+    O(log n + LOAD). New records carry the highest sequence number and are
+    appended to the last block.
+    """
+
+    LOAD = 1000
+
+    def __init__(self):
+        self.blocks: List[List[int]] = []
+        self.maxes: List[int] = []
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def add(self, seq: int) -> None:
+        if not self.blocks:
+            self.blocks.append([seq])
+            self.maxes.append(seq)
+            self.size = 1
+            return
+        if seq > self.maxes[-1]:
+            b = len(self.blocks) - 1
+            self.blocks[b].append(seq)
+            self.maxes[b] = seq
+        else:
+            b = bisect_left(self.maxes, seq)
+            insort(self.blocks[b], seq)
+        self.size += 1
+        block = self.blocks[b]
+        if len(block) > 2 * self.LOAD:
+            half = block[self.LOAD:]
+            del block[self.LOAD:]
+            self.blocks.insert(b + 1, half)
+            self.maxes[b] = block[-1]
+            self.maxes.insert(b + 1, half[-1])
+
+    def discard(self, seq: int) -> None:
+        b = bisect_left(self.maxes, seq)
+        if b == len(self.maxes):
+            return
+        block = self.blocks[b]
+        i = bisect_left(block, seq)
+        if block[i] != seq:
+            return
+        del block[i]
+        self.size -= 1
+        if block:
+            self.maxes[b] = block[-1]
+        else:
+            del self.blocks[b]
+            del self.maxes[b]
+
+    def iter_from(self, index: int) -> Iterator[int]:
+        """Sequence numbers from position `index` on"""
+        for b, block in enumerate(self.blocks):
+            if index < len(block):
+                yield from block[index:]
+                for rest in range(b + 1, len(self.blocks)):
+                    yield from self.blocks[rest]
+                return
+            index -= len(block)
+
+    def iter_after(self, seq: int) -> Iterator[int]:
+        """Sequence numbers greater than `seq`, ascending"""
+        b = bisect_right(self.maxes, seq)
+        if b == len(self.blocks):
+            return
+        block = self.blocks[b]
+        yield from block[bisect_right(block, seq):]
+        for rest in range(b + 1, len(self.blocks)):
+            yield from self.blocks[rest]
+
+    def iter_through(self, seq: int) -> Iterator[int]:
+        """Sequence numbers up to and including `seq`, descending"""
+        b = min(bisect_left(self.maxes, seq), len(self.blocks) - 1)
+        if b < 0:
+            return
+        block = self.blocks[b]
+        yield from reversed(block[:bisect_right(block, seq)])
+        for rest in range(b - 1, -1, -1):
+            yield from reversed(self.blocks[rest])
+
+
+class FilterIndex:
+    """Equality indexes over a few record fields, kept in creation order.
+
+    Every record gets a monotonically increasing sequence number when first
+    added. Each (field, value) bucket is a SortedSeqs of sequence numbers, so
+    a filtered page can be read by walking the smallest bucket from an offset
+    or cursor without touching the rest of the dataset, and adding or
+    removing a record only touches one block per bucket. Re-indexing a
+    record only moves it between the buckets whose value changed. Match
+    counts for every combination of two or more field values are kept up to
+    date on add/remove, so totals never need a scan.
+    """
+
+    def __init__(self, fields: Dict[str, Callable[[Dict], Any]]):
+        self.fields = fields
+        self._seq = count()
+        self.seq_of: Dict[str, int] = {}
+        self.id_at: Dict[int, str] = {}
+        self.order = SortedSeqs()
+        self.keys_of: Dict[str, Dict[str, Any]] = {}
+        self.buckets: Dict[Tuple[str, Any], SortedSeqs] = defaultdict(SortedSeqs)
+        self.combo_counts: Dict[Tuple[Tuple[str, Any], ...], int] = defaultdict(int)
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clear()
+
+    def _clear(self) -> None:
+        self.seq_of.clear()
+        self.id_at.clear()
+        self.order = SortedSeqs()
+        self.keys_of.clear()
+        self.buckets.clear()
+        self.combo_counts.clear()
+
+    def add(self, record_id: str, record: Dict) -> None:
+        """Insert a record, or re-index it in place if it already exists"""
+        with self._lock:
+            self._add(record_id, record)
+
+    def remove(self, record_id: str) -> None:
+        with self._lock:
+            self._remove(record_id)
+
+    def _add(self, record_id: str, record: Dict) -> None:
+        keys = {field: enum_value(extract(record)) for field, extract in self.fields.items()}
+        old_keys = self.keys_of.get(record_id)
+        if old_keys == keys:
+            return
+        if old_keys is not None:
+            seq = self.seq_of[record_id]
+            self._unbucket(seq, old_keys, keys)
+        else:
+            seq = next(self._seq)
+            self.seq_of[record_id] = seq
+            self.id_at[seq] = record_id
+            self.order.add(seq)
+            old_keys = {}
+        self.keys_of[record_id] = keys
+        for field, value in keys.items():
+            if old_keys.get(field, _MISSING) != value:
+                self.buckets[(field, value)].add(seq)
+        for combo in self._combos(keys):
+            self.combo_counts[combo] += 1
+
+    def _remove(self, record_id: str) -> None:
+        seq = self.seq_of.pop(record_id, None)
+        if seq is None:
+            return
+        self._unbucket(seq, self.keys_of.pop(record_id), {})
+        del self.id_at[seq]
+        self.order.discard(seq)
+
+    def _unbucket(self, seq: int, keys: Dict[str, Any], keep: Dict[str, Any]) -> None:
+        """Take `seq` out of its buckets and combination counts; buckets whose
+        value is the same in `keep` are left alone"""
+        for field, value in keys.items():
+            if keep.get(field, _MISSING) == value:
+                continue
+            bucket = self.buckets[(field, value)]
+            bucket.discard(seq)
+            if not bucket:
+                del self.buckets[(field, value)]
+        for combo in self._combos(keys):
+            self.combo_counts[combo] -= 1
+            if not self.combo_counts[combo]:
+                del self.combo_counts[combo]
+
+    @staticmethod
+    def _combos(keys: Dict[str, Any]) -> List[Tuple[Tuple[str, Any], ...]]:
+        """Every combination of two or more (field, value) pairs, in field order"""
+        items = sorted(keys.items())
+        return [combo for size in range(2, len(items) + 1) for combo in combinations(items, size)]
+
+    def query(self, filters: Dict[str, Any], offset: int = 0, limit: int = 10,
+              cursor: Optional[int] = None) -> Tuple[int, List[str], Optional[int], bool]:
+        """Return (total matches, ids on this page, cursor for the next page, has previous page).
+
+        `filters` maps field names to required values; None values are
+        ignored. When `cursor` is given the page starts right after that
+        sequence number and `offset` is not applied; there is a previous
+        page when some match sits at or before the cursor.
+        """
+        with self._lock:
+            return self._query(filters, offset, limit, cursor)
+
+    def _query(self, filters: Dict[str, Any], offset: int, limit: int,
+               cursor: Optional[int]) -> Tuple[int, List[str], Optional[int], bool]:
+        filters = {f: enum_value(v) for f, v in filters.items() if v is not None}
+        if not filters:
+            driving, others = self.order, []
+            total = len(self.order)
+        else:
+            if any(key not in self.buckets for key in filters.items()):
+                return 0, [], None, cursor is None and offset > 0
+            keys = sorted(filters.items(), key=lambda item: len(self.buckets[item]))
+            driving = self.buckets[keys[0]]
+            others = keys[1:]
+            if others:
+                total = self.combo_counts.get(tuple(sorted(keys)), 0)
+            else:
+                total = len(driving)
+
+        def matches(seq: int) -> bool:
+            keys_of = self.keys_of[self.id_at[seq]]
+            return all(keys_of[field] == value for field, value in others)
+
+        skip = 0
+        if cursor is not None:
+            seqs = driving.iter_after(cursor)
+        elif others:
+            seqs, skip = driving.iter_from(0), offset
+        else:
+            seqs = driving.iter_from(offset)
+
+        page: List[int] = []
+        for seq in seqs:
+            if others and not matches(seq):
+                continue
+            if skip:
+                skip -= 1
+                continue
+            page.append(seq)
+            if len(page) > limit:
+                break
+
+        if cursor is None:
+            has_prev = offset > 0
+        else:
+            has_prev = any(matches(seq) for seq in driving.iter_through(cursor))
+        next_cursor = page[limit - 1] if len(page) > limit else None
+        return total, [self.id_at[seq] for seq in page[:limit]], next_cursor, has_prev
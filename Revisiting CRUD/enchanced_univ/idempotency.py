@@ -0,0 +1,232 @@
+import hashlib
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+def fingerprint(method: str, path: str, body: Any) -> str:
+    """Stable hash of a request: the same payload always gives the same value"""
+    canonical = json.dumps(body, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(f"{method} {path}\n{canonical}".encode()).hexdigest()
+
+
+def summarize(result: Any) -> Any:
+    """Compact form of a bulk result, kept for replays.
+
+    Lists of created records are reduced to their ids; counts and per-row
+    errors are kept as they are.
+    """
+    if not isinstance(result, dict):
+        return result
+    summary = {}
+    for key, value in result.items():
+        if key.startswith("created_") and isinstance(value, list):
+            summary["created_ids"] = [record.get("id") if isinstance(record, dict) else record for record in value]
+        else:
+            summary[key] = value
+    return summary
+
+
+def size_of(value: Any) -> int:
+    """Approximate memory weight of a stored value: its JSON length in bytes"""
+    return len(json.dumps(value, separators=(",", ":"), default=str))
+
+
+class IdempotencyError(Exception):
+    """A retried request that cannot be replayed, with an HTTP-style status"""
+
+    def __init__(self, status: int, detail: str):
+        self.status = status
+        self.detail = detail
+        super().__init__(detail)
+
+
+class TTLCache:
+    """Bounded mapping whose entries expire `ttl` seconds after their last write.
+
+    Entries are kept in least-recently-used order; inserting past
+    `max_entries`, or past `max_bytes` of total entry size, evicts the least
+    recently used entries. Sizes are given by the caller on each write, and
+    the entry just written is never evicted for size alone.
+    """
+
+    def __init__(self, ttl: float, max_entries: int, max_bytes: Optional[int] = None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        return self._bytes
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value, _ = entry
+            if expires < time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, size: int = 0) -> None:
+        with self._lock:
+            self._store(key, value, size)
+
+    def setdefault(self, key: Hashable, value: Any, size: int = 0) -> Tuple[Any, bool]:
+        """Insert `value` unless a live entry exists; returns (entry, inserted)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] >= time.monotonic():
+                self._entries.move_to_end(key)
+                return entry[1], False
+            self._store(key, value, size)
+            return value, True
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def _store(self, key: Hashable, value: Any, size: int) -> None:
+        self._remove(key)
+        self._entries[key] = (time.monotonic() + self.ttl, value, size)
+        self._bytes += size
+        self._purge()
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def _over_budget(self) -> bool:
+        if len(self._entries) > self.max_entries:
+            return True
+        return self.max_bytes is not None and self._bytes > self.max_bytes and len(self._entries) > 1
+
+    def _purge(self) -> None:
+        now = time.monotonic()
+        while self._entries:
+            oldest_key, (expires, _, _) = next(iter(self._entries.items()))
+            if expires >= now and not self._over_budget():
+                break
+            self._remove(oldest_key)
+
+
+class _Attempt:
+    def __init__(self, request_fingerprint: str):
+        self.fingerprint = request_fingerprint
+        self.done = threading.Event()
+        self.result: Any = None
+
+
+class IdempotencyStore:
+    """Replays the stored result of a request retried with the same Idempotency-Key.
+
+    The first request with a key runs the handler. A retry with the same
+    payload gets the stored result without redoing any work, and if it
+    arrives while the first attempt is still running it waits for that
+    attempt. The same key with a different payload is rejected. Attempts
+    that raise are forgotten, so the client can retry them.
+
+    Only a compact summary of each result is kept (see `summarize`), so a
+    replay returns the counts, created ids and errors rather than the full
+    records. Summaries are held for `ttl` seconds, for at most `max_entries`
+    keys and `max_bytes` of summaries.
+    """
+
+    def __init__(self, ttl: float = 24 * 3600, max_entries: int = 10_000,
+                 max_bytes: int = 64 * 1024 * 1024, wait_timeout: float = 30.0):
+        self.cache = TTLCache(ttl, max_entries, max_bytes)
+        self.wait_timeout = wait_timeout
+
+    def run(self, key: str, request_fingerprint: str, handler: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Return (result, replayed)"""
+        attempt, inserted = self.cache.setdefault(key, _Attempt(request_fingerprint))
+        if not inserted:
+            if attempt.fingerprint != request_fingerprint:
+                raise IdempotencyError(422, "Idempotency-Key was already used with a different request body")
+            if not attempt.done.wait(self.wait_timeout):
+                raise IdempotencyError(409, "A request with this Idempotency-Key is still being processed")
+            if attempt.result is None:
+                # The original attempt failed and was forgotten; run this one fresh
+                return self.run(key, request_fingerprint, handler)
+            return attempt.result, True
+
+        try:
+            result = handler()
+            attempt.result = summarize(result)
+            # Re-insert with the summary's weight so the byte budget sees it
+            self.cache.set(key, attempt, size_of(attempt.result))
+        except BaseException:
+            self.cache.pop(key)
+            raise
+        finally:
+            attempt.done.set()
+        return result, False
+
+
+class UploadSession:
+    def __init__(self, kind: str, total_chunks: Optional[int]):
+        self.id = f"UPL{uuid.uuid4().hex[:8].upper()}"
+        self.kind = kind
+        self.total_chunks = total_chunks
+        self.chunks: Dict[int, Dict[str, Any]] = {}
+        self.size = 0
+        self.created_at = time.time()
+        self._pending: set = set()
+        self._lock = threading.Lock()
+
+    def apply_chunk(self, index: int, handler: Callable[[], Dict[str, Any]]) -> Tuple[Dict[str, Any], bool]:
+        """Run `handler` the first time a chunk arrives; returns (result, replayed).
+
+        A chunk that was already applied gets the summary of its result back
+        without running again, however long ago its Idempotency-Key expired.
+        Only summaries are kept, so `size` (in bytes) tracks what the session
+        holds.
+        """
+        with self._lock:
+            if index in self.chunks:
+                return self.chunks[index], True
+            if index in self._pending:
+                raise IdempotencyError(409, "This chunk is still being processed")
+            self._pending.add(index)
+        try:
+            result = handler()
+        except BaseException:
+            with self._lock:
+                self._pending.discard(index)
+            raise
+        summary = summarize(result)
+        with self._lock:
+            self.chunks[index] = summary
+            self.size += size_of(summary)
+            self._pending.discard(index)
+        return result, False
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            received = sorted(self.chunks)
+            missing: List[int] = []
+            if self.total_chunks is not None:
+                missing = [i for i in range(self.total_chunks) if i not in self.chunks]
+            return {
+                "upload_id": self.id,
+                "kind": self.kind,
+                "total_chunks": self.total_chunks,
+                "chunks_received": received,
+                "missing_chunks": missing,
+                "created_count": sum(c["created_count"] for c in self.chunks.values()),
+                "error_count": sum(c["error_count"] for c in self.chunks.values()),
+                "complete": self.total_chunks is not None and not missing
+            }
@@ -0,0 +1,165 @@
+"""Load test harness for the Enhanced University API.
+
+Seeds a synthetic dataset, then drives a weighted mix of endpoints from a
+pool of concurrent clients and reports p50/p95/p99 latency per endpoint.
+
+    python load_test.py                          # in-process via TestClient
+    python load_test.py --students 50000 --requests 20000 --concurrency 32
+    python load_test.py --url http://localhost:8000   # against a running uvicorn
+    python load_test.py --scenario contention    # oversubscription check
+"""
+import argparse
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Tuple
+
+import httpx
+
+
+def make_client(url: str = None):
+    if url:
+        return httpx.Client(base_url=url, timeout=30.0)
+    from fastapi.testclient import TestClient
+    from main import app
+    return TestClient(app)
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class LatencyRecorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def record(self, name: str, seconds: float, ok: bool) -> None:
+        with self._lock:
+            self.samples[name].append(seconds * 1000)
+            if not ok:
+                self.errors[name] += 1
+
+    def report(self, wall_seconds: float) -> str:
+        lines = [f"{'endpoint':<42}{'count':>8}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"]
+        total = 0
+        for name in sorted(self.samples):
+            values = sorted(self.samples[name])
+            total += len(values)
+            lines.append(
+                f"{name:<42}{len(values):>8}{self.errors[name]:>8}"
+                f"{percentile(values, 50):>10.2f}{percentile(values, 95):>10.2f}{percentile(values, 99):>10.2f}"
+            )
+        lines.append(f"\n{total} requests in {wall_seconds:.2f}s ({total / wall_seconds:.0f} req/s)")
+        return "\n".join(lines)
+
+
+def build_operations(client, rng: random.Random) -> List[Tuple[str, int, Callable]]:
+    """Weighted (name, weight, call) list drawn from the seeded dataset"""
+    students = client.get("/students", params={"limit": 100}).json()["students"]
+    courses = client.get("/courses", params={"limit": 100}).json()["courses"]
+    student_ids = [s["id"] for s in students]
+    course_ids = [c["id"] for c in courses]
+    names = [s["name"].split()[0] for s in students]
+
+    return [
+        ("GET /students", 20, lambda: client.get("/students", params={"page": rng.randint(1, 5), "limit": 20})),
+        ("GET /students?major", 10, lambda: client.get("/students", params={"major": "Computer Science", "year": rng.randint(1, 4)})),
+        ("GET /students/{id}", 20, lambda: client.get(f"/students/{rng.choice(student_ids)}")),
+        ("GET /courses", 10, lambda: client.get("/courses", params={"department": "Mathematics"})),
+        ("GET /professors", 5, lambda: client.get("/professors")),
+        ("GET /search/students", 10, lambda: client.get("/search/students", params={"q": rng.choice(names)})),
+        ("GET /students/{id}/eligible-courses", 5, lambda: client.get(f"/students/{rng.choice(student_ids)}/eligible-courses")),
+        ("GET /reports/transcript/{id}", 5, lambda: client.get(f"/reports/transcript/{rng.choice(student_ids)}")),
+        ("POST /enrollments", 10, lambda: client.post("/enrollments", json={
+            "student_id": rng.choice(student_ids), "course_id": rng.choice(course_ids)})),
+        ("GET /analytics/courses/enrollment-stats", 2, lambda: client.get("/analytics/courses/enrollment-stats")),
+        ("GET /analytics/departments/performance", 2, lambda: client.get("/analytics/departments/performance")),
+        ("GET /health", 1, lambda: client.get("/health")),
+    ]
+
+
+def run_mix(client, requests: int, concurrency: int, seed: int) -> LatencyRecorder:
+    rng = random.Random(seed)
+    operations = build_operations(client, rng)
+    plan = rng.choices(operations, weights=[op[1] for op in operations], k=requests)
+    recorder = LatencyRecorder()
+
+    def execute(op):
+        name, _, call = op
+        start = time.perf_counter()
+        response = call()
+        # 409s from POST /enrollments are expected business-rule rejections
+        recorder.record(name, time.perf_counter() - start, response.status_code < 500)
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(execute, plan))
+    return recorder
+
+
+def run_contention(client, clients: int, capacity: int) -> None:
+    """Many concurrent clients race for the last seats of one course"""
+    course = client.post("/courses", json={
+        "course_code": "LOAD999-001", "name": "Load Test Seminar", "department": "Engineering",
+        "credits": 1, "capacity": capacity, "prerequisites": []
+    })
+    if course.status_code != 201:
+        raise SystemExit(f"Could not create contention course: {course.text}")
+    course_id = course.json()["id"]
+    student_ids: List[str] = []
+    cursor = None
+    while len(student_ids) < clients:
+        params = {"limit": 100, "cursor": cursor} if cursor else {"limit": 100}
+        page = client.get("/students", params=params).json()
+        student_ids += [s["id"] for s in page["students"]]
+        cursor = page["pagination"]["next_cursor"]
+        if not cursor:
+            break
+    student_ids = student_ids[:clients]
+
+    with ThreadPoolExecutor(min(64, clients)) as pool:
+        codes = list(pool.map(
+            lambda sid: client.post("/enrollments", json={"student_id": sid, "course_id": course_id}).status_code,
+            student_ids
+        ))
+    enrolled = client.get(f"/courses/{course_id}").json()["current_enrollment"]
+    accepted = codes.count(201)
+    print(f"{clients} clients raced for {capacity} seats: {accepted} accepted, "
+          f"{codes.count(409)} rejected, course reports {enrolled} enrolled")
+    if accepted > capacity or enrolled != accepted:
+        raise SystemExit("FAIL: course was oversubscribed")
+    print("OK: no oversubscription")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Base URL of a running server (default: in-process TestClient)")
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--scenario", choices=["mix", "contention"], default="mix")
+    args = parser.parse_args()
+
+    client = make_client(args.url)
+    start = time.perf_counter()
+    seed_summary = client.post("/admin/seed-synthetic", params={"students": args.students, "seed": args.seed}).json()
+    print(f"Seeded {seed_summary} in {time.perf_counter() - start:.2f}s\n")
+
+    if args.scenario == "contention":
+        run_contention(client, clients=min(args.students, 500), capacity=25)
+        return
+
+    start = time.perf_counter()
+    recorder = run_mix(client, args.requests, args.concurrency, args.seed)
+    print(recorder.report(time.perf_counter() - start))
+
+
+if __name__ == "__main__":
+    main()
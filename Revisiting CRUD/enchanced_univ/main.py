@@ -1,12 +1,25 @@
-from fastapi import FastAPI, HTTPException, Query, status, Depends
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel, Field, EmailStr, field_validator
-from typing import Optional, List, Dict, Any
+from fastapi import FastAPI, HTTPException, Header, Query, Request, Response, WebSocket, WebSocketDisconnect, status, Depends
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel, Field, EmailStr, TypeAdapter, ValidationError, field_validator
+from typing import Optional, List, Dict, Any, Tuple
 from datetime import datetime, date
 from enum import Enum
 import uuid
+import os
 import re
+import json
 from collections import defaultdict
+from prerequisites import PrerequisiteGraph, PrerequisiteCycleError
+from search_index import SearchIndex
+from filter_index import FilterIndex
+from data_generator import generate_dataset
+from reports import ReportJobManager, REPORT_KINDS, REPORT_FORMATS, MEDIA_TYPES, build_transcript, build_roster, snapshot
+from events import EventBroker, course_topic, department_topic
+from idempotency import IdempotencyStore, IdempotencyError, TTLCache, UploadSession, fingerprint
+from transactions import LockManager, student_key, course_key, professor_key, email_key, course_code_key
+from sharded_store import CAPACITY_EXCEEDED, LocalStore, ShardedStore, ShardOperationError
+from rules import exceeds_credit_limit, is_on_probation, is_passing
 
 app = FastAPI(
     title="Enhanced University Course Management System",
@@ -41,6 +54,8 @@ class DepartmentEnum(str, Enum):
 
 # ============= PYDANTIC MODELS =============
 
+COURSE_CODE_PATTERN = re.compile(r'^[A-Z]{2,4}\d{3}-\d{3}$')
+
 class StudentModel(BaseModel):
     name: str = Field(..., min_length=2, max_length=100, description="Student full name")
     email: EmailStr = Field(..., description="Student email address")
@@ -64,8 +79,7 @@ class CourseModel(BaseModel):
     
     @field_validator('course_code')
     def validate_course_code(cls, v):
-        pattern = r'^[A-Z]{2,4}\d{3}-\d{3}$'
-        if not re.match(pattern, v):
+        if not COURSE_CODE_PATTERN.match(v):
             raise ValueError('Course code must follow format DEPT###-### (e.g., CS101-001)')
         return v.upper()
 
@@ -110,6 +124,7 @@ class PaginationResponse(BaseModel):
     total_pages: int
     has_next: bool
     has_prev: bool
+    next_cursor: Optional[str] = None
 
 class StudentResponse(StudentModel):
     id: str
@@ -133,6 +148,10 @@ class EnrollmentResponse(EnrollmentModel):
     course_name: str
     credits: int
 
+# Whole-batch validators for the bulk endpoints (one pydantic-core call per request)
+student_batch_adapter = TypeAdapter(List[StudentModel])
+enrollment_batch_adapter = TypeAdapter(List[EnrollmentModel])
+
 # ============= IN-MEMORY STORAGE =============
 
 students_db: Dict[str, Dict] = {}
@@ -141,6 +160,191 @@ professors_db: Dict[str, Dict] = {}
 enrollments_db: Dict[str, Dict] = {}
 emails_registry: set = set()
 
+# Every enrollment rule (duplicates, capacity, credit limit, prerequisites,
+# GPA) is checked by the enrollment store, which also keeps the seat counts
+# on the course records above. It runs in-process by default, or sharded by
+# student over UNIVERSITY_SHARDS worker processes; the dicts here are the
+# read model the endpoints query.
+ENROLLMENT_SHARDS = int(os.getenv("UNIVERSITY_SHARDS", "0"))
+enrollment_store = (
+    ShardedStore(ENROLLMENT_SHARDS, courses=courses_db) if ENROLLMENT_SHARDS else LocalStore(courses=courses_db)
+)
+
+# ============= INDEXES =============
+
+student_enrollments: Dict[str, set] = defaultdict(set)   # student_id -> enrollment ids
+course_enrollments: Dict[str, set] = defaultdict(set)    # course_id -> enrollment ids
+enrollment_pairs: Dict[tuple, str] = {}                  # (student_id, course_id) -> enrollment id
+prerequisite_graph = PrerequisiteGraph()                 # course_code -> prerequisite codes
+completed_course_bits: Dict[str, int] = {}               # student_id -> bitset of passed course codes
+student_search_index = SearchIndex(("name", "email", "major"))
+course_search_index = SearchIndex(("name", "course_code", "department"))
+professor_courses: Dict[str, set] = defaultdict(set)     # professor_id -> assigned course ids
+course_codes: Dict[str, str] = {}                        # course_code -> course id
+
+student_filters = FilterIndex({
+    "major": lambda s: s['major'],
+    "year": lambda s: s['year'],
+    "on_probation": lambda s: s['is_on_probation']
+})
+course_filters = FilterIndex({
+    "department": lambda c: c['department'],
+    "credits": lambda c: c['credits']
+})
+professor_filters = FilterIndex({
+    "department": lambda p: p['department'],
+    "hire_year": lambda p: p['hire_date'].year
+})
+
+def index_enrollment(enrollment_data: Dict) -> None:
+    """Register an enrollment in the adjacency indexes"""
+    enrollment_id = enrollment_data['id']
+    student_enrollments[enrollment_data['student_id']].add(enrollment_id)
+    course_enrollments[enrollment_data['course_id']].add(enrollment_id)
+    enrollment_pairs[(enrollment_data['student_id'], enrollment_data['course_id'])] = enrollment_id
+
+def unindex_enrollment(enrollment_data: Dict) -> None:
+    """Remove an enrollment from the adjacency indexes"""
+    enrollment_id = enrollment_data['id']
+    student_enrollments[enrollment_data['student_id']].discard(enrollment_id)
+    course_enrollments[enrollment_data['course_id']].discard(enrollment_id)
+    enrollment_pairs.pop((enrollment_data['student_id'], enrollment_data['course_id']), None)
+
+def remove_enrollment(enrollment_id: str) -> Dict:
+    """Delete an enrollment from the read model and unindex it (the enrollment store frees the seat)"""
+    enrollment_data = enrollments_db.pop(enrollment_id)
+    unindex_enrollment(enrollment_data)
+    if enrollment_data['course_id'] in courses_db:
+        publish_enrollment("enrollment.deleted", enrollment_data)
+        publish_capacity(enrollment_data['course_id'])
+    return enrollment_data
+
+def apply_enrollment(enrollment_data: Dict) -> None:
+    """Add an enrollment the store accepted to the read model"""
+    enrollments_db[enrollment_data['id']] = enrollment_data
+    index_enrollment(enrollment_data)
+    completed_course_bits.pop(enrollment_data['student_id'], None)
+    publish_enrollment("enrollment.created", enrollment_data)
+
+def student_links(student_id: str) -> set:
+    """Lock keys of the courses a student is enrolled in"""
+    return {
+        course_key(enrollment['course_id'])
+        for enrollment_id in tuple(student_enrollments.get(student_id, ()))
+        if (enrollment := enrollments_db.get(enrollment_id))
+    }
+
+def course_links(course_id: str) -> set:
+    """Lock keys of the students enrolled in a course and its professor"""
+    keys = {
+        student_key(enrollment['student_id'])
+        for enrollment_id in tuple(course_enrollments.get(course_id, ()))
+        if (enrollment := enrollments_db.get(enrollment_id))
+    }
+    professor_id = courses_db.get(course_id, {}).get('professor_id')
+    if professor_id:
+        keys.add(professor_key(professor_id))
+    return keys
+
+def clear_indexes() -> None:
+    """Reset all indexes (used when the stores are wiped)"""
+    student_enrollments.clear()
+    course_enrollments.clear()
+    enrollment_pairs.clear()
+    prerequisite_graph.clear()
+    completed_course_bits.clear()
+    student_search_index.clear()
+    course_search_index.clear()
+    professor_courses.clear()
+    course_codes.clear()
+    student_filters.clear()
+    course_filters.clear()
+    professor_filters.clear()
+
+def index_student(student_id: str) -> None:
+    """Refresh a student's search and filter index entries after a write"""
+    student_search_index.add(student_id, students_db[student_id])
+    student_filters.add(student_id, students_db[student_id])
+
+def index_course(course_id: str) -> None:
+    """Refresh a course's search and filter index entries after a write"""
+    course_search_index.add(course_id, courses_db[course_id])
+    course_filters.add(course_id, courses_db[course_id])
+
+# ============= TRANSACTIONS =============
+
+# Write handlers are plain `def` so FastAPI runs them in its threadpool. Every
+# read-check-write sequence holds the locks of the entities it touches, e.g. a
+# course's capacity check and its enrollment counter increment.
+locks = LockManager()
+
+# Store records were validated on the way in. Returning a Response makes
+# FastAPI skip its response_model pass, which would validate every field of
+# every record again (EmailStr included); response_model stays on the routes
+# for the OpenAPI schema. pydantic-core serializes the constructed models.
+response_serializer = TypeAdapter(Any)
+
+def stored_json(content: Any, status_code: int = status.HTTP_200_OK) -> Response:
+    """Serialize models built with model_construct without validating them again"""
+    return Response(response_serializer.dump_json(content), status_code=status_code, media_type="application/json")
+
+def paginate(total: int, page: int, limit: int, next_cursor: Optional[int], has_prev: bool) -> PaginationResponse:
+    """Build pagination metadata for a page read from a FilterIndex"""
+    return PaginationResponse(
+        page=page,
+        limit=limit,
+        total=total,
+        total_pages=(total + limit - 1) // limit,
+        has_next=next_cursor is not None,
+        has_prev=has_prev,
+        next_cursor=str(next_cursor) if next_cursor is not None else None
+    )
+
+def parse_cursor(cursor: Optional[str]) -> Optional[int]:
+    if cursor is None:
+        return None
+    if not cursor.isdigit():
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+    return int(cursor)
+
+# ============= CHANGE FEED =============
+
+# Write handlers publish enrollment, grade and seat-count changes here;
+# SSE and WebSocket clients subscribe per course or per department.
+event_broker = EventBroker()
+
+def course_topics(course: Dict) -> List[str]:
+    return [course_topic(course['id']), department_topic(course['department'])]
+
+def capacity_payload(course: Dict) -> Dict[str, Any]:
+    return {
+        "course_id": course['id'],
+        "course_code": course['course_code'],
+        "capacity": course['capacity'],
+        "current_enrollment": course['current_enrollment'],
+        "available_spots": course['capacity'] - course['current_enrollment']
+    }
+
+def publish_capacity(course_id: str) -> None:
+    """Publish a course's seat count (coalesced: clients only see the latest)"""
+    course = courses_db.get(course_id)
+    if course:
+        event_broker.publish("course.capacity", course_topics(course), capacity_payload(course),
+                             key=("capacity", course_id))
+
+def publish_enrollment(event_type: str, enrollment_data: Dict) -> None:
+    course = courses_db.get(enrollment_data['course_id'])
+    if not course:
+        return
+    grade = enrollment_data.get('grade')
+    key = ("grade", enrollment_data['id']) if event_type == "enrollment.graded" else None
+    event_broker.publish(event_type, course_topics(course), {
+        "enrollment_id": enrollment_data['id'],
+        "student_id": enrollment_data['student_id'],
+        "course_id": enrollment_data['course_id'],
+        "grade": grade.value if isinstance(grade, Enum) else grade
+    }, key=key)
+
 # ============= UTILITY FUNCTIONS =============
 
 def generate_id(prefix: str) -> str:
@@ -149,56 +353,152 @@ def generate_id(prefix: str) -> str:
 
 def validate_unique_email(email: str, exclude_id: str = None) -> bool:
     """Check if email is unique across all entities"""
-    for db in [students_db, professors_db]:
-        for entity_id, entity in db.items():
-            if entity_id != exclude_id and entity.get('email') == email:
-                return False
-    return True
-
-def calculate_gpa(student_id: str) -> float:
-    """Calculate student GPA based on completed courses"""
-    grade_points = {'A': 4.0, 'B': 3.0, 'C': 2.0, 'D': 1.0, 'F': 0.0}
-    total_points = 0
-    total_credits = 0
-    
-    for enrollment in enrollments_db.values():
-        if enrollment['student_id'] == student_id and enrollment.get('grade'):
-            course = courses_db.get(enrollment['course_id'])
-            if course:
-                total_points += grade_points[enrollment['grade']] * course['credits']
-                total_credits += course['credits']
-    
-    return total_points / total_credits if total_credits > 0 else 0.0
+    if exclude_id:
+        current = students_db.get(exclude_id) or professors_db.get(exclude_id)
+        if current and current.get('email') == email:
+            return True
+    return email not in emails_registry
+
+def store_student(student_data: Dict) -> Dict:
+    """The part of a student record the enrollment store keeps"""
+    return {'id': student_data['id'], 'gpa': student_data['gpa'], 'is_on_probation': student_data['is_on_probation']}
+
+def set_student_gpa(student_id: str, new_gpa: float) -> None:
+    """Apply a GPA computed by the enrollment store to the read model"""
+    student = students_db.get(student_id)
+    if student is None:
+        return
+    student['gpa'] = new_gpa
+    student['is_on_probation'] = is_on_probation(new_gpa)
+    student_filters.add(student_id, student)
+
+def store_error(error: ShardOperationError, course_id: Optional[str] = None) -> HTTPException:
+    """Turn an enrollment store rejection into the matching HTTP error"""
+    course = courses_db.get(course_id) if course_id else None
+    if error.code == CAPACITY_EXCEEDED and course:
+        return HTTPException(
+            status_code=error.status,
+            detail=error.detail,
+            headers={
+                "X-Error-Code": CAPACITY_EXCEEDED,
+                "X-Available-Capacity": "0",
+                "X-Current-Enrollment": str(course['current_enrollment']),
+                "X-Max-Capacity": str(course['capacity'])
+            }
+        )
+    return HTTPException(status_code=error.status, detail=error.detail)
 
 def get_student_credit_hours(student_id: str) -> int:
     """Get current semester credit hours for student"""
     total_credits = 0
-    for enrollment in enrollments_db.values():
-        if enrollment['student_id'] == student_id:
-            course = courses_db.get(enrollment['course_id'])
-            if course:
-                total_credits += course['credits']
+    for enrollment_id in tuple(student_enrollments.get(student_id, ())):
+        course = courses_db.get(enrollments_db[enrollment_id]['course_id'])
+        if course:
+            total_credits += course['credits']
     return total_credits
 
 def get_professor_teaching_load(professor_id: str) -> int:
     """Get current number of courses taught by professor"""
-    return len([c for c in courses_db.values() if c.get('professor_id') == professor_id])
-
-def check_prerequisites(student_id: str, course_id: str) -> bool:
-    """Check if student has completed all prerequisites for a course"""
-    course = courses_db.get(course_id)
-    if not course or not course.get('prerequisites'):
-        return True
-    
-    completed_courses = []
-    for enrollment in enrollments_db.values():
-        if (enrollment['student_id'] == student_id and 
-            enrollment.get('grade') and enrollment['grade'] != 'F'):
+    return len(professor_courses.get(professor_id, ()))
+
+def get_completed_bits(student_id: str) -> int:
+    """Cached bitset of the course codes a student has passed"""
+    bits = completed_course_bits.get(student_id)
+    if bits is None:
+        bits = prerequisite_graph.mask(get_completed_course_codes(student_id))
+        completed_course_bits[student_id] = bits
+    return bits
+
+def register_course_prerequisites(course_code: str, prerequisites: List[str]) -> None:
+    """Add a course to the prerequisite graph, turning cycles into a 409"""
+    try:
+        prerequisite_graph.set_course(course_code, prerequisites)
+    except PrerequisiteCycleError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+def cascade_delete_student(student_id: str) -> int:
+    """Delete a student and their k enrollments, returning k"""
+    with locks.hold_linked(student_key(student_id), lambda: student_links(student_id)):
+        if student_id not in students_db:
+            raise HTTPException(status_code=404, detail="Student not found")
+        
+        # The store drops the student's enrollments and frees their seats
+        try:
+            enrollment_store.delete_student(student_id)
+        except ShardOperationError as e:
+            if e.status != 404:
+                raise store_error(e)
+        enrollment_ids = tuple(student_enrollments.get(student_id, ()))
+        for enrollment_id in enrollment_ids:
+            remove_enrollment(enrollment_id)
+        student_enrollments.pop(student_id, None)
+        completed_course_bits.pop(student_id, None)
+        
+        # Remove email from registry
+        emails_registry.discard(students_db[student_id]['email'])
+        student_search_index.remove(student_id)
+        student_filters.remove(student_id)
+        del students_db[student_id]
+    return len(enrollment_ids)
+
+def cascade_delete_course(course_id: str) -> int:
+    """Delete a course and its k enrollments, returning k"""
+    with locks.hold_linked(course_key(course_id), lambda: course_links(course_id)):
+        if course_id not in courses_db:
+            raise HTTPException(status_code=404, detail="Course not found")
+        
+        enrollment_ids = tuple(course_enrollments.get(course_id, ()))
+        for enrollment_id in enrollment_ids:
+            enrollment = remove_enrollment(enrollment_id)
+            completed_course_bits.pop(enrollment['student_id'], None)
+        course_enrollments.pop(course_id, None)
+        
+        course = courses_db[course_id]
+        event_broker.publish("course.deleted", course_topics(course), {"course_id": course_id},
+                             key=("capacity", course_id))
+        prerequisite_graph.remove_course(course['course_code'])
+        course_codes.pop(course['course_code'], None)
+        course_search_index.remove(course_id)
+        course_filters.remove(course_id)
+        if course.get('professor_id'):
+            professor_courses[course['professor_id']].discard(course_id)
+        
+        # Removes the course record too. The deleted course no longer counts
+        # towards anyone's GPA; students left with no graded enrollments keep
+        # their last GPA rather than dropping to 0.0 and onto probation.
+        for student_id, new_gpa in enrollment_store.remove_course(course_id).items():
+            set_student_gpa(student_id, new_gpa)
+    return len(enrollment_ids)
+
+def get_completed_course_codes(student_id: str) -> set:
+    """Course codes the student has passed (graded and not F)"""
+    completed_courses = set()
+    for enrollment_id in tuple(student_enrollments.get(student_id, ())):
+        enrollment = enrollments_db[enrollment_id]
+        if is_passing(enrollment.get('grade')):
             course_code = courses_db.get(enrollment['course_id'], {}).get('course_code')
             if course_code:
-                completed_courses.append(course_code)
-    
-    return all(prereq in completed_courses for prereq in course['prerequisites'])
+                completed_courses.add(course_code)
+    return completed_courses
+
+def validate_batch(adapter: TypeAdapter, rows: List[Dict[str, Any]]) -> Tuple[List[Tuple[int, Any]], List[Dict[str, Any]]]:
+    """Validate a whole batch at once, returning ([(index, model)], errors).
+
+    The common all-valid case is a single validation call. When some rows
+    are invalid they are reported by index and only the valid rows are
+    validated again.
+    """
+    try:
+        return list(enumerate(adapter.validate_python(rows))), []
+    except ValidationError as e:
+        invalid = defaultdict(list)
+        for error in e.errors():
+            field = ".".join(str(part) for part in error['loc'][1:])
+            invalid[error['loc'][0]].append(f"{field}: {error['msg']}" if field else error['msg'])
+        valid_indexes = [i for i in range(len(rows)) if i not in invalid]
+        models = adapter.validate_python([rows[i] for i in valid_indexes])
+        errors = [{"index": i, "error": "; ".join(messages)} for i, messages in sorted(invalid.items())]
+        return list(zip(valid_indexes, models)), errors
 
 # ============= EXCEPTION HANDLERS =============
 
@@ -206,35 +506,39 @@ def check_prerequisites(student_id: str, course_id: str) -> bool:
 async def http_exception_handler(request, exc):
     return JSONResponse(
         status_code=exc.status_code,
-        content=ErrorResponse(
+        content=jsonable_encoder(ErrorResponse(
             detail=exc.detail,
             error_code="HTTP_ERROR"
-        ).dict()
+        )),
+        headers=getattr(exc, "headers", None)
     )
 
 # ============= STUDENT ENDPOINTS =============
 
 @app.post("/students", status_code=status.HTTP_201_CREATED, response_model=StudentResponse)
-async def create_student(student: StudentModel):
+def create_student(student: StudentModel):
     """Create a new student"""
-    if not validate_unique_email(student.email):
-        raise HTTPException(
-            status_code=409,
-            detail="Email address already exists in the system"
-        )
-    
-    student_id = generate_id("STU")
-    student_data = student.dict()
-    student_data.update({
-        'id': student_id,
-        'created_at': datetime.utcnow(),
-        'is_on_probation': student.gpa < 2.0
-    })
-    
-    students_db[student_id] = student_data
-    emails_registry.add(student.email)
+    with locks.hold([email_key(student.email)]):
+        if not validate_unique_email(student.email):
+            raise HTTPException(
+                status_code=409,
+                detail="Email address already exists in the system"
+            )
+        
+        student_id = generate_id("STU")
+        student_data = student.model_dump()
+        student_data.update({
+            'id': student_id,
+            'created_at': datetime.utcnow(),
+            'is_on_probation': is_on_probation(student.gpa)
+        })
+        
+        enrollment_store.add_students([store_student(student_data)])
+        students_db[student_id] = student_data
+        emails_registry.add(student.email)
+        index_student(student_id)
     
-    return StudentResponse(**student_data)
+    return stored_json(StudentResponse.model_construct(**student_data), status.HTTP_201_CREATED)
 
 @app.get("/students", response_model=Dict[str, Any])
 async def get_students(
@@ -242,36 +546,19 @@ async def get_students(
     limit: int = Query(10, ge=1, le=100, description="Items per page"),
     major: Optional[MajorEnum] = Query(None, description="Filter by major"),
     year: Optional[int] = Query(None, ge=1, le=4, description="Filter by year"),
-    on_probation: Optional[bool] = Query(None, description="Filter by probation status")
+    on_probation: Optional[bool] = Query(None, description="Filter by probation status"),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous page (overrides page)")
 ):
     """Get students with pagination and filtering"""
-    filtered_students = []
-    
-    for student in students_db.values():
-        if major and student['major'] != major:
-            continue
-        if year and student['year'] != year:
-            continue
-        if on_probation is not None and student['is_on_probation'] != on_probation:
-            continue
-        filtered_students.append(StudentResponse(**student))
-    
-    total = len(filtered_students)
-    start = (page - 1) * limit
-    end = start + limit
-    students_page = filtered_students[start:end]
+    total, page_ids, next_cursor, has_prev = student_filters.query(
+        {"major": major, "year": year, "on_probation": on_probation},
+        offset=(page - 1) * limit, limit=limit, cursor=parse_cursor(cursor)
+    )
     
-    return {
-        "students": students_page,
-        "pagination": PaginationResponse(
-            page=page,
-            limit=limit,
-            total=total,
-            total_pages=(total + limit - 1) // limit,
-            has_next=end < total,
-            has_prev=page > 1
-        )
-    }
+    return stored_json({
+        "students": [StudentResponse.model_construct(**students_db[sid]) for sid in page_ids],
+        "pagination": paginate(total, page, limit, next_cursor, has_prev)
+    })
 
 @app.get("/students/{student_id}", response_model=StudentResponse)
 async def get_student(student_id: str):
@@ -279,110 +566,156 @@ async def get_student(student_id: str):
     if student_id not in students_db:
         raise HTTPException(status_code=404, detail="Student not found")
     
-    return StudentResponse(**students_db[student_id])
+    return stored_json(StudentResponse.model_construct(**students_db[student_id]))
 
-@app.put("/students/{student_id}", response_model=StudentResponse)
-async def update_student(student_id: str, student: StudentModel):
-    """Update a student"""
+@app.get("/students/{student_id}/eligible-courses")
+async def get_eligible_courses(student_id: str):
+    """List courses whose prerequisites the student has completed and is not yet enrolled in"""
     if student_id not in students_db:
         raise HTTPException(status_code=404, detail="Student not found")
     
-    if not validate_unique_email(student.email, student_id):
-        raise HTTPException(
-            status_code=409,
-            detail="Email address already exists in the system"
-        )
-    
-    # Remove old email and add new one
-    old_email = students_db[student_id]['email']
-    emails_registry.discard(old_email)
-    emails_registry.add(student.email)
-    
-    student_data = student.dict()
-    student_data.update({
-        'id': student_id,
-        'created_at': students_db[student_id]['created_at'],
-        'is_on_probation': student.gpa < 2.0
-    })
+    completed = get_completed_bits(student_id)
+    eligible = [
+        {
+            "course_id": course['id'],
+            "course_code": course['course_code'],
+            "name": course['name'],
+            "credits": course['credits'],
+            "available_spots": course['capacity'] - course['current_enrollment']
+        }
+        for course in list(courses_db.values())
+        if (student_id, course['id']) not in enrollment_pairs
+        and prerequisite_graph.is_satisfied(course['course_code'], completed)
+    ]
     
-    students_db[student_id] = student_data
-    return StudentResponse(**student_data)
+    return {
+        "student_id": student_id,
+        "completed_courses": prerequisite_graph.codes(completed),
+        "total_eligible": len(eligible),
+        "eligible_courses": eligible
+    }
 
-@app.delete("/students/{student_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_student(student_id: str):
-    """Delete a student"""
+@app.get("/students/{student_id}/eligibility/{course_id}")
+async def get_course_eligibility(student_id: str, course_id: str):
+    """Explain what, if anything, blocks a student from enrolling in a course"""
     if student_id not in students_db:
         raise HTTPException(status_code=404, detail="Student not found")
+    if course_id not in courses_db:
+        raise HTTPException(status_code=404, detail="Course not found")
     
-    # Remove all enrollments for this student
-    enrollments_to_remove = [
-        eid for eid, enrollment in enrollments_db.items() 
-        if enrollment['student_id'] == student_id
-    ]
-    for eid in enrollments_to_remove:
-        del enrollments_db[eid]
+    course = courses_db[course_id]
+    completed = get_completed_bits(student_id)
+    missing = prerequisite_graph.missing(course['course_code'], completed)
+    
+    blockers = []
+    if (student_id, course_id) in enrollment_pairs:
+        blockers.append("Student is already enrolled in this course")
+    if missing:
+        blockers.append("Prerequisites not met")
+    if course['current_enrollment'] >= course['capacity']:
+        blockers.append("Course has reached maximum capacity")
+    current_credits = get_student_credit_hours(student_id)
+    if exceeds_credit_limit(current_credits, course['credits']):
+        blockers.append(f"Would exceed 18 credit limit (current: {current_credits})")
+    
+    return {
+        "student_id": student_id,
+        "course_id": course_id,
+        "course_code": course['course_code'],
+        "eligible": not blockers,
+        "blockers": blockers,
+        "missing_prerequisites": missing,
+        "missing_prerequisite_chain": prerequisite_graph.missing_transitive(course['course_code'], completed)
+    }
+
+@app.put("/students/{student_id}", response_model=StudentResponse)
+def update_student(student_id: str, student: StudentModel):
+    """Update a student"""
+    def linked() -> set:
+        # The current email is read again once the locks are held
+        old_email = students_db.get(student_id, {}).get('email')
+        return {email_key(student.email), email_key(old_email)}
+    
+    with locks.hold_linked(student_key(student_id), linked):
+        if student_id not in students_db:
+            raise HTTPException(status_code=404, detail="Student not found")
+        
+        if not validate_unique_email(student.email, student_id):
+            raise HTTPException(
+                status_code=409,
+                detail="Email address already exists in the system"
+            )
+        
+        # Remove old email and add new one
+        emails_registry.discard(students_db[student_id]['email'])
+        emails_registry.add(student.email)
+        
+        student_data = student.model_dump()
+        student_data.update({
+            'id': student_id,
+            'created_at': students_db[student_id]['created_at'],
+            'is_on_probation': is_on_probation(student.gpa)
+        })
+        
+        enrollment_store.add_students([store_student(student_data)])
+        students_db[student_id] = student_data
+        index_student(student_id)
     
-    # Remove email from registry
-    emails_registry.discard(students_db[student_id]['email'])
-    del students_db[student_id]
+    return stored_json(StudentResponse.model_construct(**student_data))
+
+@app.delete("/students/{student_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_student(student_id: str):
+    """Delete a student and cascade to their enrollments"""
+    cascade_delete_student(student_id)
 
 # ============= COURSE ENDPOINTS =============
 
 @app.post("/courses", status_code=status.HTTP_201_CREATED, response_model=CourseResponse)
-async def create_course(course: CourseModel):
+def create_course(course: CourseModel):
     """Create a new course"""
-    # Check for duplicate course code
-    for existing_course in courses_db.values():
-        if existing_course['course_code'] == course.course_code:
+    with locks.hold([course_code_key(course.course_code)]):
+        # Check for duplicate course code
+        if course.course_code in course_codes:
             raise HTTPException(
                 status_code=409,
                 detail="Course code already exists"
             )
+        
+        register_course_prerequisites(course.course_code, course.prerequisites)
+        
+        course_id = generate_id("CRS")
+        course_data = course.model_dump()
+        course_data.update({
+            'id': course_id,
+            'current_enrollment': 0,
+            'created_at': datetime.utcnow()
+        })
+        
+        courses_db[course_id] = course_data
+        course_codes[course.course_code] = course_id
+        index_course(course_id)
+        publish_capacity(course_id)
     
-    course_id = generate_id("CRS")
-    course_data = course.dict()
-    course_data.update({
-        'id': course_id,
-        'current_enrollment': 0,
-        'created_at': datetime.utcnow()
-    })
-    
-    courses_db[course_id] = course_data
-    return CourseResponse(**course_data)
+    return stored_json(CourseResponse.model_construct(**course_data), status.HTTP_201_CREATED)
 
 @app.get("/courses", response_model=Dict[str, Any])
 async def get_courses(
     page: int = Query(1, ge=1),
     limit: int = Query(10, ge=1, le=100),
     department: Optional[DepartmentEnum] = Query(None),
-    credits: Optional[int] = Query(None, ge=1, le=6)
+    credits: Optional[int] = Query(None, ge=1, le=6),
+    cursor: Optional[str] = Query(None)
 ):
     """Get courses with pagination and filtering"""
-    filtered_courses = []
-    
-    for course in courses_db.values():
-        if department and course['department'] != department:
-            continue
-        if credits and course['credits'] != credits:
-            continue
-        filtered_courses.append(CourseResponse(**course))
-    
-    total = len(filtered_courses)
-    start = (page - 1) * limit
-    end = start + limit
-    courses_page = filtered_courses[start:end]
+    total, page_ids, next_cursor, has_prev = course_filters.query(
+        {"department": department, "credits": credits},
+        offset=(page - 1) * limit, limit=limit, cursor=parse_cursor(cursor)
+    )
     
-    return {
-        "courses": courses_page,
-        "pagination": PaginationResponse(
-            page=page,
-            limit=limit,
-            total=total,
-            total_pages=(total + limit - 1) // limit,
-            has_next=end < total,
-            has_prev=page > 1
-        )
-    }
+    return stored_json({
+        "courses": [CourseResponse.model_construct(**courses_db[cid]) for cid in page_ids],
+        "pagination": paginate(total, page, limit, next_cursor, has_prev)
+    })
 
 @app.get("/courses/{course_id}", response_model=CourseResponse)
 async def get_course(course_id: str):
@@ -390,114 +723,109 @@ async def get_course(course_id: str):
     if course_id not in courses_db:
         raise HTTPException(status_code=404, detail="Course not found")
     
-    return CourseResponse(**courses_db[course_id])
+    return stored_json(CourseResponse.model_construct(**courses_db[course_id]))
 
 @app.put("/courses/{course_id}", response_model=CourseResponse)
-async def update_course(course_id: str, course: CourseModel):
+def update_course(course_id: str, course: CourseModel):
     """Update a course"""
-    if course_id not in courses_db:
-        raise HTTPException(status_code=404, detail="Course not found")
-    
-    # Check for duplicate course code (excluding current course)
-    for existing_id, existing_course in courses_db.items():
-        if existing_id != course_id and existing_course['course_code'] == course.course_code:
+    def linked() -> set:
+        # A code or credit change regrades the enrolled students
+        old_code = courses_db.get(course_id, {}).get('course_code')
+        return course_links(course_id) | {course_code_key(course.course_code), course_code_key(old_code)}
+    
+    with locks.hold_linked(course_key(course_id), linked):
+        if course_id not in courses_db:
+            raise HTTPException(status_code=404, detail="Course not found")
+        
+        # Check for duplicate course code (excluding current course)
+        if course_codes.get(course.course_code, course_id) != course_id:
             raise HTTPException(
                 status_code=409,
                 detail="Course code already exists"
             )
+        
+        old_code = courses_db[course_id]['course_code']
+        old_prerequisites = courses_db[course_id].get('prerequisites', [])
+        prerequisite_graph.remove_course(old_code)
+        try:
+            register_course_prerequisites(course.course_code, course.prerequisites)
+        except HTTPException:
+            prerequisite_graph.set_course(old_code, old_prerequisites)
+            raise
+        if old_code != course.course_code:
+            # Completed-course bitsets are keyed by course code
+            completed_course_bits.clear()
+        
+        # Updated in place: the enrollment store keeps the seat count on this record
+        course_data = courses_db[course_id]
+        old_credits = course_data['credits']
+        course_data.update(course.model_dump())
+        if old_code != course.course_code or old_credits != course.credits:
+            for student_id, new_gpa in enrollment_store.update_course(course_id, course.course_code, course.credits).items():
+                set_student_gpa(student_id, new_gpa)
+        
+        course_codes.pop(old_code, None)
+        course_codes[course.course_code] = course_id
+        index_course(course_id)
+        publish_capacity(course_id)
     
-    course_data = course.dict()
-    course_data.update({
-        'id': course_id,
-        'current_enrollment': courses_db[course_id]['current_enrollment'],
-        'created_at': courses_db[course_id]['created_at'],
-        'professor_id': courses_db[course_id].get('professor_id')
-    })
-    
-    courses_db[course_id] = course_data
-    return CourseResponse(**course_data)
+    return stored_json(CourseResponse.model_construct(**course_data))
 
 @app.delete("/courses/{course_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_course(course_id: str):
-    """Delete a course"""
-    if course_id not in courses_db:
-        raise HTTPException(status_code=404, detail="Course not found")
-    
-    # Remove all enrollments for this course
-    enrollments_to_remove = [
-        eid for eid, enrollment in enrollments_db.items() 
-        if enrollment['course_id'] == course_id
-    ]
-    for eid in enrollments_to_remove:
-        del enrollments_db[eid]
-    
-    del courses_db[course_id]
+def delete_course(course_id: str):
+    """Delete a course and cascade to its enrollments"""
+    cascade_delete_course(course_id)
 
 # ============= PROFESSOR ENDPOINTS =============
 
 @app.post("/professors", status_code=status.HTTP_201_CREATED, response_model=ProfessorResponse)
-async def create_professor(professor: ProfessorModel):
+def create_professor(professor: ProfessorModel):
     """Create a new professor"""
-    if not validate_unique_email(professor.email):
-        raise HTTPException(
-            status_code=409,
-            detail="Email address already exists in the system"
-        )
-    
-    professor_id = generate_id("PRF")
-    professor_data = professor.dict()
-    professor_data.update({
-        'id': professor_id,
-        'current_courses': [],
-        'created_at': datetime.utcnow()
-    })
-    
-    professors_db[professor_id] = professor_data
-    emails_registry.add(professor.email)
+    with locks.hold([email_key(professor.email)]):
+        if not validate_unique_email(professor.email):
+            raise HTTPException(
+                status_code=409,
+                detail="Email address already exists in the system"
+            )
+        
+        professor_id = generate_id("PRF")
+        professor_data = professor.model_dump()
+        professor_data.update({
+            'id': professor_id,
+            'current_courses': [],
+            'created_at': datetime.utcnow()
+        })
+        
+        professors_db[professor_id] = professor_data
+        emails_registry.add(professor.email)
+        professor_filters.add(professor_id, professor_data)
     
-    return ProfessorResponse(**professor_data)
+    return stored_json(ProfessorResponse.model_construct(**professor_data), status.HTTP_201_CREATED)
 
 @app.get("/professors", response_model=Dict[str, Any])
 async def get_professors(
     page: int = Query(1, ge=1),
     limit: int = Query(10, ge=1, le=100),
     department: Optional[DepartmentEnum] = Query(None),
-    hire_year: Optional[int] = Query(None, ge=1950)
+    hire_year: Optional[int] = Query(None, ge=1950),
+    cursor: Optional[str] = Query(None)
 ):
     """Get professors with pagination and filtering"""
-    filtered_professors = []
-    
-    for professor in professors_db.values():
-        if department and professor['department'] != department:
-            continue
-        if hire_year and professor['hire_date'].year != hire_year:
-            continue
-        
-        # Update current courses
-        current_courses = [
-            c['id'] for c in courses_db.values() 
-            if c.get('professor_id') == professor['id']
-        ]
-        professor['current_courses'] = current_courses
-        
-        filtered_professors.append(ProfessorResponse(**professor))
+    total, page_ids, next_cursor, has_prev = professor_filters.query(
+        {"department": department, "hire_year": hire_year},
+        offset=(page - 1) * limit, limit=limit, cursor=parse_cursor(cursor)
+    )
     
-    total = len(filtered_professors)
-    start = (page - 1) * limit
-    end = start + limit
-    professors_page = filtered_professors[start:end]
+    professors_page = []
+    for pid in page_ids:
+        professor_data = professors_db[pid].copy()
+        professor_data['current_courses'] = sorted(professor_courses.get(pid, ()))
+        professors_page.append(ProfessorResponse.model_construct(**professor_data))
     
-    return {
+    return stored_json({
         "professors": professors_page,
-        "pagination": PaginationResponse(
-            page=page,
-            limit=limit,
-            total=total,
-            total_pages=(total + limit - 1) // limit,
-            has_next=end < total,
-            has_prev=page > 1
-        )
-    }
+        "pagination": paginate(total, page, limit, next_cursor, has_prev)
+    })
 
 @app.get("/professors/{professor_id}", response_model=ProfessorResponse)
 async def get_professor(professor_id: str):
@@ -506,79 +834,51 @@ async def get_professor(professor_id: str):
         raise HTTPException(status_code=404, detail="Professor not found")
     
     professor_data = professors_db[professor_id].copy()
-    current_courses = [
-        c['id'] for c in courses_db.values() 
-        if c.get('professor_id') == professor_id
-    ]
-    professor_data['current_courses'] = current_courses
+    professor_data['current_courses'] = sorted(professor_courses.get(professor_id, ()))
     
-    return ProfessorResponse(**professor_data)
+    return stored_json(ProfessorResponse.model_construct(**professor_data))
 
 # ============= ENROLLMENT ENDPOINTS =============
 
 @app.post("/enrollments", status_code=status.HTTP_201_CREATED)
-async def create_enrollment(enrollment: EnrollmentModel):
-    """Enroll a student in a course"""
-    # Validate student exists
-    if enrollment.student_id not in students_db:
-        raise HTTPException(status_code=404, detail="Student not found")
-    
-    # Validate course exists
-    if enrollment.course_id not in courses_db:
-        raise HTTPException(status_code=404, detail="Course not found")
-    
-    # Check for duplicate enrollment
-    for existing_enrollment in enrollments_db.values():
-        if (existing_enrollment['student_id'] == enrollment.student_id and
-            existing_enrollment['course_id'] == enrollment.course_id):
-            raise HTTPException(
-                status_code=409,
-                detail="Student is already enrolled in this course"
-            )
-    
-    course = courses_db[enrollment.course_id]
-    student = students_db[enrollment.student_id]
-    
-    # Check course capacity
-    if course['current_enrollment'] >= course['capacity']:
-        raise HTTPException(
-            status_code=409,
-            detail="Course has reached maximum capacity",
-            headers={
-                "X-Error-Code": "ENROLLMENT_CAPACITY_EXCEEDED",
-                "X-Available-Capacity": "0",
-                "X-Current-Enrollment": str(course['current_enrollment']),
-                "X-Max-Capacity": str(course['capacity'])
-            }
-        )
-    
-    # Check student credit limit (18 hours max)
-    current_credits = get_student_credit_hours(enrollment.student_id)
-    if current_credits + course['credits'] > 18:
-        raise HTTPException(
-            status_code=409,
-            detail=f"Enrollment would exceed 18 credit hour limit. Current: {current_credits}, Course: {course['credits']}"
-        )
-    
-    # Check prerequisites
-    if not check_prerequisites(enrollment.student_id, enrollment.course_id):
-        raise HTTPException(
-            status_code=409,
-            detail="Student has not completed required prerequisites"
-        )
-    
-    # Create enrollment
-    enrollment_id = generate_id("ENR")
-    enrollment_data = enrollment.dict()
-    enrollment_data.update({
-        'id': enrollment_id,
-        'student_name': student['name'],
-        'course_name': course['name'],
-        'credits': course['credits']
-    })
-    
-    enrollments_db[enrollment_id] = enrollment_data
-    courses_db[enrollment.course_id]['current_enrollment'] += 1
+def create_enrollment(enrollment: EnrollmentModel):
+    """Enroll a student in a course
+
+    The enrollment store checks every rule and takes the seat without any
+    entity lock held, so enrollments in a popular course don't queue behind
+    each other's round trip to a shard. The accepted enrollment is then
+    applied to the read model under the student and course locks.
+    """
+    with locks.shared():
+        # Validate student and course exist
+        if enrollment.student_id not in students_db:
+            raise HTTPException(status_code=404, detail="Student not found")
+        if enrollment.course_id not in courses_db:
+            raise HTTPException(status_code=404, detail="Course not found")
+        
+        enrollment_id = generate_id("ENR")
+        try:
+            enrollment_store.enroll(enrollment.student_id, enrollment.course_id, {'id': enrollment_id})
+        except ShardOperationError as e:
+            raise store_error(e, enrollment.course_id)
+        
+        with locks.hold([student_key(enrollment.student_id), course_key(enrollment.course_id)]):
+            student = students_db.get(enrollment.student_id)
+            course = courses_db.get(enrollment.course_id)
+            if student is None or course is None:
+                # Deleted while the store was checking the enrollment
+                enrollment_store.drop_enrollment(enrollment.student_id, enrollment.course_id)
+                raise HTTPException(status_code=404, detail="Student not found" if student is None else "Course not found")
+            
+            enrollment_data = enrollment.model_dump()
+            enrollment_data.update({
+                'id': enrollment_id,
+                'student_name': student['name'],
+                'course_name': course['name'],
+                'credits': course['credits']
+            })
+            apply_enrollment(enrollment_data)
+            publish_capacity(enrollment.course_id)
     
     return {
         "message": "Student successfully enrolled",
@@ -596,28 +896,34 @@ async def get_enrollments(
     """Get enrollments with optional filtering"""
     filtered_enrollments = []
     
-    for enrollment in enrollments_db.values():
+    for enrollment in list(enrollments_db.values()):
         if student_id and enrollment['student_id'] != student_id:
             continue
         if course_id and enrollment['course_id'] != course_id:
             continue
-        filtered_enrollments.append(EnrollmentResponse(**enrollment))
+        filtered_enrollments.append(EnrollmentResponse.model_construct(**enrollment))
     
-    return filtered_enrollments
+    return stored_json(filtered_enrollments)
 
 @app.put("/enrollments/grades/{enrollment_id}")
-async def update_grade(enrollment_id: str, grade: GradeEnum):
+def update_grade(enrollment_id: str, grade: GradeEnum):
     """Update student grade for an enrollment"""
-    if enrollment_id not in enrollments_db:
-        raise HTTPException(status_code=404, detail="Enrollment not found")
-    
-    enrollments_db[enrollment_id]['grade'] = grade
-    
-    # Update student probation status based on new GPA
-    student_id = enrollments_db[enrollment_id]['student_id']
-    new_gpa = calculate_gpa(student_id)
-    students_db[student_id]['gpa'] = new_gpa
-    students_db[student_id]['is_on_probation'] = new_gpa < 2.0
+    student_id = enrollments_db.get(enrollment_id, {}).get('student_id')
+    with locks.hold([student_key(student_id)]):
+        if enrollment_id not in enrollments_db:
+            raise HTTPException(status_code=404, detail="Enrollment not found")
+        
+        try:
+            new_gpa = enrollment_store.set_grade(student_id, enrollments_db[enrollment_id]['course_id'], grade.value)
+        except ShardOperationError as e:
+            raise store_error(e)
+        
+        enrollments_db[enrollment_id]['grade'] = grade
+        publish_enrollment("enrollment.graded", enrollments_db[enrollment_id])
+        
+        # Update student probation status based on new GPA
+        completed_course_bits.pop(student_id, None)
+        set_student_gpa(student_id, new_gpa)
     
     return {"message": "Grade updated successfully", "grade": grade}
 
@@ -631,7 +937,7 @@ async def get_gpa_distribution():
         "2.5-2.99": 0, "2.0-2.49": 0, "Below 2.0": 0
     }
     
-    for student in students_db.values():
+    for student in list(students_db.values()):
         gpa = student['gpa']
         if gpa == 4.0:
             gpa_ranges["4.0"] += 1
@@ -649,8 +955,8 @@ async def get_gpa_distribution():
     return {
         "total_students": len(students_db),
         "gpa_distribution": gpa_ranges,
-        "average_gpa": sum(s['gpa'] for s in students_db.values()) / len(students_db) if students_db else 0,
-        "students_on_probation": sum(1 for s in students_db.values() if s['is_on_probation'])
+        "average_gpa": sum(s['gpa'] for s in list(students_db.values())) / len(students_db) if students_db else 0,
+        "students_on_probation": sum(1 for s in list(students_db.values()) if s['is_on_probation'])
     }
 
 @app.get("/analytics/courses/enrollment-stats")
@@ -658,7 +964,7 @@ async def get_enrollment_stats():
     """Get course enrollment statistics"""
     stats = []
     
-    for course in courses_db.values():
+    for course in list(courses_db.values()):
         enrollment_rate = (course['current_enrollment'] / course['capacity']) * 100
         stats.append({
             "course_id": course['id'],
@@ -678,8 +984,8 @@ async def get_enrollment_stats():
         "total_courses": len(courses_db),
         "course_stats": stats,
         "overall_enrollment_rate": round(
-            sum(c['current_enrollment'] for c in courses_db.values()) / 
-            sum(c['capacity'] for c in courses_db.values()) * 100, 2
+            sum(c['current_enrollment'] for c in list(courses_db.values())) / 
+            sum(c['capacity'] for c in list(courses_db.values())) * 100, 2
         ) if courses_db else 0
     }
 
@@ -688,11 +994,10 @@ async def get_teaching_load():
     """Get professor teaching load analytics"""
     load_stats = []
     
-    for professor in professors_db.values():
+    for professor in list(professors_db.values()):
         teaching_load = get_professor_teaching_load(professor['id'])
         total_students = sum(
-            c['current_enrollment'] for c in courses_db.values() 
-            if c.get('professor_id') == professor['id']
+            courses_db[cid]['current_enrollment'] for cid in professor_courses.get(professor['id'], ())
         )
         
         load_stats.append({
@@ -719,19 +1024,19 @@ async def get_department_performance():
     })
     
     # Count students by major
-    for student in students_db.values():
+    for student in list(students_db.values()):
         dept = student['major']
         dept_stats[dept]['students'] += 1
         dept_stats[dept]['total_gpa'] += student['gpa']
     
     # Count courses and enrollment by department
-    for course in courses_db.values():
+    for course in list(courses_db.values()):
         dept = course['department']
         dept_stats[dept]['courses'] += 1
         dept_stats[dept]['total_enrollment'] += course['current_enrollment']
     
     # Count professors by department
-    for professor in professors_db.values():
+    for professor in list(professors_db.values()):
         dept = professor['department']
         dept_stats[dept]['professors'] += 1
     
@@ -753,174 +1058,240 @@ async def get_department_performance():
     return {"department_performance": performance_data}
 
 # ============= BULK OPERATIONS =============
+# Retried bulk requests carrying the same Idempotency-Key replay a summary of the first result
+idempotency_store = IdempotencyStore()
+upload_sessions = TTLCache(ttl=24 * 3600, max_entries=1000, max_bytes=64 * 1024 * 1024)
+
+def run_idempotent(key: Optional[str], method: str, path: str, body: Any, response: Response, handler):
+    """Run a write once per Idempotency-Key and replay the stored result on retries"""
+    if not key:
+        return handler()
+    try:
+        result, replayed = idempotency_store.run(
+            f"{path}:{key}", fingerprint(method, path, body), lambda: jsonable_encoder(handler())
+        )
+    except IdempotencyError as e:
+        raise HTTPException(status_code=e.status, detail=e.detail)
+    response.headers["Idempotent-Replayed"] = "true" if replayed else "false"
+    return result
+
 @app.post("/students/bulk", status_code=status.HTTP_201_CREATED)
-async def bulk_create_students(students: List[StudentModel]):
-    """Bulk create students"""
-    created_students = []
-    errors = []
-    
-    for i, student in enumerate(students):
-        try:
-            if not validate_unique_email(student.email):
-                errors.append({
-                    "index": i,
-                    "email": student.email,
-                    "error": "Email already exists"
-                })
-                continue
+def bulk_create_students(
+    students: List[Dict[str, Any]],
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
+    """Bulk create students; invalid rows are reported instead of failing the batch"""
+    return run_idempotent(idempotency_key, "POST", "/students/bulk", students, response,
+                          lambda: create_students_batch(students))
+
+def create_students_batch(students: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Create the valid rows of a batch of students.
+
+    Each row's email is checked and claimed under its lock; the new students
+    then go to the enrollment store in one call (a round trip per shard)
+    before they are stored and indexed.
+    """
+    new_students = []
+    valid_students, errors = validate_batch(student_batch_adapter, students)
+    
+    with locks.shared():
+        for i, student in valid_students:
+            with locks.hold([email_key(student.email)]):
+                if not validate_unique_email(student.email):
+                    errors.append({
+                        "index": i,
+                        "email": student.email,
+                        "error": "Email already exists"
+                    })
+                    continue
+                emails_registry.add(student.email)
             
-            student_id = generate_id("STU")
-            student_data = student.dict()
+            student_data = student.model_dump()
             student_data.update({
-                'id': student_id,
+                'id': generate_id("STU"),
                 'created_at': datetime.utcnow(),
-                'is_on_probation': student.gpa < 2.0
-            })
-            
-            students_db[student_id] = student_data
-            emails_registry.add(student.email)
-            created_students.append(StudentResponse(**student_data))
-            
-        except Exception as e:
-            errors.append({
-                "index": i,
-                "email": student.email,
-                "error": str(e)
+                'is_on_probation': is_on_probation(student.gpa)
             })
-    
+            new_students.append(student_data)
+        
+        try:
+            enrollment_store.add_students([store_student(s) for s in new_students])
+        except ShardOperationError as e:
+            for student_data in new_students:
+                emails_registry.discard(student_data['email'])
+            raise store_error(e)
+        for student_data in new_students:
+            students_db[student_data['id']] = student_data
+            index_student(student_data['id'])
+    
+    errors.sort(key=lambda error: error["index"])
     return {
-        "created_count": len(created_students),
+        "created_count": len(new_students),
         "error_count": len(errors),
-        "created_students": created_students,
+        "created_students": [StudentResponse.model_construct(**s) for s in new_students],
         "errors": errors
     }
 
 @app.post("/enrollments/bulk", status_code=status.HTTP_201_CREATED)
-async def bulk_create_enrollments(enrollments: List[EnrollmentModel]):
+def bulk_create_enrollments(
+    enrollments: List[Dict[str, Any]],
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
     """Bulk create enrollments"""
-    created_enrollments = []
-    errors = []
+    return run_idempotent(idempotency_key, "POST", "/enrollments/bulk", enrollments, response,
+                          lambda: create_enrollments_batch(enrollments))
+
+def create_enrollments_batch(enrollments: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Validate a batch of enrollments and enroll the valid rows.
+
+    All rows are validated first. The enrollment store then checks the rest
+    in request order, so when several rows compete for the last seats of a
+    course the earliest rows win, with one round trip per shard. The accepted
+    rows are applied to the read model while every student and course they
+    touch is locked.
+    """
+    valid_enrollments, errors = validate_batch(enrollment_batch_adapter, enrollments)
+    
+    def reject(i: int, enrollment: EnrollmentModel, message: str) -> None:
+        errors.append({
+            "index": i,
+            "student_id": enrollment.student_id,
+            "course_id": enrollment.course_id,
+            "error": message
+        })
     
-    for i, enrollment in enumerate(enrollments):
-        try:
-            # Validate student exists
+    with locks.shared():
+        requests = []
+        for i, enrollment in valid_enrollments:
             if enrollment.student_id not in students_db:
-                errors.append({
-                    "index": i,
-                    "student_id": enrollment.student_id,
-                    "course_id": enrollment.course_id,
-                    "error": "Student not found"
-                })
-                continue
-            
-            # Validate course exists
-            if enrollment.course_id not in courses_db:
-                errors.append({
-                    "index": i,
-                    "student_id": enrollment.student_id,
-                    "course_id": enrollment.course_id,
-                    "error": "Course not found"
-                })
-                continue
-            
-            # Check for duplicate enrollment
-            duplicate_found = False
-            for existing_enrollment in enrollments_db.values():
-                if (existing_enrollment['student_id'] == enrollment.student_id and
-                    existing_enrollment['course_id'] == enrollment.course_id):
-                    errors.append({
-                        "index": i,
-                        "student_id": enrollment.student_id,
-                        "course_id": enrollment.course_id,
-                        "error": "Student already enrolled in course"
-                    })
-                    duplicate_found = True
-                    break
-            
-            if duplicate_found:
-                continue
-            
-            course = courses_db[enrollment.course_id]
-            student = students_db[enrollment.student_id]
-            
-            # Check course capacity
-            if course['current_enrollment'] >= course['capacity']:
-                errors.append({
-                    "index": i,
-                    "student_id": enrollment.student_id,
-                    "course_id": enrollment.course_id,
-                    "error": "Course at maximum capacity"
-                })
-                continue
-            
-            # Check student credit limit
-            current_credits = get_student_credit_hours(enrollment.student_id)
-            if current_credits + course['credits'] > 18:
-                errors.append({
-                    "index": i,
-                    "student_id": enrollment.student_id,
-                    "course_id": enrollment.course_id,
-                    "error": f"Would exceed 18 credit limit (current: {current_credits})"
-                })
-                continue
-            
-            # Check prerequisites
-            if not check_prerequisites(enrollment.student_id, enrollment.course_id):
-                errors.append({
-                    "index": i,
-                    "student_id": enrollment.student_id,
-                    "course_id": enrollment.course_id,
-                    "error": "Prerequisites not met"
+                reject(i, enrollment, "Student not found")
+            elif enrollment.course_id not in courses_db:
+                reject(i, enrollment, "Course not found")
+            else:
+                requests.append((i, enrollment, generate_id("ENR")))
+        
+        results = enrollment_store.enroll_many([
+            (enrollment.student_id, enrollment.course_id, {'id': enrollment_id})
+            for _, enrollment, enrollment_id in requests
+        ])
+        accepted = []
+        for request, (ok, result) in zip(requests, results):
+            if ok:
+                accepted.append(request)
+            else:
+                reject(request[0], request[1], result[1])
+        
+        batch_keys = [student_key(e.student_id) for _, e, _ in accepted] + [course_key(e.course_id) for _, e, _ in accepted]
+        new_enrollments = []
+        with locks.hold(batch_keys):
+            for i, enrollment, enrollment_id in accepted:
+                student = students_db.get(enrollment.student_id)
+                course = courses_db.get(enrollment.course_id)
+                if student is None or course is None:
+                    # Deleted while the store was checking the batch
+                    enrollment_store.drop_enrollment(enrollment.student_id, enrollment.course_id)
+                    reject(i, enrollment, "Student not found" if student is None else "Course not found")
+                    continue
+                
+                enrollment_data = enrollment.model_dump()
+                enrollment_data.update({
+                    'id': enrollment_id,
+                    'student_name': student['name'],
+                    'course_name': course['name'],
+                    'credits': course['credits']
                 })
-                continue
-            
-            # Create enrollment
-            enrollment_id = generate_id("ENR")
-            enrollment_data = enrollment.dict()
-            enrollment_data.update({
-                'id': enrollment_id,
-                'student_name': student['name'],
-                'course_name': course['name'],
-                'credits': course['credits']
-            })
-            
-            enrollments_db[enrollment_id] = enrollment_data
-            courses_db[enrollment.course_id]['current_enrollment'] += 1
-            created_enrollments.append(EnrollmentResponse(**enrollment_data))
+                apply_enrollment(enrollment_data)
+                new_enrollments.append(enrollment_data)
             
-        except Exception as e:
-            errors.append({
-                "index": i,
-                "student_id": enrollment.student_id,
-                "course_id": enrollment.course_id,
-                "error": str(e)
-            })
+            for course_id in {e['course_id'] for e in new_enrollments}:
+                publish_capacity(course_id)
     
+    errors.sort(key=lambda error: error["index"])
     return {
-        "created_count": len(created_enrollments),
+        "created_count": len(new_enrollments),
         "error_count": len(errors),
-        "created_enrollments": created_enrollments,
+        "created_enrollments": [EnrollmentResponse.model_construct(**e) for e in new_enrollments],
         "errors": errors
     }
 
+# ----- resumable chunked uploads -----
+
+UPLOAD_HANDLERS = {"students": create_students_batch, "enrollments": create_enrollments_batch}
+
+@app.post("/uploads", status_code=status.HTTP_201_CREATED)
+def create_upload(
+    kind: str = Query(..., description="students or enrollments"),
+    total_chunks: Optional[int] = Query(None, ge=1, description="Number of chunks the client will send")
+):
+    """Start a resumable bulk upload sent as numbered chunks"""
+    if kind not in UPLOAD_HANDLERS:
+        raise HTTPException(status_code=400, detail=f"kind must be one of {', '.join(UPLOAD_HANDLERS)}")
+    session = UploadSession(kind, total_chunks)
+    upload_sessions.set(session.id, session)
+    return session.to_dict()
+
+@app.put("/uploads/{upload_id}/chunks/{chunk_index}")
+def upload_chunk(upload_id: str, chunk_index: int, rows: List[Dict[str, Any]], response: Response):
+    """Apply one chunk of an upload; re-sending a chunk replays its result instead of applying it again"""
+    session = upload_sessions.get(upload_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload not found or expired")
+    if chunk_index < 0 or (session.total_chunks is not None and chunk_index >= session.total_chunks):
+        raise HTTPException(status_code=400, detail="Chunk index out of range")
+    
+    handler = UPLOAD_HANDLERS[session.kind]
+    path = f"/uploads/{upload_id}/chunks/{chunk_index}"
+    replayed = False
+
+    def apply() -> Dict[str, Any]:
+        nonlocal replayed
+        result, replayed = session.apply_chunk(chunk_index, lambda: jsonable_encoder(handler(rows)))
+        return result
+
+    # The session remembers applied chunks after their idempotency entry expires
+    result = run_idempotent(path, "PUT", path, rows, response, apply)
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    upload_sessions.set(upload_id, session, session.size)
+    
+    return {**result, "chunk_index": chunk_index, "upload": session.to_dict()}
+
+@app.get("/uploads/{upload_id}")
+async def get_upload(upload_id: str):
+    """Which chunks of an upload have been applied, so a client can resume"""
+    session = upload_sessions.get(upload_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload not found or expired")
+    return session.to_dict()
+
 @app.put("/enrollments/grades/bulk")
-async def bulk_update_grades(grade_updates: List[Dict[str, Any]]):
-    """Bulk update grades for enrollments"""
+def bulk_update_grades(grade_updates: List[Dict[str, Any]]):
+    """Bulk update grades for enrollments
+
+    Every student in the batch is locked and the valid rows go to the
+    enrollment store together, one round trip per shard.
+    """
     updated_enrollments = []
     errors = []
+    rows = []
     
     for i, update in enumerate(grade_updates):
-        try:
-            enrollment_id = update.get('enrollment_id')
-            grade = update.get('grade')
-            
-            if not enrollment_id or not grade:
-                errors.append({
-                    "index": i,
-                    "error": "Missing enrollment_id or grade"
-                })
-                continue
-            
+        enrollment_id = update.get('enrollment_id')
+        grade = update.get('grade')
+        if not enrollment_id or not grade:
+            errors.append({
+                "index": i,
+                "error": "Missing enrollment_id or grade"
+            })
+            continue
+        rows.append((i, enrollment_id, grade))
+    
+    student_ids = {enrollments_db.get(enrollment_id, {}).get('student_id') for _, enrollment_id, _ in rows}
+    with locks.hold([student_key(student_id) for student_id in student_ids]):
+        pending = []
+        for i, enrollment_id, grade in rows:
             if enrollment_id not in enrollments_db:
                 errors.append({
                     "index": i,
@@ -936,81 +1307,218 @@ async def bulk_update_grades(grade_updates: List[Dict[str, Any]]):
                     "error": "Invalid grade"
                 })
                 continue
+            pending.append((i, enrollments_db[enrollment_id], grade))
+        
+        try:
+            results = enrollment_store.run_batch([
+                ("set_grade", e['student_id'], (e['student_id'], e['course_id'], grade)) for _, e, grade in pending
+            ])
+        except ShardOperationError as e:
+            raise store_error(e)
+        
+        for (i, enrollment, grade), (ok, result) in zip(pending, results):
+            if not ok:
+                errors.append({
+                    "index": i,
+                    "enrollment_id": enrollment['id'],
+                    "error": result[1]
+                })
+                continue
             
-            # Update grade
-            enrollments_db[enrollment_id]['grade'] = grade
-            
-            # Update student GPA and probation status
-            student_id = enrollments_db[enrollment_id]['student_id']
-            new_gpa = calculate_gpa(student_id)
-            students_db[student_id]['gpa'] = new_gpa
-            students_db[student_id]['is_on_probation'] = new_gpa < 2.0
+            # Update grade, then the student's GPA and probation status
+            student_id = enrollment['student_id']
+            enrollment['grade'] = GradeEnum(grade)
+            publish_enrollment("enrollment.graded", enrollment)
+            completed_course_bits.pop(student_id, None)
+            set_student_gpa(student_id, result)
             
             updated_enrollments.append({
-                "enrollment_id": enrollment_id,
+                "enrollment_id": enrollment['id'],
                 "student_id": student_id,
                 "grade": grade,
-                "new_gpa": round(new_gpa, 2)
+                "new_gpa": round(result, 2)
             })
-            
-        except Exception as e:
+    
+    errors.sort(key=lambda error: error["index"])
+    return {
+        "updated_count": len(updated_enrollments),
+        "error_count": len(errors),
+        "updated_enrollments": updated_enrollments,
+        "errors": errors
+    }
+
+@app.post("/students/bulk-delete")
+def bulk_delete_students(student_ids: List[str]):
+    """Bulk delete students and their enrollments"""
+    deleted_students = []
+    errors = []
+    
+    for i, student_id in enumerate(student_ids):
+        try:
+            removed = cascade_delete_student(student_id)
+            deleted_students.append({"student_id": student_id, "enrollments_removed": removed})
+        except HTTPException as e:
             errors.append({
                 "index": i,
-                "error": str(e)
+                "student_id": student_id,
+                "error": e.detail
             })
     
     return {
-        "updated_count": len(updated_enrollments),
+        "deleted_count": len(deleted_students),
         "error_count": len(errors),
-        "updated_enrollments": updated_enrollments,
+        "deleted_students": deleted_students,
+        "errors": errors
+    }
+
+@app.post("/courses/bulk-delete")
+def bulk_delete_courses(course_ids: List[str]):
+    """Bulk delete courses and their enrollments"""
+    deleted_courses = []
+    errors = []
+    
+    for i, course_id in enumerate(course_ids):
+        try:
+            removed = cascade_delete_course(course_id)
+            deleted_courses.append({"course_id": course_id, "enrollments_removed": removed})
+        except HTTPException as e:
+            errors.append({
+                "index": i,
+                "course_id": course_id,
+                "error": e.detail
+            })
+    
+    return {
+        "deleted_count": len(deleted_courses),
+        "error_count": len(errors),
+        "deleted_courses": deleted_courses,
         "errors": errors
     }
 
 # ============= COURSE ASSIGNMENT ENDPOINTS =============
 
 @app.put("/courses/{course_id}/assign-professor/{professor_id}")
-async def assign_professor_to_course(course_id: str, professor_id: str):
+def assign_professor_to_course(course_id: str, professor_id: str):
     """Assign a professor to a course"""
-    if course_id not in courses_db:
-        raise HTTPException(status_code=404, detail="Course not found")
-    
-    if professor_id not in professors_db:
-        raise HTTPException(status_code=404, detail="Professor not found")
-    
-    # Check if professor already has maximum teaching load
-    current_load = get_professor_teaching_load(professor_id)
-    if current_load >= 4:
-        raise HTTPException(
-            status_code=409,
-            detail=f"Professor already teaching maximum of 4 courses (current: {current_load})"
-        )
-    
-    # Check if course already has a professor
-    if courses_db[course_id].get('professor_id'):
-        old_professor_id = courses_db[course_id]['professor_id']
-        old_professor_name = professors_db.get(old_professor_id, {}).get('name', 'Unknown')
+    with locks.hold([course_key(course_id), professor_key(professor_id)]):
+        if course_id not in courses_db:
+            raise HTTPException(status_code=404, detail="Course not found")
+        
+        if professor_id not in professors_db:
+            raise HTTPException(status_code=404, detail="Professor not found")
+        
+        # Check if professor already has maximum teaching load
+        current_load = get_professor_teaching_load(professor_id)
+        if current_load >= 4:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Professor already teaching maximum of 4 courses (current: {current_load})"
+            )
+        
+        # Check if course already has a professor
+        if courses_db[course_id].get('professor_id'):
+            old_professor_id = courses_db[course_id]['professor_id']
+            old_professor_name = professors_db.get(old_professor_id, {}).get('name', 'Unknown')
+            return {
+                "message": f"Course reassigned from {old_professor_name} to {professors_db[professor_id]['name']}",
+                "previous_professor": old_professor_name,
+                "new_professor": professors_db[professor_id]['name']
+            }
+        
+        courses_db[course_id]['professor_id'] = professor_id
+        professor_courses[professor_id].add(course_id)
+        
         return {
-            "message": f"Course reassigned from {old_professor_name} to {professors_db[professor_id]['name']}",
-            "previous_professor": old_professor_name,
-            "new_professor": professors_db[professor_id]['name']
+            "message": "Professor successfully assigned to course",
+            "course": courses_db[course_id]['name'],
+            "professor": professors_db[professor_id]['name']
         }
-    
-    courses_db[course_id]['professor_id'] = professor_id
-    
-    return {
-        "message": "Professor successfully assigned to course",
-        "course": courses_db[course_id]['name'],
-        "professor": professors_db[professor_id]['name']
-    }
 
 @app.delete("/courses/{course_id}/unassign-professor", status_code=status.HTTP_204_NO_CONTENT)
-async def unassign_professor_from_course(course_id: str):
+def unassign_professor_from_course(course_id: str):
     """Remove professor assignment from a course"""
-    if course_id not in courses_db:
-        raise HTTPException(status_code=404, detail="Course not found")
+    def linked() -> set:
+        return {professor_key(courses_db.get(course_id, {}).get('professor_id'))}
     
-    if 'professor_id' in courses_db[course_id]:
-        del courses_db[course_id]['professor_id']
+    with locks.hold_linked(course_key(course_id), linked):
+        if course_id not in courses_db:
+            raise HTTPException(status_code=404, detail="Course not found")
+        
+        professor_id = courses_db[course_id].pop('professor_id', None)
+        if professor_id:
+            professor_courses[professor_id].discard(course_id)
+
+# ============= CHANGE FEED ENDPOINTS =============
+
+def feed_topics(course_ids: List[str], departments: List[DepartmentEnum]) -> List[str]:
+    return [course_topic(cid) for cid in course_ids] + [department_topic(d) for d in departments]
+
+def feed_snapshot(course_ids: List[str], departments: List[DepartmentEnum]) -> List[Dict[str, Any]]:
+    """Current seat counts for the subscribed courses, sent before live events"""
+    subscribed = set(course_ids)
+    for department in departments:
+        _, ids, _, _ = course_filters.query({"department": department}, limit=max(len(course_filters), 1))
+        subscribed.update(ids)
+    return [
+        {"type": "course.capacity", "data": capacity_payload(course)}
+        for course in (courses_db.get(cid) for cid in sorted(subscribed)) if course
+    ]
+
+def sse_message(event: Dict[str, Any]) -> str:
+    lines = [f"event: {event['type']}"]
+    if 'id' in event:
+        lines.append(f"id: {event['id']}")
+    lines.append(f"data: {json.dumps(jsonable_encoder(event))}")
+    return "\n".join(lines) + "\n\n"
+
+@app.get("/events/stream")
+async def stream_events(
+    request: Request,
+    course_id: List[str] = Query([], description="Course IDs to follow"),
+    department: List[DepartmentEnum] = Query([], description="Departments to follow"),
+    snapshot: bool = Query(True, description="Send current seat counts first")
+):
+    """Server-Sent Events feed of enrollment, grade and seat-count changes"""
+    subscription = event_broker.subscribe(feed_topics(course_id, department))
+    initial = feed_snapshot(course_id, department) if snapshot else []
+    
+    async def event_source():
+        try:
+            for event in initial:
+                yield sse_message(event)
+            async for event in subscription.events():
+                if await request.is_disconnected():
+                    break
+                yield sse_message(event) if event else ": keepalive\n\n"
+        finally:
+            event_broker.unsubscribe(subscription)
+    
+    return StreamingResponse(event_source(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.websocket("/events/ws")
+async def websocket_events(
+    websocket: WebSocket,
+    course_id: List[str] = Query([]),
+    department: List[DepartmentEnum] = Query([]),
+    snapshot: bool = Query(True)
+):
+    """WebSocket feed of enrollment, grade and seat-count changes"""
+    await websocket.accept()
+    subscription = event_broker.subscribe(feed_topics(course_id, department))
+    try:
+        if snapshot:
+            for event in feed_snapshot(course_id, department):
+                await websocket.send_json(jsonable_encoder(event))
+        async for event in subscription.events():
+            if event:
+                await websocket.send_json(jsonable_encoder(event))
+            else:
+                await websocket.send_json({"type": "keepalive"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        event_broker.unsubscribe(subscription)
 
 # ============= UTILITY ENDPOINTS =============
 
@@ -1026,18 +1534,20 @@ async def health_check():
             "courses": len(courses_db),
             "professors": len(professors_db),
             "enrollments": len(enrollments_db)
-        }
+        },
+        "enrollment_shards": len(enrollment_store.shards),
+        "event_subscribers": event_broker.subscriber_count()
     }
 
 @app.post("/admin/seed-data")
-async def seed_sample_data():
+def seed_sample_data():
     """Seed the database with sample data for testing"""
-    # Clear existing data
-    students_db.clear()
-    courses_db.clear()
-    professors_db.clear()
-    enrollments_db.clear()
-    emails_registry.clear()
+    with locks.exclusive():
+        return load_sample_data()
+
+def load_sample_data() -> Dict[str, Any]:
+    """Replace all stores with the small hand-written sample; callers hold locks.exclusive()"""
+    now = datetime.utcnow()
     
     # Sample students
     sample_students = [
@@ -1049,14 +1559,11 @@ async def seed_sample_data():
     ]
     
     for student_data in sample_students:
-        student_id = generate_id("STU")
         student_data.update({
-            'id': student_id,
-            'created_at': datetime.utcnow(),
-            'is_on_probation': student_data['gpa'] < 2.0
+            'id': generate_id("STU"),
+            'created_at': now,
+            'is_on_probation': is_on_probation(student_data['gpa'])
         })
-        students_db[student_id] = student_data
-        emails_registry.add(student_data['email'])
     
     # Sample professors
     sample_professors = [
@@ -1066,14 +1573,11 @@ async def seed_sample_data():
     ]
     
     for prof_data in sample_professors:
-        prof_id = generate_id("PRF")
         prof_data.update({
-            'id': prof_id,
+            'id': generate_id("PRF"),
             'current_courses': [],
-            'created_at': datetime.utcnow()
+            'created_at': now
         })
-        professors_db[prof_id] = prof_data
-        emails_registry.add(prof_data['email'])
     
     # Sample courses
     sample_courses = [
@@ -1083,22 +1587,25 @@ async def seed_sample_data():
         {"course_code": "PHYS101-001", "name": "General Physics", "department": "Physics", "credits": 3, "capacity": 35, "prerequisites": []}
     ]
     
-    course_ids = []
     for course_data in sample_courses:
-        course_id = generate_id("CRS")
         course_data.update({
-            'id': course_id,
+            'id': generate_id("CRS"),
             'current_enrollment': 0,
-            'created_at': datetime.utcnow()
+            'created_at': now
         })
-        courses_db[course_id] = course_data
-        course_ids.append(course_id)
     
     # Assign professors to courses
-    prof_ids = list(professors_db.keys())
-    for i, course_id in enumerate(course_ids):
-        if i < len(prof_ids):
-            courses_db[course_id]['professor_id'] = prof_ids[i]
+    for course_data, prof_data in zip(sample_courses, sample_professors):
+        course_data['professor_id'] = prof_data['id']
+        prof_data['current_courses'].append(course_data['id'])
+    
+    # Same path as the synthetic datasets, so enum fields are coerced the same way
+    load_dataset({
+        "students": sample_students,
+        "professors": sample_professors,
+        "courses": sample_courses,
+        "enrollments": []
+    })
     
     return {
         "message": "Sample data seeded successfully",
@@ -1107,109 +1614,141 @@ async def seed_sample_data():
         "courses_created": len(sample_courses)
     }
 
-@app.delete("/admin/clear-data", status_code=status.HTTP_204_NO_CONTENT)
-async def clear_all_data():
-    """Clear all data from the system (for testing purposes)"""
+def load_dataset(dataset: Dict[str, List[Dict[str, Any]]]) -> None:
+    """Replace all stores with pre-built records and rebuild every index.
+
+    Enum fields are coerced to the model enums so the stores hold the same
+    types as API-created records (responses are built with model_construct).
+    """
     students_db.clear()
     courses_db.clear()
     professors_db.clear()
     enrollments_db.clear()
     emails_registry.clear()
+    clear_indexes()
+    enrollment_store.clear()
+    
+    for professor in dataset["professors"]:
+        professor['department'] = DepartmentEnum(professor['department'])
+        professors_db[professor['id']] = professor
+        emails_registry.add(professor['email'])
+        professor_filters.add(professor['id'], professor)
+    for course in dataset["courses"]:
+        course['department'] = DepartmentEnum(course['department'])
+        courses_db[course['id']] = course
+        course_codes[course['course_code']] = course['id']
+        prerequisite_graph.set_course(course['course_code'], course['prerequisites'])
+        if course.get('professor_id'):
+            professor_courses[course['professor_id']].add(course['id'])
+        index_course(course['id'])
+    for student in dataset["students"]:
+        student['major'] = MajorEnum(student['major'])
+        students_db[student['id']] = student
+        emails_registry.add(student['email'])
+        index_student(student['id'])
+    # Before the grades become enums: the store takes plain values
+    enrollment_store.add_students(store_student(student) for student in dataset["students"])
+    enrollment_store.add_enrollments(dataset["enrollments"])
+    for enrollment in dataset["enrollments"]:
+        enrollment['grade'] = GradeEnum(enrollment['grade']) if enrollment['grade'] else None
+        enrollments_db[enrollment['id']] = enrollment
+        index_enrollment(enrollment)
+
+@app.post("/admin/seed-synthetic")
+def seed_synthetic_data(
+    students: int = Query(1000, ge=1, le=1_000_000, description="Number of students to generate"),
+    courses_per_department: Optional[int] = Query(None, ge=4, le=400),
+    professors: Optional[int] = Query(None, ge=1),
+    seed: int = Query(42, description="Random seed (same seed, same dataset)")
+):
+    """Replace all data with a reproducible synthetic dataset of the requested size"""
+    dataset = generate_dataset(students, courses_per_department, professors, seed)
+    with locks.exclusive():
+        load_dataset(dataset)
+    
+    return {
+        "message": "Synthetic data seeded successfully",
+        "seed": seed,
+        "students_created": len(dataset["students"]),
+        "professors_created": len(dataset["professors"]),
+        "courses_created": len(dataset["courses"]),
+        "enrollments_created": len(dataset["enrollments"])
+    }
+
+@app.delete("/admin/clear-data", status_code=status.HTTP_204_NO_CONTENT)
+def clear_all_data():
+    """Clear all data from the system (for testing purposes)"""
+    with locks.exclusive():
+        students_db.clear()
+        courses_db.clear()
+        professors_db.clear()
+        enrollments_db.clear()
+        emails_registry.clear()
+        clear_indexes()
+        enrollment_store.clear()
 
 # ============= ADVANCED SEARCH ENDPOINTS =============
 
+def search_response(query: str, field: str, total: int, exact: bool, page: int, limit: int,
+                    results: List[Any], scores: List[float]) -> Dict[str, Any]:
+    return {
+        "query": query,
+        "field": field,
+        "total_results": total,
+        "total_is_estimate": not exact,
+        "results": results,
+        "scores": scores,
+        "pagination": PaginationResponse(
+            page=page,
+            limit=limit,
+            total=total,
+            total_pages=(total + limit - 1) // limit,
+            has_next=page * limit < total,
+            has_prev=page > 1
+        )
+    }
+
 @app.get("/search/students")
 async def search_students(
     q: str = Query(..., min_length=2, description="Search query"),
-    field: str = Query("name", regex="^(name|email|major)$", description="Field to search in")
+    field: str = Query("name", regex="^(name|email|major)$", description="Field to search in"),
+    page: int = Query(1, ge=1, description="Page number"),
+    limit: int = Query(10, ge=1, le=100, description="Items per page")
 ):
-    """Advanced student search"""
-    results = []
-    query_lower = q.lower()
-    
-    for student in students_db.values():
-        field_value = str(student.get(field, "")).lower()
-        if query_lower in field_value:
-            results.append(StudentResponse(**student))
-    
-    return {
-        "query": q,
-        "field": field,
-        "total_results": len(results),
-        "results": results
-    }
+    """Ranked, typo-tolerant student search backed by the trigram index"""
+    total, ranked, exact = student_search_index.search(q, field, offset=(page - 1) * limit, limit=limit)
+    results = [StudentResponse.model_construct(**students_db[student_id]) for student_id, _ in ranked]
+    return stored_json(search_response(q, field, total, exact, page, limit, results, [score for _, score in ranked]))
 
 @app.get("/search/courses")
 async def search_courses(
     q: str = Query(..., min_length=2),
-    field: str = Query("name", regex="^(name|course_code|department)$")
+    field: str = Query("name", regex="^(name|course_code|department)$"),
+    page: int = Query(1, ge=1),
+    limit: int = Query(10, ge=1, le=100)
 ):
-    """Advanced course search"""
-    results = []
-    query_lower = q.lower()
-    
-    for course in courses_db.values():
-        field_value = str(course.get(field, "")).lower()
-        if query_lower in field_value:
-            results.append(CourseResponse(**course))
-    
-    return {
-        "query": q,
-        "field": field,
-        "total_results": len(results),
-        "results": results
-    }
+    """Ranked, typo-tolerant course search backed by the trigram index"""
+    total, ranked, exact = course_search_index.search(q, field, offset=(page - 1) * limit, limit=limit)
+    results = [CourseResponse.model_construct(**courses_db[course_id]) for course_id, _ in ranked]
+    return stored_json(search_response(q, field, total, exact, page, limit, results, [score for _, score in ranked]))
 
 # ============= REPORTING ENDPOINTS =============
 
+report_jobs = ReportJobManager()
+
 @app.get("/reports/transcript/{student_id}")
 async def get_student_transcript(student_id: str):
     """Generate student transcript"""
     if student_id not in students_db:
         raise HTTPException(status_code=404, detail="Student not found")
     
-    student = students_db[student_id]
-    student_enrollments = []
-    total_credits = 0
-    total_grade_points = 0
-    
-    grade_points = {'A': 4.0, 'B': 3.0, 'C': 2.0, 'D': 1.0, 'F': 0.0}
-    
-    for enrollment in enrollments_db.values():
-        if enrollment['student_id'] == student_id:
-            course = courses_db.get(enrollment['course_id'], {})
-            enrollment_record = {
-                "course_code": course.get('course_code', 'N/A'),
-                "course_name": course.get('name', 'N/A'),
-                "credits": course.get('credits', 0),
-                "grade": enrollment.get('grade', 'In Progress'),
-                "enrollment_date": enrollment.get('enrollment_date')
-            }
-            
-            if enrollment.get('grade'):
-                total_credits += course.get('credits', 0)
-                total_grade_points += grade_points[enrollment['grade']] * course.get('credits', 0)
-            
-            student_enrollments.append(enrollment_record)
-    
-    cumulative_gpa = total_grade_points / total_credits if total_credits > 0 else 0.0
+    history = []
+    for enrollment_id in tuple(student_enrollments.get(student_id, ())):
+        enrollment = enrollments_db.get(enrollment_id)
+        if enrollment:
+            history.append((enrollment, courses_db.get(enrollment['course_id'], {})))
     
-    return {
-        "student_info": {
-            "name": student['name'],
-            "email": student['email'],
-            "major": student['major'],
-            "year": student['year'],
-            "student_id": student_id
-        },
-        "academic_summary": {
-            "total_credits_completed": total_credits,
-            "cumulative_gpa": round(cumulative_gpa, 2),
-            "academic_standing": "Good Standing" if cumulative_gpa >= 2.0 and not student['is_on_probation'] else "Academic Probation"
-        },
-        "course_history": student_enrollments,
-        "generated_at": datetime.utcnow()
-    }
+    return build_transcript(student_id, students_db[student_id], history)
 
 @app.get("/reports/course-roster/{course_id}")
 async def get_course_roster(course_id: str):
@@ -1218,51 +1757,55 @@ async def get_course_roster(course_id: str):
         raise HTTPException(status_code=404, detail="Course not found")
     
     course = courses_db[course_id]
-    enrolled_students = []
-    
-    for enrollment in enrollments_db.values():
-        if enrollment['course_id'] == course_id:
-            student = students_db.get(enrollment['student_id'], {})
-            enrolled_students.append({
-                "student_id": enrollment['student_id'],
-                "name": student.get('name', 'N/A'),
-                "email": student.get('email', 'N/A'),
-                "year": student.get('year', 'N/A'),
-                "major": student.get('major', 'N/A'),
-                "grade": enrollment.get('grade', 'In Progress'),
-                "enrollment_date": enrollment.get('enrollment_date')
-            })
+    entries = []
+    for enrollment_id in tuple(course_enrollments.get(course_id, ())):
+        enrollment = enrollments_db.get(enrollment_id)
+        if enrollment:
+            entries.append((enrollment, students_db.get(enrollment['student_id'], {})))
+    
+    return build_roster(course_id, course, professors_db.get(course.get('professor_id')), entries)
+
+@app.post("/reports/batch", status_code=status.HTTP_202_ACCEPTED)
+def start_batch_report(
+    kind: str = Query("transcripts", description="transcripts or rosters"),
+    format: str = Query("ndjson", description="ndjson, csv or zip (one JSON file per report)"),
+    workers: int = Query(0, ge=0, le=32, description="Worker processes (0 renders in a background thread)")
+):
+    """Start a batch export of every transcript or roster"""
+    if kind not in REPORT_KINDS:
+        raise HTTPException(status_code=400, detail=f"kind must be one of {', '.join(REPORT_KINDS)}")
+    if format not in REPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(REPORT_FORMATS)}")
     
-    # Sort by student name
-    enrolled_students.sort(key=lambda x: x['name'])
-    
-    professor_info = {}
-    if course.get('professor_id'):
-        professor = professors_db.get(course['professor_id'], {})
-        professor_info = {
-            "name": professor.get('name', 'N/A'),
-            "email": professor.get('email', 'N/A')
-        }
+    # The stores are copied in the job's thread, not while the request waits
+    job = report_jobs.submit(kind, format, lambda: snapshot(
+        students=students_db, courses=courses_db, professors=professors_db, enrollments=enrollments_db
+    ), workers)
     
     return {
-        "course_info": {
-            "course_code": course['course_code'],
-            "name": course['name'],
-            "department": course['department'],
-            "credits": course['credits'],
-            "capacity": course['capacity'],
-            "current_enrollment": course['current_enrollment']
-        },
-        "professor": professor_info,
-        "enrolled_students": enrolled_students,
-        "enrollment_summary": {
-            "total_enrolled": len(enrolled_students),
-            "available_spots": course['capacity'] - len(enrolled_students),
-            "enrollment_rate": round((len(enrolled_students) / course['capacity']) * 100, 2)
-        },
-        "generated_at": datetime.utcnow()
+        **job.to_dict(),
+        "status_url": f"/reports/batch/{job.id}",
+        "download_url": f"/reports/batch/{job.id}/download"
     }
 
+@app.get("/reports/batch/{job_id}")
+async def get_batch_report_status(job_id: str):
+    """Poll the progress of a batch export"""
+    job = report_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    return job.to_dict()
+
+@app.get("/reports/batch/{job_id}/download")
+async def download_batch_report(job_id: str):
+    """Stream the output of a completed batch export"""
+    job = report_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    if job.status != "completed":
+        raise HTTPException(status_code=409, detail=f"Report job is {job.status}")
+    return FileResponse(job.path, media_type=MEDIA_TYPES[job.format], filename=job.filename)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
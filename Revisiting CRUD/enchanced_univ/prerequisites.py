@@ -0,0 +1,130 @@
+import threading
+from typing import Dict, Iterable, List, Optional
+
+
+class PrerequisiteCycleError(ValueError):
+    """Raised when a prerequisite change would make the course graph cyclic"""
+
+    def __init__(self, cycle: List[str]):
+        self.cycle = cycle
+        super().__init__("Prerequisite cycle detected: " + " -> ".join(cycle))
+
+
+class PrerequisiteGraph:
+    """Directed acyclic graph of course codes -> prerequisite course codes.
+
+    Every course code gets a bit position, so a set of codes can be held as a
+    plain int. Direct prerequisite masks are kept up to date on write; the
+    transitive closure is computed lazily and cached until the graph changes.
+    """
+
+    def __init__(self):
+        self.prerequisites: Dict[str, tuple] = {}
+        self.bit_index: Dict[str, int] = {}
+        self.codes_by_bit: List[str] = []
+        self.direct_masks: Dict[str, int] = {}
+        self._closure_cache: Dict[str, int] = {}
+        self._lock = threading.RLock()
+
+    def clear(self) -> None:
+        with self._lock:
+            self.prerequisites.clear()
+            self.bit_index.clear()
+            self.codes_by_bit.clear()
+            self.direct_masks.clear()
+            self._closure_cache.clear()
+
+    # ----- bitset helpers -----
+
+    def bit(self, code: str) -> int:
+        """Return the bit for a course code, allocating one if needed"""
+        if code not in self.bit_index:
+            with self._lock:
+                if code not in self.bit_index:
+                    self.bit_index[code] = len(self.codes_by_bit)
+                    self.codes_by_bit.append(code)
+        return 1 << self.bit_index[code]
+
+    def mask(self, codes: Iterable[str]) -> int:
+        result = 0
+        for code in codes:
+            result |= self.bit(code)
+        return result
+
+    def codes(self, mask: int) -> List[str]:
+        """Decode a bitset back into course codes (in bit order)"""
+        result = []
+        while mask:
+            low = mask & -mask
+            result.append(self.codes_by_bit[low.bit_length() - 1])
+            mask ^= low
+        return result
+
+    # ----- graph maintenance -----
+
+    def find_cycle(self, code: str, prerequisites: Iterable[str]) -> Optional[List[str]]:
+        """Return the cycle that setting `code`'s prerequisites would create, if any"""
+        for prereq in prerequisites:
+            if prereq == code:
+                return [code, code]
+            path = self._path(prereq, code)
+            if path:
+                return [code] + path
+        return None
+
+    def _path(self, start: str, target: str) -> Optional[List[str]]:
+        stack = [(start, [start])]
+        seen = set()
+        while stack:
+            node, path = stack.pop()
+            if node == target:
+                return path
+            if node in seen:
+                continue
+            seen.add(node)
+            for prereq in self.prerequisites.get(node, ()):
+                stack.append((prereq, path + [prereq]))
+        return None
+
+    def set_course(self, code: str, prerequisites: Iterable[str]) -> None:
+        """Add or replace a course's prerequisites, rejecting cycles"""
+        prerequisites = tuple(dict.fromkeys(prerequisites))
+        with self._lock:
+            cycle = self.find_cycle(code, prerequisites)
+            if cycle:
+                raise PrerequisiteCycleError(cycle)
+            self.bit(code)
+            self.prerequisites[code] = prerequisites
+            self.direct_masks[code] = self.mask(prerequisites)
+            self._closure_cache.clear()
+
+    def remove_course(self, code: str) -> None:
+        with self._lock:
+            self.prerequisites.pop(code, None)
+            self.direct_masks.pop(code, None)
+            self._closure_cache.clear()
+
+    # ----- queries -----
+
+    def closure(self, code: str) -> int:
+        """Bitset of every direct and indirect prerequisite of a course"""
+        cached = self._closure_cache.get(code)
+        if cached is not None:
+            return cached
+        with self._lock:
+            result = 0
+            for prereq in self.prerequisites.get(code, ()):
+                result |= self.bit(prereq) | self.closure(prereq)
+            self._closure_cache[code] = result
+        return result
+
+    def is_satisfied(self, code: str, completed_mask: int) -> bool:
+        return self.direct_masks.get(code, 0) & ~completed_mask == 0
+
+    def missing(self, code: str, completed_mask: int) -> List[str]:
+        """Direct prerequisites of a course not yet completed"""
+        return self.codes(self.direct_masks.get(code, 0) & ~completed_mask)
+
+    def missing_transitive(self, code: str, completed_mask: int) -> List[str]:
+        """Every prerequisite in the chain leading to a course not yet completed"""
+        return self.codes(self.closure(code) & ~completed_mask)
@@ -0,0 +1,314 @@
+import csv
+import io
+import json
+import os
+import tempfile
+import threading
+import uuid
+import zipfile
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from rules import gpa, is_on_probation
+
+REPORT_KINDS = ("transcripts", "rosters")
+REPORT_FORMATS = ("ndjson", "csv", "zip")
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv", "zip": "application/zip"}
+CHUNK_SIZE = 500
+
+TRANSCRIPT_COLUMNS = [
+    "student_id", "name", "email", "major", "year", "cumulative_gpa", "academic_standing",
+    "course_code", "course_name", "credits", "grade", "enrollment_date"
+]
+ROSTER_COLUMNS = [
+    "course_id", "course_code", "course_name", "department", "professor", "student_id",
+    "name", "email", "year", "major", "grade", "enrollment_date"
+]
+
+
+def plain(value: Any) -> Any:
+    """Turn enums and dates into JSON/CSV friendly values"""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def build_transcript(student_id: str, student: Dict, history: List[Tuple[Dict, Dict]]) -> Dict[str, Any]:
+    """Transcript for one student from their (enrollment, course) pairs"""
+    course_history = []
+    total_credits = 0
+    graded = []
+
+    for enrollment, course in history:
+        grade = plain(enrollment.get('grade'))
+        course_history.append({
+            "course_code": course.get('course_code', 'N/A'),
+            "course_name": course.get('name', 'N/A'),
+            "credits": course.get('credits', 0),
+            "grade": grade or 'In Progress',
+            "enrollment_date": enrollment.get('enrollment_date')
+        })
+        if grade:
+            total_credits += course.get('credits', 0)
+            graded.append((grade, course.get('credits', 0)))
+
+    cumulative_gpa = gpa(graded) or 0.0
+    good_standing = not is_on_probation(cumulative_gpa) and not student['is_on_probation']
+
+    return {
+        "student_info": {
+            "name": student['name'],
+            "email": student['email'],
+            "major": plain(student['major']),
+            "year": student['year'],
+            "student_id": student_id
+        },
+        "academic_summary": {
+            "total_credits_completed": total_credits,
+            "cumulative_gpa": round(cumulative_gpa, 2),
+            "academic_standing": "Good Standing" if good_standing else "Academic Probation"
+        },
+        "course_history": course_history,
+        "generated_at": datetime.utcnow()
+    }
+
+
+def build_roster(course_id: str, course: Dict, professor: Optional[Dict],
+                 entries: List[Tuple[Dict, Dict]]) -> Dict[str, Any]:
+    """Roster for one course from its (enrollment, student) pairs"""
+    enrolled_students = [{
+        "student_id": enrollment['student_id'],
+        "name": student.get('name', 'N/A'),
+        "email": student.get('email', 'N/A'),
+        "year": student.get('year', 'N/A'),
+        "major": plain(student.get('major', 'N/A')),
+        "grade": plain(enrollment.get('grade')) or 'In Progress',
+        "enrollment_date": enrollment.get('enrollment_date')
+    } for enrollment, student in entries]
+    enrolled_students.sort(key=lambda x: x['name'])
+
+    professor_info = {}
+    if professor:
+        professor_info = {"name": professor.get('name', 'N/A'), "email": professor.get('email', 'N/A')}
+
+    return {
+        "course_info": {
+            "course_id": course_id,
+            "course_code": course['course_code'],
+            "name": course['name'],
+            "department": plain(course['department']),
+            "credits": course['credits'],
+            "capacity": course['capacity'],
+            "current_enrollment": course['current_enrollment']
+        },
+        "professor": professor_info,
+        "enrolled_students": enrolled_students,
+        "enrollment_summary": {
+            "total_enrolled": len(enrolled_students),
+            "available_spots": course['capacity'] - len(enrolled_students),
+            "enrollment_rate": round((len(enrolled_students) / course['capacity']) * 100, 2)
+        },
+        "generated_at": datetime.utcnow()
+    }
+
+
+def detach(record: Dict) -> Dict:
+    """Shallow copy of a record with enum members replaced by their values"""
+    return {key: value.value if isinstance(value, Enum) else value for key, value in record.items()}
+
+
+def snapshot(**stores: Dict[str, Dict]) -> Dict[str, Dict]:
+    """Point-in-time copy of the stores that is safe to hand to other processes"""
+    return {name: {key: detach(record) for key, record in list(store.items())}
+            for name, store in stores.items()}
+
+
+# ----- batch rendering (runs in worker processes, so stdlib data only) -----
+
+def _csv_rows(kind: str, report: Dict) -> List[List[Any]]:
+    if kind == "transcripts":
+        info, summary = report["student_info"], report["academic_summary"]
+        head = [info["student_id"], info["name"], info["email"], info["major"], info["year"],
+                summary["cumulative_gpa"], summary["academic_standing"]]
+        rows = [head + [c["course_code"], c["course_name"], c["credits"], c["grade"], plain(c["enrollment_date"])]
+                for c in report["course_history"]]
+        return rows or [head + [""] * 5]
+    info = report["course_info"]
+    head = [info["course_id"], info["course_code"], info["name"], info["department"],
+            report["professor"].get("name", "")]
+    rows = [head + [s["student_id"], s["name"], s["email"], s["year"], s["major"], s["grade"],
+                    plain(s["enrollment_date"])]
+            for s in report["enrolled_students"]]
+    return rows or [head + [""] * 7]
+
+
+def render_chunk(kind: str, fmt: str, chunk: List[tuple]) -> Tuple[Any, int]:
+    """Build and serialise one chunk of reports, returning (payload, count).
+
+    The payload is text for ndjson/csv and a list of (filename, json) for zip.
+    """
+    build = build_transcript if kind == "transcripts" else build_roster
+    reports = [build(*item) for item in chunk]
+    if fmt == "zip":
+        folder = "transcripts" if kind == "transcripts" else "rosters"
+        return [(f"{folder}/{item[0]}.json", json.dumps(report, default=plain, indent=2))
+                for item, report in zip(chunk, reports)], len(reports)
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for report in reports:
+            writer.writerows(_csv_rows(kind, report))
+        return buffer.getvalue(), len(reports)
+    return "".join(json.dumps(report, default=plain) + "\n" for report in reports), len(reports)
+
+
+def group_work(kind: str, data: Dict[str, Dict]) -> List[tuple]:
+    """Group every enrollment by student or course in one pass.
+
+    Returns the argument tuples for build_transcript / build_roster, in the
+    order the entities appear in their store.
+    """
+    students, courses = data["students"], data["courses"]
+    grouped: Dict[str, List[Tuple[Dict, Dict]]] = defaultdict(list)
+    if kind == "transcripts":
+        for enrollment in data["enrollments"].values():
+            grouped[enrollment['student_id']].append((enrollment, courses.get(enrollment['course_id'], {})))
+        return [(sid, student, grouped.get(sid, [])) for sid, student in students.items()]
+
+    for enrollment in data["enrollments"].values():
+        grouped[enrollment['course_id']].append((enrollment, students.get(enrollment['student_id'], {})))
+    professors = data["professors"]
+    return [(cid, course, professors.get(course.get('professor_id')), grouped.get(cid, []))
+            for cid, course in courses.items()]
+
+
+def _chunks(items: List[tuple], size: int) -> Iterator[List[tuple]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class ReportJob:
+    def __init__(self, kind: str, fmt: str, workers: int):
+        self.id = f"RPT{uuid.uuid4().hex[:8].upper()}"
+        self.kind = kind
+        self.format = fmt
+        self.workers = workers
+        self.status = "queued"
+        self.total = 0
+        self.processed = 0
+        self.path: Optional[str] = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.utcnow()
+        self.finished_at: Optional[datetime] = None
+
+    @property
+    def filename(self) -> str:
+        return f"{self.kind}-{self.id}.{self.format}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "format": self.format,
+            "workers": self.workers,
+            "status": self.status,
+            "total": self.total,
+            "processed": self.processed,
+            "progress": round(self.processed / self.total * 100, 2) if self.total else (100.0 if self.status == "completed" else 0.0),
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at
+        }
+
+
+class ReportJobManager:
+    """Runs batch transcript/roster exports in background threads.
+
+    A job takes a point-in-time copy of the stores in its own thread (the
+    request only queues it), groups enrollments in a single pass and renders
+    chunks either inline or across a process pool (keeping at most two
+    chunks per worker in flight). Output goes to a temporary file that the
+    download endpoint streams. Beyond `max_jobs`, the jobs that finished
+    longest ago are dropped with their files; queued and running jobs are
+    never evicted.
+    """
+
+    def __init__(self, output_dir: Optional[str] = None, max_jobs: int = 20):
+        self.output_dir = output_dir or tempfile.mkdtemp(prefix="univ-reports-")
+        self.max_jobs = max_jobs
+        self.jobs: "OrderedDict[str, ReportJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, job_id: str) -> Optional[ReportJob]:
+        return self.jobs.get(job_id)
+
+    def submit(self, kind: str, fmt: str, load: Callable[[], Dict[str, Dict]], workers: int = 0) -> ReportJob:
+        """Queue a job; `load` returns the data (see `snapshot`) and runs in the job's thread"""
+        job = ReportJob(kind, fmt, workers)
+        with self._lock:
+            self.jobs[job.id] = job
+            self._evict()
+        threading.Thread(target=self._run, args=(job, load), daemon=True).start()
+        return job
+
+    def _evict(self) -> None:
+        excess = len(self.jobs) - self.max_jobs
+        if excess <= 0:
+            return
+        # Finished longest ago first, so a slow job is not dropped the moment it ends
+        finished = sorted((job for job in self.jobs.values() if job.finished_at is not None),
+                          key=lambda job: job.finished_at)
+        for old in finished[:excess]:
+            del self.jobs[old.id]
+            if old.path and os.path.exists(old.path):
+                os.remove(old.path)
+
+    def _run(self, job: ReportJob, load: Callable[[], Dict[str, Dict]]) -> None:
+        job.status = "running"
+        try:
+            items = group_work(job.kind, load())
+            job.total = len(items)
+            job.path = os.path.join(self.output_dir, job.filename)
+            self._write(job, _chunks(items, CHUNK_SIZE))
+            job.status = "completed"
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+        job.finished_at = datetime.utcnow()
+        # Jobs kept past max_jobs while this one ran can go now
+        with self._lock:
+            self._evict()
+
+    def _rendered(self, job: ReportJob, chunks: Iterator[List[tuple]]) -> Iterator[Tuple[Any, int]]:
+        if job.workers <= 1:
+            for chunk in chunks:
+                yield render_chunk(job.kind, job.format, chunk)
+            return
+        with ProcessPoolExecutor(job.workers) as pool:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(pool.submit(render_chunk, job.kind, job.format, chunk))
+                if len(pending) >= job.workers * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def _write(self, job: ReportJob, chunks: Iterator[List[tuple]]) -> None:
+        if job.format == "zip":
+            with zipfile.ZipFile(job.path, "w", zipfile.ZIP_DEFLATED) as archive:
+                for files, count in self._rendered(job, chunks):
+                    for name, text in files:
+                        archive.writestr(name, text)
+                    job.processed += count
+            return
+        with open(job.path, "w", newline="") as output:
+            if job.format == "csv":
+                csv.writer(output).writerow(TRANSCRIPT_COLUMNS if job.kind == "transcripts" else ROSTER_COLUMNS)
+            for text, count in self._rendered(job, chunks):
+                output.write(text)
+                job.processed += count
@@ -0,0 +1,38 @@
+from typing import Collection, Iterable, Optional, Tuple
+
+# Academic rules shared by the API, the enrollment stores (in-process and
+# sharded) and the synthetic data generator. Plain values in, plain values
+# out, so they run the same inside a shard worker process.
+
+GRADE_POINTS = {'A': 4.0, 'B': 3.0, 'C': 2.0, 'D': 1.0, 'F': 0.0}
+MAX_CREDIT_HOURS = 18
+PROBATION_GPA = 2.0
+
+
+def exceeds_credit_limit(current_credits: int, course_credits: int) -> bool:
+    """Would taking the course push the student past the credit hour limit?"""
+    return current_credits + course_credits > MAX_CREDIT_HOURS
+
+
+def is_passing(grade: Optional[str]) -> bool:
+    """A graded course counts as completed unless the grade is an F"""
+    return bool(grade) and grade != 'F'
+
+
+def prerequisites_met(prerequisites: Iterable[str], passed_codes: Collection[str]) -> bool:
+    """Every direct prerequisite course code has been passed"""
+    return all(code in passed_codes for code in prerequisites)
+
+
+def gpa(graded: Iterable[Tuple[Optional[str], int]]) -> Optional[float]:
+    """Credit-weighted GPA over (grade, credits) pairs; None when nothing is graded"""
+    points = credits = 0
+    for grade, course_credits in graded:
+        if grade:
+            points += GRADE_POINTS[grade] * course_credits
+            credits += course_credits
+    return points / credits if credits else None
+
+
+def is_on_probation(student_gpa: float) -> bool:
+    return student_gpa < PROBATION_GPA
@@ -0,0 +1,286 @@
+import bisect
+import heapq
+import math
+import re
+import threading
+from collections import defaultdict
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def normalize(value: Any) -> str:
+    """Lowercase text form of a field value (enums are indexed by their value)"""
+    if isinstance(value, Enum):
+        value = value.value
+    return str(value).lower() if value is not None else ""
+
+
+def trigrams(text: str) -> set:
+    """Word-level trigrams, padded at the start of each word so prefixes match"""
+    grams = set()
+    for word in WORD_PATTERN.findall(text):
+        padded = f"  {word} "
+        for i in range(len(padded) - 2):
+            grams.add(padded[i:i + 3])
+    return grams
+
+
+def interior_trigrams(word: str) -> set:
+    """Unpadded trigrams: every word containing `word` has all of them"""
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+
+def typo_budget(word: str) -> int:
+    """Edits a query word may be away from a value word: none below 5 letters"""
+    return 0 if len(word) < 5 else 1 if len(word) < 9 else 2
+
+
+def within_edits(a: str, b: str, limit: int) -> bool:
+    """Are a and b at most `limit` insertions, deletions, substitutions or
+    adjacent transpositions apart (optimal string alignment distance)?"""
+    if abs(len(a) - len(b)) > limit:
+        return False
+    before, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (a[i - 1] != b[j - 1]))
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], before[j - 2] + 1)
+        if min(current) > limit:
+            return False
+        before, previous = previous, current
+    return previous[-1] <= limit
+
+
+def typo_match(words: List[str], budgets: List[int], text: str) -> bool:
+    """Every query word is in the text or within its typo budget of one of the text's words"""
+    text_words = WORD_PATTERN.findall(text)
+    return all(
+        word in text or (budget and any(within_edits(word, other, budget) for other in text_words))
+        for word, budget in zip(words, budgets)
+    )
+
+
+# A value matches when it contains the query, when it shares at least this
+# share of the query's trigrams, or when every query word is in it or within
+# that word's typo budget of one of its words
+MIN_OVERLAP = 0.6
+# An edit changes at most this many of a word's trigrams (a transposition)
+GRAMS_PER_EDIT = 4
+# Distinct field values looked at per query; beyond this the total is an estimate
+MAX_CANDIDATES = 1000
+MAX_SCANNED = 10000
+
+
+class SearchIndex:
+    """In-memory trigram inverted index over a fixed set of record fields.
+
+    Postings map each (field, trigram) pair to the distinct field values
+    containing it, and each value maps to the sorted ids of the documents
+    holding it, so a value shared by many documents (a major, a common name)
+    is scored once. Every value containing the query matches, as a plain
+    substring scan would, and is found through the query's unpadded
+    trigrams. Values sharing at least MIN_OVERLAP of the query's trigrams
+    match too, as do values where each query word of five letters or more
+    is within a typo or two of a word (short queries share too few trigrams
+    with a misspelling for the overlap alone). Those fuzzy candidates come
+    from the rarest query trigrams first and are capped at MAX_CANDIDATES
+    values. Matches are ranked by trigram similarity with bonuses for exact,
+    word-prefix and substring matches.
+    """
+
+    def __init__(self, fields: Iterable[str]):
+        self.fields = tuple(fields)
+        # Per field: trigram -> values, value -> sorted document ids, value -> trigram count
+        self.postings: Dict[str, Dict[str, set]] = {field: defaultdict(set) for field in self.fields}
+        self.values: Dict[str, Dict[str, List[str]]] = {field: {} for field in self.fields}
+        self.gram_counts: Dict[str, Dict[str, int]] = {field: {} for field in self.fields}
+        self.documents: Dict[str, Tuple[str, ...]] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def clear(self) -> None:
+        with self._lock:
+            for field in self.fields:
+                self.postings[field].clear()
+                self.values[field].clear()
+                self.gram_counts[field].clear()
+            self.documents.clear()
+
+    def add(self, doc_id: str, record: Dict[str, Any]) -> None:
+        with self._lock:
+            self._add(doc_id, record)
+
+    def remove(self, doc_id: str) -> None:
+        with self._lock:
+            self._remove(doc_id)
+
+    def _add(self, doc_id: str, record: Dict[str, Any]) -> None:
+        if doc_id in self.documents:
+            self._remove(doc_id)
+        texts = tuple(normalize(record.get(field)) for field in self.fields)
+        for field, text in zip(self.fields, texts):
+            docs = self.values[field].get(text)
+            if docs is None:
+                docs = self.values[field][text] = []
+                grams = trigrams(text)
+                self.gram_counts[field][text] = len(grams)
+                postings = self.postings[field]
+                for gram in grams:
+                    postings[gram].add(text)
+            bisect.insort(docs, doc_id)
+        self.documents[doc_id] = texts
+
+    def _remove(self, doc_id: str) -> None:
+        texts = self.documents.pop(doc_id, None)
+        if texts is None:
+            return
+        for field, text in zip(self.fields, texts):
+            docs = self.values[field][text]
+            docs.pop(bisect.bisect_left(docs, doc_id))
+            if docs:
+                continue
+            del self.values[field][text]
+            del self.gram_counts[field][text]
+            postings = self.postings[field]
+            for gram in trigrams(text):
+                posting = postings.get(gram)
+                if posting is not None:
+                    posting.discard(text)
+                    if not posting:
+                        del postings[gram]
+
+    def search(self, query: str, field: Optional[str] = None,
+               offset: int = 0, limit: int = 10) -> Tuple[int, List[Tuple[str, float]], bool]:
+        """Return (total matches, [(doc_id, score), ...], total is exact) for one page of results"""
+        query = normalize(query).strip()
+        if not query:
+            return 0, [], True
+        query_grams = trigrams(query)
+        words = WORD_PATTERN.findall(query)
+        budgets = [typo_budget(word) for word in words]
+        fields = (field,) if field else self.fields
+        min_hits = max(1, math.ceil(len(query_grams) * MIN_OVERLAP))
+        typo_hits = max(1, len(query_grams) - GRAMS_PER_EDIT * sum(budgets)) if any(budgets) else min_hits
+
+        def fuzzy(text: str, hits: int) -> bool:
+            if hits >= min_hits or query in text:
+                return True
+            return hits >= typo_hits and typo_match(words, budgets, text)
+
+        # Only candidate collection runs under the lock; scoring and ranking work on a copy
+        matches: List[Tuple[str, str, int, int, int]] = []
+        exact = True
+        with self._lock:
+            for f in fields:
+                found: Dict[str, int] = {}
+                if query_grams:
+                    exact &= self._collect(f, query_grams, min(min_hits, typo_hits), fuzzy, found)
+                self._substrings(f, query, words, query_grams, found)
+                gram_counts, values = self.gram_counts[f], self.values[f]
+                matches.extend((f, text, hits, gram_counts[text], len(values[text])) for text, hits in found.items())
+
+        total = sum(size for *_, size in matches)
+        scored = [
+            (self._score(query, len(query_grams), text, gram_count, hits), f, text)
+            for f, text, hits, gram_count, _ in matches
+        ]
+        # Every value holds at least one document, so the best offset+limit values cover the page
+        best = heapq.nsmallest(offset + limit, scored, key=lambda item: (-item[0], item[2], item[1]))
+
+        ranked: List[Tuple[str, float]] = []
+        seen = set()
+        skip = offset
+        with self._lock:
+            for score, f, text in best:
+                for doc_id in self.values[f].get(text, ()):
+                    if doc_id in seen:
+                        continue
+                    seen.add(doc_id)
+                    if skip:
+                        skip -= 1
+                        continue
+                    ranked.append((doc_id, score))
+                    if len(ranked) == limit:
+                        return total, ranked, exact
+        return total, ranked, exact
+
+    def _substrings(self, field: str, query: str, words: List[str], query_grams: set,
+                    found: Dict[str, int]) -> None:
+        """Add every value containing the query to `found` (value -> trigram hits).
+
+        A value containing the query holds all unpadded trigrams of the
+        query's longest word, so the candidates are the intersection of those
+        posting lists; a query without a three letter word scans the values.
+        """
+        field_postings = self.postings[field]
+        longest = max(words, key=len, default="")
+        grams = interior_trigrams(longest)
+        if grams:
+            postings = sorted((field_postings.get(gram, set()) for gram in grams), key=len)
+            candidates = [text for text in postings[0] if all(text in other for other in postings[1:])]
+        else:
+            candidates = list(self.values[field])
+        query_postings = [field_postings.get(gram, ()) for gram in query_grams]
+        for text in candidates:
+            if text not in found and query in text:
+                found[text] = sum(text in posting for posting in query_postings)
+
+    def _collect(self, field: str, query_grams: set, min_hits: int, accept: Callable[[str, int], bool],
+                 found: Dict[str, int]) -> bool:
+        """Add the values with min_hits of the query's trigrams that `accept` takes to `found`.
+
+        A value with min_hits of the query's trigrams must appear in at least
+        one of the len(query_grams) - min_hits + 1 smallest posting lists, so
+        candidates come from those alone and the larger lists are only probed.
+        When the candidate lists are too long, values are checked one at a
+        time, rarest lists first, until MAX_CANDIDATES match or MAX_SCANNED
+        were checked. Returns False when that cut the scan short.
+        """
+        field_postings = self.postings[field]
+        postings = sorted((field_postings.get(gram, ()) for gram in query_grams), key=len)
+        split = len(postings) - min_hits + 1
+        if sum(len(posting) for posting in postings[:split]) <= MAX_CANDIDATES:
+            hits: Dict[str, int] = {}
+            for posting in postings[:split]:
+                for text in posting:
+                    hits[text] = hits.get(text, 0) + 1
+            for posting in postings[split:]:
+                for text in hits:
+                    if text in posting:
+                        hits[text] += 1
+            found.update((text, count) for text, count in hits.items() if count >= min_hits and accept(text, count))
+            return True
+
+        seen = set()
+        accepted = 0
+        for posting in postings[:split]:
+            for text in posting:
+                if text in seen:
+                    continue
+                seen.add(text)
+                count = sum(text in other for other in postings)
+                if count >= min_hits and accept(text, count):
+                    found[text] = count
+                    accepted += 1
+                if accepted >= MAX_CANDIDATES or len(seen) >= MAX_SCANNED:
+                    return False
+        return True
+
+    @staticmethod
+    def _score(query: str, query_gram_count: int, text: str, gram_count: int, hits: int) -> float:
+        score = hits / (query_gram_count + gram_count - hits)
+        if text == query:
+            score += 1.0
+        else:
+            at = text.find(query)
+            if at == 0 or (at > 0 and not text[at - 1].isalnum()):
+                score += 0.5
+            elif at > 0:
+                score += 0.25
+        return round(score, 4)
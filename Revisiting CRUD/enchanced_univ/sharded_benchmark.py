@@ -0,0 +1,97 @@
+"""Throughput benchmark for the sharded store.
+
+Loads a synthetic dataset, enrollment history included, into ShardedStore
+with 1..N shards and runs the same mixed read/write workload against each,
+so ops/sec can be compared as shards are added. Enrollments run against
+real credit hours and passed prerequisites, and grade updates target
+existing enrollments. Scaling is bounded by the number of cores.
+
+    python sharded_benchmark.py --students 50000 --ops 40000 --shards 1 2 4 8
+    python sharded_benchmark.py --batch 200      # batched reads, one round trip per shard
+"""
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from data_generator import generate_dataset
+from sharded_store import ShardOperationError, ShardedStore
+
+
+def run_workload(store: ShardedStore, student_ids, course_ids, history, ops: int, clients: int, batch: int, seed: int):
+    """Run `ops` operations: 70% reads, 20% enrollments, 10% grade updates.
+
+    `history` holds (student_id, course_id) pairs of seeded enrollments.
+    """
+    errors = 0
+
+    def client(worker: int) -> int:
+        rng = random.Random(seed + worker)
+        rejected = 0
+        done = 0
+        while done < ops // clients:
+            roll = rng.random()
+            if roll < 0.7 and batch > 1:
+                reads = [("transcript", sid, (sid,)) for sid in rng.sample(student_ids, batch)]
+                rejected += sum(1 for ok, _ in store.run_batch(reads) if not ok)
+                done += batch
+                continue
+            try:
+                if roll < 0.7:
+                    store.transcript(rng.choice(student_ids))
+                elif roll < 0.9:
+                    store.enroll(rng.choice(student_ids), rng.choice(course_ids))
+                else:
+                    store.set_grade(*rng.choice(history), rng.choice("ABCDF"))
+            except ShardOperationError:
+                rejected += 1
+            done += 1
+        return rejected
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(clients) as pool:
+        errors = sum(pool.map(client, range(clients)))
+    return time.perf_counter() - start, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=20000)
+    parser.add_argument("--ops", type=int, default=20000)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--batch", type=int, default=1, help="Reads per round trip (1 = unbatched)")
+    parser.add_argument("--shards", type=int, nargs="+", default=sorted({1, 2, os.cpu_count() or 1}))
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    dataset = generate_dataset(args.students, seed=args.seed)
+    student_ids = [s['id'] for s in dataset["students"]]
+    course_ids = [c['id'] for c in dataset["courses"]]
+    history = [(e['student_id'], e['course_id']) for e in dataset["enrollments"]]
+    print(f"{len(student_ids)} students, {len(course_ids)} courses, {len(history)} enrollments, "
+          f"{os.cpu_count()} cores\n")
+    print(f"{'shards':>6}{'load s':>10}{'run s':>10}{'ops/s':>12}{'rejected':>10}")
+
+    for shards in args.shards:
+        with ShardedStore(shards) as store:
+            start = time.perf_counter()
+            store.add_students(dataset["students"])
+            for course in dataset["courses"]:
+                store.add_course(course)
+            store.add_enrollments(dataset["enrollments"])
+            load_seconds = time.perf_counter() - start
+
+            seconds, rejected = run_workload(
+                store, student_ids, course_ids, history, args.ops, args.clients, args.batch, args.seed
+            )
+            print(f"{shards:>6}{load_seconds:>10.2f}{seconds:>10.2f}{args.ops / seconds:>12.0f}{rejected:>10}")
+            capacity_ok = all(c['current_enrollment'] <= c['capacity'] for c in store.courses.values())
+            enrolled = sum(s['enrollments'] for s in store.stats())
+            seats = sum(c['current_enrollment'] for c in store.courses.values())
+            if not capacity_ok or enrolled != seats:
+                raise SystemExit(f"FAIL: shards hold {enrolled} enrollments but coordinator counts {seats} seats")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,528 @@
+import heapq
+import itertools
+import multiprocessing
+import os
+import threading
+import zlib
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from concurrent.futures import Future
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from rules import exceeds_credit_limit, gpa, is_on_probation, is_passing, prerequisites_met
+
+CAPACITY_EXCEEDED = "ENROLLMENT_CAPACITY_EXCEEDED"
+
+
+class ShardOperationError(Exception):
+    """An operation rejected by a shard or the coordinator, with an HTTP-style status"""
+
+    def __init__(self, status: int, detail: str, code: Optional[str] = None):
+        self.status = status
+        self.detail = detail
+        self.code = code
+        super().__init__(detail)
+
+
+def shard_for(student_id: str, shards: int) -> int:
+    """Stable shard number for a student (the same in every process)"""
+    return zlib.crc32(student_id.encode()) % shards
+
+
+# ----- shard side (runs inside a worker process, or in-process for LocalStore) -----
+
+class Shard:
+    """Shared-nothing slice of the students and their enrollments.
+
+    Each shard owns its students outright and keeps per-student credit hours
+    and passed course codes up to date on write, so every student-local rule
+    (duplicates, the credit limit, prerequisites, GPA) is checked without
+    talking to another process. The rules themselves live in rules.py. Only
+    course capacity is global; that is the coordinator's job.
+    """
+
+    def __init__(self, shard_id: int):
+        self.shard_id = shard_id
+        self.students: Dict[str, Dict] = {}
+        self.enrollments: Dict[str, Dict[str, Dict]] = defaultdict(dict)
+        self.credit_hours: Dict[str, int] = defaultdict(int)
+        self.passed: Dict[str, set] = defaultdict(set)
+
+    def _student(self, student_id: str) -> Dict:
+        student = self.students.get(student_id)
+        if student is None:
+            raise ShardOperationError(404, "Student not found")
+        return student
+
+    def _record(self, student_id: str, enrollment: Dict) -> None:
+        self.enrollments[student_id][enrollment['course_id']] = enrollment
+        self.credit_hours[student_id] += enrollment['credits']
+        if is_passing(enrollment['grade']):
+            self.passed[student_id].add(enrollment['course_code'])
+
+    def _refresh(self, student_id: str) -> Optional[float]:
+        """Rebuild credit hours and passed codes; returns the new GPA if anything is graded"""
+        history = self.enrollments.get(student_id, {}).values()
+        self.credit_hours[student_id] = sum(e['credits'] for e in history)
+        self.passed[student_id] = {e['course_code'] for e in history if is_passing(e['grade'])}
+        student_gpa = gpa((e['grade'], e['credits']) for e in history)
+        if student_gpa is not None:
+            student = self.students[student_id]
+            student['gpa'] = student_gpa
+            student['is_on_probation'] = is_on_probation(student_gpa)
+        return student_gpa
+
+    def op_put_students(self, students: List[Dict]) -> int:
+        for student in students:
+            self.students[student['id']] = student
+        return len(students)
+
+    def op_put_enrollments(self, enrollments: List[Dict]) -> int:
+        """Load existing enrollments (id, student_id, course_id, course_code, credits, grade)"""
+        for enrollment in enrollments:
+            self._student(enrollment['student_id'])
+            self._record(enrollment['student_id'], enrollment)
+        return len(enrollments)
+
+    def op_get_student(self, student_id: str) -> Dict:
+        return self._student(student_id)
+
+    def op_delete_student(self, student_id: str) -> List[str]:
+        """Remove a student, returning the course ids whose seats are freed"""
+        self._student(student_id)
+        del self.students[student_id]
+        self.credit_hours.pop(student_id, None)
+        self.passed.pop(student_id, None)
+        return list(self.enrollments.pop(student_id, {}))
+
+    def op_enroll(self, student_id: str, course: Dict, enrollment: Dict) -> Dict:
+        self._student(student_id)
+        if course['id'] in self.enrollments[student_id]:
+            raise ShardOperationError(409, "Student is already enrolled in this course")
+        current = self.credit_hours[student_id]
+        if exceeds_credit_limit(current, course['credits']):
+            raise ShardOperationError(
+                409, f"Enrollment would exceed 18 credit hour limit. Current: {current}, Course: {course['credits']}"
+            )
+        if not prerequisites_met(course.get('prerequisites', ()), self.passed[student_id]):
+            raise ShardOperationError(409, "Student has not completed required prerequisites")
+        enrollment = dict(enrollment, course_id=course['id'], course_code=course['course_code'],
+                          credits=course['credits'], grade=None)
+        self._record(student_id, enrollment)
+        return enrollment
+
+    def op_drop_enrollment(self, student_id: str, course_id: str) -> bool:
+        """Undo an enrollment the caller could not apply; True if one was removed"""
+        if self.enrollments.get(student_id, {}).pop(course_id, None) is None:
+            return False
+        self._refresh(student_id)
+        return True
+
+    def op_set_grade(self, student_id: str, course_id: str, grade: str) -> float:
+        enrollment = self.enrollments.get(student_id, {}).get(course_id)
+        if enrollment is None:
+            raise ShardOperationError(404, "Enrollment not found")
+        enrollment['grade'] = grade
+        return self._refresh(student_id)
+
+    def op_drop_course(self, course_id: str) -> Dict[str, float]:
+        """Remove a course's enrollments; returns the new GPA of students who lost a graded one"""
+        regraded = {}
+        for student_id, history in self.enrollments.items():
+            enrollment = history.pop(course_id, None)
+            if enrollment is None:
+                continue
+            student_gpa = self._refresh(student_id)
+            if enrollment['grade'] and student_gpa is not None:
+                regraded[student_id] = student_gpa
+        return regraded
+
+    def op_update_course(self, course_id: str, course_code: str, credits: int) -> Dict[str, float]:
+        """Apply a course code or credit change; returns the new GPA of students graded in it"""
+        regraded = {}
+        for student_id, history in self.enrollments.items():
+            enrollment = history.get(course_id)
+            if enrollment is None:
+                continue
+            enrollment['course_code'] = course_code
+            enrollment['credits'] = credits
+            student_gpa = self._refresh(student_id)
+            if enrollment['grade'] and student_gpa is not None:
+                regraded[student_id] = student_gpa
+        return regraded
+
+    def op_transcript(self, student_id: str) -> Dict:
+        student = self._student(student_id)
+        history = list(self.enrollments.get(student_id, {}).values())
+        return {
+            "student": student,
+            "course_history": history,
+            "credit_hours": self.credit_hours[student_id],
+            "cumulative_gpa": round(gpa((e['grade'], e['credits']) for e in history) or 0.0, 2)
+        }
+
+    def op_query_students(self, major: Optional[str], year: Optional[int], limit: int) -> Tuple[int, List[str]]:
+        """(total matches, the first `limit` matching ids in id order)"""
+        matches = [
+            sid for sid, s in self.students.items()
+            if (major is None or s['major'] == major) and (year is None or s['year'] == year)
+        ]
+        return len(matches), heapq.nsmallest(limit, matches)
+
+    def op_clear(self) -> None:
+        self.students.clear()
+        self.enrollments.clear()
+        self.credit_hours.clear()
+        self.passed.clear()
+
+    def op_stats(self) -> Dict[str, int]:
+        return {
+            "shard": self.shard_id,
+            "pid": os.getpid(),
+            "students": len(self.students),
+            "enrollments": sum(len(e) for e in self.enrollments.values())
+        }
+
+    def op_batch(self, operations: List[Tuple[str, tuple]]) -> List[Tuple[bool, Any]]:
+        """Run several operations for one round trip; failures don't stop the batch"""
+        return [self.execute(op, args) for op, args in operations]
+
+    def execute(self, op: str, args: tuple) -> Tuple[bool, Any]:
+        # Any failure becomes an error reply: an exception escaping here would
+        # kill the shard process and leave its callers waiting on a dead pipe
+        try:
+            return True, getattr(self, f"op_{op}")(*args)
+        except ShardOperationError as e:
+            return False, (e.status, e.detail)
+        except Exception as e:
+            return False, (500, f"Shard {self.shard_id} failed on {op}: {type(e).__name__}: {e}")
+
+
+def _shard_main(conn, shard_id: int) -> None:
+    shard = Shard(shard_id)
+    while True:
+        message = conn.recv()
+        if message is None:
+            break
+        request_id, op, args = message
+        ok, result = shard.execute(op, args)
+        try:
+            conn.send((request_id, ok, result))
+        except Exception as e:  # a result that cannot be pickled
+            conn.send((request_id, False, (500, f"Shard {shard_id} could not send the {op} result: {e}")))
+    conn.close()
+
+
+# ----- front side (runs in the API process) -----
+
+class _ShardClient:
+    """Pipe to one shard process; callers from any thread get a Future per request"""
+
+    def __init__(self, shard_id: int, context):
+        self.conn, child = context.Pipe()
+        self.process = context.Process(target=_shard_main, args=(child, shard_id), daemon=True)
+        self.process.start()
+        child.close()
+        self.pending: Dict[int, Future] = {}
+        self._ids = itertools.count()
+        self._send_lock = threading.Lock()
+        self._reader = threading.Thread(target=self._read_responses, daemon=True)
+        self._reader.start()
+
+    def submit(self, op: str, *args) -> Future:
+        future = Future()
+        with self._send_lock:
+            request_id = next(self._ids)
+            self.pending[request_id] = future
+            try:
+                self.conn.send((request_id, op, args))
+            except (OSError, ValueError) as e:
+                self.pending.pop(request_id, None)
+                future.set_exception(ShardOperationError(503, f"Shard process unavailable: {e}"))
+        return future
+
+    def _read_responses(self) -> None:
+        while True:
+            try:
+                request_id, ok, result = self.conn.recv()
+            except (EOFError, OSError):
+                break
+            future = self.pending.pop(request_id)
+            if ok:
+                future.set_result(result)
+            else:
+                future.set_exception(ShardOperationError(*result))
+        for future in self.pending.values():
+            future.set_exception(ShardOperationError(503, "Shard process exited"))
+
+    def close(self) -> None:
+        with self._send_lock:
+            self.conn.send(None)
+        self.process.join(timeout=5)
+        self.conn.close()
+
+
+class _LocalShardClient:
+    """Same interface as _ShardClient for a Shard living in this process"""
+
+    def __init__(self, shard_id: int):
+        self.shard = Shard(shard_id)
+        self._lock = threading.Lock()
+
+    def submit(self, op: str, *args) -> Future:
+        future = Future()
+        with self._lock:
+            ok, result = self.shard.execute(op, args)
+        if ok:
+            future.set_result(result)
+        else:
+            future.set_exception(ShardOperationError(*result))
+        return future
+
+    def close(self) -> None:
+        pass
+
+
+class EnrollmentStore(ABC):
+    """Owner of every enrollment rule check, as called by the API handlers.
+
+    Students and their enrollments live in shards, routed by student id.
+    Course records and seat counts stay with the coordinator in the API
+    process: `courses` may be the API's own course dict, whose
+    `current_enrollment` counters the store then keeps. An enrollment takes a
+    seat under a short seat lock, has the student's shard check and record
+    it, and gives the seat back if the shard says no; no lock is held across
+    the shard round trip. Queries fan out to every shard and merge.
+    """
+
+    def __init__(self, courses: Optional[Dict[str, Dict]] = None):
+        self.courses: Dict[str, Dict] = courses if courses is not None else {}
+        self.shards: List[Any] = self._start_shards()
+        self._seat_lock = threading.Lock()
+        self._enrollment_ids = itertools.count(1)
+
+    @abstractmethod
+    def _start_shards(self) -> List[Any]:
+        ...
+
+    def __enter__(self) -> "EnrollmentStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for shard in self.shards:
+            shard.close()
+
+    def shard(self, student_id: str):
+        return self.shards[shard_for(student_id, len(self.shards))]
+
+    def _broadcast(self, op: str, *args) -> List[Any]:
+        return [f.result() for f in [s.submit(op, *args) for s in self.shards]]
+
+    def _by_shard(self, records: Iterable[Dict], key: str) -> Dict[int, List[Dict]]:
+        by_shard: Dict[int, List[Dict]] = defaultdict(list)
+        for record in records:
+            by_shard[shard_for(record[key], len(self.shards))].append(record)
+        return by_shard
+
+    def _release_seat(self, course_id: str) -> None:
+        with self._seat_lock:
+            course = self.courses.get(course_id)
+            if course:
+                course['current_enrollment'] = max(0, course['current_enrollment'] - 1)
+
+    def clear(self) -> None:
+        """Forget every student and enrollment (course records belong to the caller)"""
+        self._broadcast("clear")
+
+    # ----- students -----
+
+    def add_students(self, students: Iterable[Dict]) -> int:
+        """Add or replace students; each needs an id, the shards also keep gpa"""
+        futures = [
+            self.shards[i].submit("put_students", batch)
+            for i, batch in self._by_shard(students, 'id').items()
+        ]
+        return sum(f.result() for f in futures)
+
+    def add_enrollments(self, enrollments: Iterable[Dict]) -> int:
+        """Load existing enrollments without capacity checks (seat counts are the caller's)"""
+        compact = [
+            {
+                'id': e['id'],
+                'student_id': e['student_id'],
+                'course_id': e['course_id'],
+                'course_code': self.courses[e['course_id']]['course_code'],
+                'credits': self.courses[e['course_id']]['credits'],
+                'grade': e.get('grade')
+            }
+            for e in enrollments
+        ]
+        futures = [
+            self.shards[i].submit("put_enrollments", batch)
+            for i, batch in self._by_shard(compact, 'student_id').items()
+        ]
+        return sum(f.result() for f in futures)
+
+    def get_student(self, student_id: str) -> Dict:
+        return self.shard(student_id).submit("get_student", student_id).result()
+
+    def transcript(self, student_id: str) -> Dict:
+        return self.shard(student_id).submit("transcript", student_id).result()
+
+    def delete_student(self, student_id: str) -> int:
+        """Delete a student and release their seats, returning the seats released"""
+        course_ids = self.shard(student_id).submit("delete_student", student_id).result()
+        for course_id in course_ids:
+            self._release_seat(course_id)
+        return len(course_ids)
+
+    def query_students(self, major: Optional[str] = None, year: Optional[int] = None,
+                       offset: int = 0, limit: int = 10) -> Tuple[int, List[str]]:
+        """Scatter-gather filter; pages are in student id order across all shards"""
+        results = self._broadcast("query_students", major, year, offset + limit)
+        merged = heapq.merge(*(ids for _, ids in results))
+        return sum(total for total, _ in results), list(itertools.islice(merged, offset, offset + limit))
+
+    # ----- courses (coordinator) -----
+
+    def add_course(self, course: Dict) -> None:
+        self.courses[course['id']] = dict(course, current_enrollment=course.get('current_enrollment', 0))
+
+    def update_course(self, course_id: str, course_code: str, credits: int) -> Dict[str, float]:
+        """Propagate a code or credit change; returns {student_id: new GPA} for regraded students"""
+        regraded: Dict[str, float] = {}
+        for result in self._broadcast("update_course", course_id, course_code, credits):
+            regraded.update(result)
+        return regraded
+
+    def remove_course(self, course_id: str) -> Dict[str, float]:
+        """Drop a course and its enrollments; returns {student_id: new GPA} for regraded students"""
+        regraded: Dict[str, float] = {}
+        for result in self._broadcast("drop_course", course_id):
+            regraded.update(result)
+        with self._seat_lock:
+            self.courses.pop(course_id, None)
+        return regraded
+
+    def _take_seat(self, course_id: str) -> Dict:
+        """Reserve a seat and return the course summary the shard needs"""
+        with self._seat_lock:
+            course = self.courses.get(course_id)
+            if course is None:
+                raise ShardOperationError(404, "Course not found")
+            if course['current_enrollment'] >= course['capacity']:
+                raise ShardOperationError(409, "Course has reached maximum capacity", CAPACITY_EXCEEDED)
+            course['current_enrollment'] += 1
+            return {key: course[key] for key in ('id', 'course_code', 'credits', 'prerequisites')}
+
+    def enroll(self, student_id: str, course_id: str, enrollment: Optional[Dict] = None) -> Dict:
+        """Check and record one enrollment; `enrollment` holds extra fields to keep with it"""
+        summary = self._take_seat(course_id)
+        enrollment = dict(enrollment or {}, student_id=student_id)
+        enrollment.setdefault('id', f"ENR{next(self._enrollment_ids):08X}")
+        try:
+            return self.shard(student_id).submit("enroll", student_id, summary, enrollment).result()
+        except BaseException:
+            self._release_seat(course_id)
+            raise
+
+    def enroll_many(self, requests: List[Tuple[str, str, Optional[Dict]]]) -> List[Tuple[bool, Any]]:
+        """Enroll (student_id, course_id, fields) rows with one round trip per shard.
+
+        Seats are taken in request order, so when rows compete for the last
+        seats of a course the earliest rows get them; a seat taken by a row
+        its shard then rejects is given back after the batch. Results come
+        back in request order as (ok, enrollment or (status, detail)).
+        """
+        results: List[Tuple[bool, Any]] = [None] * len(requests)
+        by_shard: Dict[int, List[int]] = defaultdict(list)
+        operations: Dict[int, tuple] = {}
+        for position, (student_id, course_id, fields) in enumerate(requests):
+            try:
+                summary = self._take_seat(course_id)
+            except ShardOperationError as e:
+                results[position] = (False, (e.status, e.detail))
+                continue
+            enrollment = dict(fields or {}, student_id=student_id)
+            enrollment.setdefault('id', f"ENR{next(self._enrollment_ids):08X}")
+            by_shard[shard_for(student_id, len(self.shards))].append(position)
+            operations[position] = ("enroll", (student_id, summary, enrollment))
+        futures = {
+            i: self.shards[i].submit("batch", [operations[p] for p in positions])
+            for i, positions in by_shard.items()
+        }
+        for i, positions in by_shard.items():
+            try:
+                replies = futures[i].result()
+            except ShardOperationError as e:
+                replies = [(False, (e.status, e.detail))] * len(positions)
+            for position, reply in zip(positions, replies):
+                results[position] = reply
+                if not reply[0]:
+                    self._release_seat(requests[position][1])
+        return results
+
+    def drop_enrollment(self, student_id: str, course_id: str) -> None:
+        """Undo an enrollment that could not be applied, giving its seat back"""
+        try:
+            dropped = self.shard(student_id).submit("drop_enrollment", student_id, course_id).result()
+        except ShardOperationError:
+            return
+        if dropped:
+            self._release_seat(course_id)
+
+    def set_grade(self, student_id: str, course_id: str, grade: str) -> float:
+        return self.shard(student_id).submit("set_grade", student_id, course_id, grade).result()
+
+    # ----- batching and introspection -----
+
+    def run_batch(self, operations: List[Tuple[str, str, tuple]]) -> List[Tuple[bool, Any]]:
+        """Run (op, student_id, args) tuples with one round trip per shard.
+
+        Only student-local operations are allowed here (use enroll_many for
+        enrollments), results come back in request order as (ok, result or
+        (status, detail)).
+        """
+        by_shard: Dict[int, List[int]] = defaultdict(list)
+        for position, (_, student_id, _) in enumerate(operations):
+            by_shard[shard_for(student_id, len(self.shards))].append(position)
+        futures = {
+            i: self.shards[i].submit("batch", [(operations[p][0], operations[p][2]) for p in positions])
+            for i, positions in by_shard.items()
+        }
+        results: List[Tuple[bool, Any]] = [None] * len(operations)
+        for i, positions in by_shard.items():
+            for position, result in zip(positions, futures[i].result()):
+                results[position] = result
+        return results
+
+    def stats(self) -> List[Dict[str, int]]:
+        return self._broadcast("stats")
+
+
+class LocalStore(EnrollmentStore):
+    """One in-process shard: the same rules and coordinator without worker processes"""
+
+    def _start_shards(self) -> List[Any]:
+        return [_LocalShardClient(0)]
+
+
+class ShardedStore(EnrollmentStore):
+    """Students and enrollments spread over N worker processes by student id.
+
+    Student-local operations are routed to the owning shard and run there in
+    parallel with the other shards; pipes carry the requests and a reader
+    thread per shard resolves the callers' futures.
+    """
+
+    def __init__(self, shards: Optional[int] = None, start_method: Optional[str] = None,
+                 courses: Optional[Dict[str, Dict]] = None):
+        self.shard_count = shards or os.cpu_count() or 1
+        self.context = multiprocessing.get_context(start_method)
+        super().__init__(courses)
+
+    def _start_shards(self) -> List[Any]:
+        return [_ShardClient(i, self.context) for i in range(self.shard_count)]
@@ -0,0 +1,142 @@
+"""Contention stress test for the Enhanced University API's write locking.
+
+Each scenario races many concurrent clients against one invariant and
+fails loudly if it breaks:
+
+  near-full    clients race for the last seats of an almost full course
+  credits      one student enrolls in many courses at once (18 credit limit)
+  reset        enrollments run while the data is cleared and reseeded
+
+In-process runs also check that no entity lock outlives its transaction.
+
+    python stress_locks.py                        # in-process via TestClient
+    python stress_locks.py --clients 500 --rounds 5
+    python stress_locks.py --url http://localhost:8000
+"""
+import argparse
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import httpx
+
+_codes = itertools.count()
+_emails = itertools.count()
+
+
+def make_client(url: str = None):
+    if url:
+        return httpx.Client(base_url=url, timeout=30.0)
+    from fastapi.testclient import TestClient
+    from main import app
+    return TestClient(app)
+
+
+def create_course(client, capacity: int, credits: int = 1) -> str:
+    code = next(_codes)
+    response = client.post("/courses", json={
+        "course_code": f"LOAD{900 + code // 1000:03d}-{code % 1000:03d}", "name": "Load Test Seminar", "department": "Engineering",
+        "credits": credits, "capacity": capacity, "prerequisites": []
+    })
+    if response.status_code != 201:
+        raise SystemExit(f"Could not create stress course: {response.text}")
+    return response.json()["id"]
+
+
+def create_students(client, count: int) -> List[str]:
+    def create(_):
+        n = next(_emails)
+        response = client.post("/students", json={
+            "name": "Stress Student", "email": f"stress.{n}.{time.time_ns()}@university.edu",
+            "major": "Engineering", "year": 2, "gpa": 3.0
+        })
+        return response.json()["id"]
+    with ThreadPoolExecutor(16) as pool:
+        return list(pool.map(create, range(count)))
+
+
+def enroll_all(client, pairs) -> List[int]:
+    with ThreadPoolExecutor(min(64, max(1, len(pairs)))) as pool:
+        return list(pool.map(
+            lambda pair: client.post("/enrollments", json={"student_id": pair[0], "course_id": pair[1]}).status_code,
+            pairs
+        ))
+
+
+def run_near_full(client, clients: int, capacity: int, prefilled: int) -> None:
+    """Fill a course to `prefilled` seats, then let `clients` race for the rest"""
+    course_id = create_course(client, capacity)
+    students = create_students(client, prefilled + clients)
+    for student_id in students[:prefilled]:
+        client.post("/enrollments", json={"student_id": student_id, "course_id": course_id})
+
+    codes = enroll_all(client, [(student_id, course_id) for student_id in students[prefilled:]])
+    enrolled = client.get(f"/courses/{course_id}").json()["current_enrollment"]
+    rows = len(client.get("/enrollments", params={"course_id": course_id}).json())
+    accepted = codes.count(201)
+    print(f"near-full: {clients} clients raced for {capacity - prefilled} seats: {accepted} accepted, "
+          f"{codes.count(409)} rejected, course reports {enrolled} enrolled, {rows} enrollment rows")
+    if accepted > capacity - prefilled or enrolled != prefilled + accepted or rows != enrolled or 500 in codes:
+        raise SystemExit("FAIL: course was oversubscribed or its counter drifted")
+
+
+def run_credits(client, courses: int) -> None:
+    """One student enrolls in many 3-credit courses at once; at most 6 fit in 18 credits"""
+    student_id = create_students(client, 1)[0]
+    course_ids = [create_course(client, capacity=10, credits=3) for _ in range(courses)]
+    codes = enroll_all(client, [(student_id, course_id) for course_id in course_ids])
+    accepted = codes.count(201)
+    print(f"credits: {courses} concurrent enrollments for one student: {accepted} accepted")
+    if accepted > 6 or 500 in codes:
+        raise SystemExit("FAIL: credit limit exceeded")
+
+
+def run_reset(client, clients: int) -> None:
+    """Enroll continuously while the stores are cleared and reseeded"""
+    client.post("/admin/seed-data")
+    courses = client.get("/courses").json()["courses"]
+    students = client.get("/students").json()["students"]
+    pairs = [(s["id"], c["id"]) for s in students for c in courses] * max(1, clients // 20)
+
+    with ThreadPoolExecutor(1) as pool:
+        writes = pool.submit(enroll_all, client, pairs)
+        time.sleep(0.05)  # let some enrollments land first
+        resets = [client.delete("/admin/clear-data").status_code, client.post("/admin/seed-data").status_code]
+        codes = writes.result()
+
+    counts = {}
+    for enrollment in client.get("/enrollments").json():
+        counts[enrollment["course_id"]] = counts.get(enrollment["course_id"], 0) + 1
+    drift = [c["id"] for c in client.get("/courses").json()["courses"]
+             if c["current_enrollment"] != counts.get(c["id"], 0)]
+    print(f"reset: {len(codes)} enrollments raced a clear and a reseed: "
+          f"{codes.count(201)} accepted, {sum(code >= 500 for code in codes)} server errors, "
+          f"{len(drift)} courses with a drifted counter")
+    if any(code >= 500 for code in codes + resets) or drift:
+        raise SystemExit("FAIL: reset raced with writers")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Base URL of a running server (default: in-process TestClient)")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    client = make_client(args.url)
+    client.delete("/admin/clear-data")
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        run_near_full(client, args.clients, capacity=25, prefilled=20)
+        run_credits(client, courses=12)
+        run_reset(client, args.clients)
+    if not args.url:
+        from main import locks
+        if locks.active():
+            raise SystemExit(f"FAIL: {locks.active()} entity locks left behind after the run")
+    print(f"OK: every invariant held ({time.perf_counter() - start:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
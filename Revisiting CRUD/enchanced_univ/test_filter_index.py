@@ -0,0 +1,106 @@
+import random
+
+import pytest
+
+from filter_index import FilterIndex, SortedSeqs
+
+FIELDS = {"major": lambda r: r['major'], "year": lambda r: r['year']}
+MAJORS = ("Physics", "Biology", "Mathematics")
+
+
+@pytest.fixture
+def small_blocks(monkeypatch):
+    # Tiny blocks so a few hundred records split, empty and merge blocks
+    monkeypatch.setattr(SortedSeqs, "LOAD", 4)
+
+
+def random_record(rng):
+    return {"major": rng.choice(MAJORS), "year": rng.randint(1, 4)}
+
+
+def expected(records, order, filters):
+    return [rid for rid in order
+            if rid in records and all(records[rid][f] == v for f, v in filters.items() if v is not None)]
+
+
+def churn(rng, index, records, order, steps):
+    for _ in range(steps):
+        op = rng.random()
+        if op < 0.55 or not records:
+            rid = f"R{len(order)}"
+            order.append(rid)
+            records[rid] = random_record(rng)
+            index.add(rid, records[rid])
+        elif op < 0.8:
+            rid = rng.choice(sorted(records))
+            records[rid] = random_record(rng)
+            index.add(rid, records[rid])
+        else:
+            rid = rng.choice(sorted(records))
+            del records[rid]
+            index.remove(rid)
+
+
+def test_sorted_seqs_matches_a_sorted_list(small_blocks):
+    rng = random.Random(1)
+    seqs, reference = SortedSeqs(), []
+    for _ in range(2000):
+        seq = rng.randrange(500)
+        if seq in reference:
+            seqs.discard(seq)
+            reference.remove(seq)
+        else:
+            seqs.add(seq)
+            reference.append(seq)
+            reference.sort()
+        assert len(seqs) == len(reference)
+    assert list(seqs.iter_from(0)) == reference
+    for probe in (0, 7, 250, 499, 600):
+        assert list(seqs.iter_from(probe)) == reference[probe:]
+        assert list(seqs.iter_after(probe)) == [s for s in reference if s > probe]
+        assert list(seqs.iter_through(probe)) == [s for s in reversed(reference) if s <= probe]
+
+
+def test_offset_pages_match_a_scan(small_blocks):
+    rng = random.Random(2)
+    index, records, order = FilterIndex(FIELDS), {}, []
+    churn(rng, index, records, order, 600)
+    for filters in ({}, {"major": "Physics"}, {"year": 2}, {"major": "Biology", "year": 3}):
+        matches = expected(records, order, filters)
+        for offset in (0, 3, 10, len(matches)):
+            total, ids, next_cursor, has_prev = index.query(filters, offset=offset, limit=5)
+            assert total == len(matches)
+            assert ids == matches[offset:offset + 5]
+            assert (next_cursor is not None) == (offset + 5 < len(matches))
+            assert has_prev == (offset > 0)
+
+
+def test_cursor_pages_walk_every_match_once(small_blocks):
+    rng = random.Random(3)
+    index, records, order = FilterIndex(FIELDS), {}, []
+    churn(rng, index, records, order, 600)
+    for filters in ({}, {"major": "Mathematics"}, {"major": "Physics", "year": 1}):
+        matches = expected(records, order, filters)
+        seen, cursor, first = [], None, True
+        while True:
+            _, ids, cursor, has_prev = index.query(filters, limit=7, cursor=cursor)
+            # Only the page read without a cursor has nothing before it
+            assert has_prev == (not first)
+            seen.extend(ids)
+            first = False
+            if cursor is None:
+                break
+        assert seen == matches
+
+
+def test_reindex_keeps_creation_order():
+    index = FilterIndex(FIELDS)
+    for i in range(5):
+        index.add(f"R{i}", {"major": "Physics", "year": 1})
+    index.add("R1", {"major": "Biology", "year": 1})
+    index.add("R1", {"major": "Physics", "year": 1})
+    index.add("R3", {"major": "Physics", "year": 1})
+    _, ids, _, _ = index.query({"major": "Physics"}, limit=10)
+    assert ids == ["R0", "R1", "R2", "R3", "R4"]
+    assert index.query({"major": "Biology"}, limit=10)[:2] == (0, [])
+    assert index.query({"major": "Physics", "year": 1}, limit=10)[0] == 5
@@ -0,0 +1,90 @@
+import random
+
+import pytest
+
+from data_generator import generate_dataset
+from search_index import SearchIndex, normalize, within_edits
+
+FIELDS = ("name", "email", "major")
+
+
+@pytest.fixture(scope="module")
+def students():
+    return generate_dataset(students=2000, seed=7)["students"]
+
+
+@pytest.fixture(scope="module")
+def index(students):
+    index = SearchIndex(FIELDS)
+    for student in students:
+        index.add(student['id'], student)
+    return index
+
+
+def matching_ids(index, query, field):
+    total, results, exact = index.search(query, field, limit=len(index))
+    return {doc_id for doc_id, _ in results}
+
+
+def substring_ids(students, query, field):
+    # What the endpoints did before the index: a case-insensitive substring scan
+    return {s['id'] for s in students if query.lower() in normalize(s[field])}
+
+
+def test_every_substring_match_is_found(index, students):
+    rng = random.Random(3)
+    for _ in range(300):
+        field = rng.choice(FIELDS)
+        value = normalize(rng.choice(students)[field])
+        size = rng.randint(2, 8)
+        start = rng.randrange(0, max(1, len(value) - size + 1))
+        query = value[start:start + size]
+        expected = substring_ids(students, query, field)
+        assert expected <= matching_ids(index, query, field), (field, query)
+
+
+@pytest.mark.parametrize("query, field", [
+    ("son", "name"), ("ill", "name"), ("Al", "name"), ("hns", "name"), ("@univ", "email"),
+    (".j", "email"), ("ience", "major"), ("th", "name"),
+])
+def test_mid_word_and_short_substrings(index, students, query, field):
+    expected = substring_ids(students, query, field)
+    assert expected
+    assert expected <= matching_ids(index, query, field)
+
+
+def test_substring_matches_rank_above_fuzzy_ones(index, students):
+    total, results, _ = index.search("son", "name", limit=5)
+    assert all("son" in normalize(s['name']) for s in students if s['id'] in {d for d, _ in results})
+
+
+@pytest.mark.parametrize("typo, intended", [
+    ("alcie", "alice"), ("smoth", "smith"), ("simth", "smith"), ("wilsen", "wilson"), ("jonhson", "johnson"),
+])
+def test_short_typos_find_the_intended_word(index, students, typo, intended):
+    expected = {s['id'] for s in students if intended in normalize(s['name']).split()}
+    assert expected
+    assert expected <= matching_ids(index, typo, "name")
+
+
+def test_unrelated_queries_match_nothing(index):
+    assert index.search("xq", "name") == (0, [], True)
+    assert index.search("zzzzz", "name")[0] == 0
+
+
+def test_removed_documents_stop_matching(students):
+    index = SearchIndex(FIELDS)
+    for student in students[:50]:
+        index.add(student['id'], student)
+    student = students[0]
+    query = normalize(student['name'])[1:4]
+    assert student['id'] in matching_ids(index, query, "name")
+    index.remove(student['id'])
+    assert student['id'] not in matching_ids(index, query, "name")
+
+
+def test_within_edits():
+    assert within_edits("simth", "smith", 1)
+    assert within_edits("wilsen", "wilson", 1)
+    assert not within_edits("smoth", "smyth", 0)
+    assert not within_edits("alice", "bob", 2)
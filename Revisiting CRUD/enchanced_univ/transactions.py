@@ -0,0 +1,144 @@
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Hashable, Iterable, List
+
+
+class LockManager:
+    """Fine-grained locks keyed by entity, e.g. ("course", course_id).
+
+    A transaction names every entity it reads-then-writes and the locks are
+    taken in sorted key order, so two transactions touching overlapping
+    students and courses can never deadlock. Transactions on disjoint
+    entities run in parallel.
+
+    A key's lock exists only while some transaction holds or waits for it:
+    entries are reference counted and dropped on the last release, so the
+    table stays as small as the set of entities in flight.
+    """
+
+    def __init__(self):
+        self._guard = threading.Lock()
+        # key -> [lock, holders and waiters]
+        self._locks: Dict[Hashable, List] = {}
+        # Gate between entity transactions (shared) and whole-store resets (exclusive)
+        self._gate = threading.Condition()
+        self._active = 0
+        self._exclusive = False
+        self._local = threading.local()
+
+    def _acquire(self, key: Hashable) -> None:
+        with self._guard:
+            entry = self._locks.get(key)
+            if entry is None:
+                entry = self._locks[key] = [threading.RLock(), 0]
+            entry[1] += 1
+        entry[0].acquire()
+
+    def _release(self, key: Hashable) -> None:
+        with self._guard:
+            entry = self._locks[key]
+            entry[0].release()
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[key]
+
+    def active(self) -> int:
+        """Number of keys currently held or waited for"""
+        with self._guard:
+            return len(self._locks)
+
+    @contextmanager
+    def shared(self):
+        """Keep whole-store resets out without holding any entity lock.
+
+        hold() enters this itself; handlers call it directly around work done
+        outside any entity lock, such as a round trip to the enrollment store.
+        """
+        # Nested holds on the same thread pass straight through, so a reset
+        # waiting for the gate can never deadlock a transaction already inside
+        depth = getattr(self._local, "depth", 0)
+        if depth == 0:
+            with self._gate:
+                while self._exclusive:
+                    self._gate.wait()
+                self._active += 1
+        self._local.depth = depth + 1
+        try:
+            yield
+        finally:
+            self._local.depth = depth
+            if depth == 0:
+                with self._gate:
+                    self._active -= 1
+                    if not self._active:
+                        self._gate.notify_all()
+
+    @contextmanager
+    def exclusive(self):
+        """Wait for every running transaction to finish and keep new ones out.
+
+        For operations that replace or clear every store at once, such as
+        the admin seed and clear endpoints.
+        """
+        with self._gate:
+            while self._exclusive:
+                self._gate.wait()
+            self._exclusive = True
+            while self._active:
+                self._gate.wait()
+        try:
+            yield
+        finally:
+            with self._gate:
+                self._exclusive = False
+                self._gate.notify_all()
+
+    @contextmanager
+    def hold(self, keys: Iterable[Hashable]):
+        ordered = sorted(set(keys), key=repr)
+        acquired = []
+        with self.shared():
+            try:
+                for key in ordered:
+                    self._acquire(key)
+                    acquired.append(key)
+                yield
+            finally:
+                for key in reversed(acquired):
+                    self._release(key)
+
+    @contextmanager
+    def hold_linked(self, primary: Hashable, linked: Callable[[], Iterable[Hashable]]):
+        """Hold `primary` plus the locks of every entity it currently links to.
+
+        The links are read before any lock is taken, so they are read again
+        once everything is held and the acquisition is retried if new links
+        appeared in between. Links may only be added while `primary` is
+        held, which guarantees the retry loop settles.
+        """
+        while True:
+            keys = set(linked())
+            with self.hold([primary, *keys]):
+                if set(linked()) <= keys:
+                    yield
+                    return
+
+
+def student_key(student_id: str) -> tuple:
+    return ("student", student_id)
+
+
+def course_key(course_id: str) -> tuple:
+    return ("course", course_id)
+
+
+def professor_key(professor_id: str) -> tuple:
+    return ("professor", professor_id)
+
+
+def email_key(email: str) -> tuple:
+    return ("email", email)
+
+
+def course_code_key(course_code: str) -> tuple:
+    return ("course_code", course_code)
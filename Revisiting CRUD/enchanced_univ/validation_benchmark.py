@@ -0,0 +1,71 @@
+"""Rows/sec for the validation paths used by the write endpoints.
+
+Compares per-row model validation with one TypeAdapter call per batch,
+full response-model validation with model_construct for stored data, and
+the precompiled course code pattern with re.match on a pattern string.
+
+model_construct only pays off over HTTP because the hot routes return
+stored_json(...): a route that returns a model under response_model has
+FastAPI dump, re-validate and serialize it, which the "response_model
+pass" row measures.
+
+    python validation_benchmark.py --rows 50000
+"""
+import argparse
+import re
+import time
+import warnings
+from typing import List
+
+from pydantic import TypeAdapter
+
+from data_generator import generate_dataset
+
+warnings.simplefilter("ignore", DeprecationWarning)
+from main import (COURSE_CODE_PATTERN, StudentModel, StudentResponse,  # noqa: E402
+                  stored_json, student_batch_adapter, validate_batch)
+
+
+def rate(label: str, rows: int, fn) -> float:
+    start = time.perf_counter()
+    fn()
+    seconds = time.perf_counter() - start
+    print(f"{label:<46}{rows / seconds:>14,.0f} rows/s")
+    return seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    args = parser.parse_args()
+
+    students = generate_dataset(args.rows, courses_per_department=8, professors=6)["students"]
+    payload = [{k: s[k] for k in ("name", "email", "major", "year", "gpa")} for s in students]
+    stored = [dict(StudentModel(**row).model_dump(), id=s['id'], created_at=s['created_at'],
+                   is_on_probation=s['is_on_probation']) for row, s in zip(payload, students)]
+    codes = [f"CS{100 + i % 900}-001" for i in range(args.rows)]
+
+    print("request validation")
+    rate("  StudentModel(**row) per row", args.rows, lambda: [StudentModel(**row) for row in payload])
+    rate("  TypeAdapter(List[StudentModel]) per batch", args.rows, lambda: student_batch_adapter.validate_python(payload))
+    broken = [dict(row, year=9) if i % 100 == 0 else row for i, row in enumerate(payload)]
+    rate("  validate_batch with 1% invalid rows", args.rows, lambda: validate_batch(student_batch_adapter, broken))
+
+    print("response models for stored records")
+    rate("  StudentResponse(**data)", args.rows, lambda: [StudentResponse(**data) for data in stored])
+    rate("  StudentResponse.model_construct(**data)", args.rows, lambda: [StudentResponse.model_construct(**data) for data in stored])
+
+    print("response serialization")
+    constructed = [StudentResponse.model_construct(**data) for data in stored]
+    response_adapter = TypeAdapter(List[StudentResponse])
+    rate("  response_model pass (validate + serialize)", args.rows,
+         lambda: response_adapter.dump_json(response_adapter.validate_python([m.model_dump() for m in constructed])))
+    rate("  stored_json(model_construct)", args.rows, lambda: stored_json(constructed))
+
+    print("course code check")
+    rate("  re.match(pattern_string, code)", args.rows, lambda: [re.match(r'^[A-Z]{2,4}\d{3}-\d{3}$', c) for c in codes])
+    rate("  COURSE_CODE_PATTERN.match(code)", args.rows, lambda: [COURSE_CODE_PATTERN.match(c) for c in codes])
+
+
+if __name__ == "__main__":
+    main()